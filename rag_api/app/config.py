@@ -1,5 +1,6 @@
 # app/config.py
 import os
+import re
 import json
 import boto3
 import logging
@@ -128,8 +129,32 @@ EMBEDDING_BATCH_SIZE = int(get_env_variable("EMBEDDING_BATCH_SIZE", "500"))
 # Higher values allow more parallelism but use more memory.
 EMBEDDING_MAX_QUEUE_SIZE = int(get_env_variable("EMBEDDING_MAX_QUEUE_SIZE", "3"))
 
+# Number of batches of a single file embedded and inserted concurrently.
+# The effective value is capped by EMBEDDING_PROVIDER_CONCURRENCY below.
+EMBEDDING_CONCURRENCY = int(get_env_variable("EMBEDDING_CONCURRENCY", "1"))
+
 env_value = get_env_variable("PDF_EXTRACT_IMAGES", "False").lower()
 PDF_EXTRACT_IMAGES = True if env_value == "true" else False
+# PDFs with at least this many pages are split into page ranges extracted in
+# parallel by the loader process pool (0 disables page-parallel extraction).
+PDF_PARALLEL_MIN_PAGES = int(get_env_variable("PDF_PARALLEL_MIN_PAGES", "100"))
+PDF_PARALLEL_PAGES_PER_TASK = int(
+    get_env_variable("PDF_PARALLEL_PAGES_PER_TASK", "25")
+)
+# Page ranges extracted ahead of the consumer; bounds the parsed pages held in
+# memory while earlier ones are embedded.
+PDF_PARALLEL_RANGES_IN_FLIGHT = int(
+    get_env_variable("PDF_PARALLEL_RANGES_IN_FLIGHT", "4")
+)
+# Worker processes parsing CPU-heavy formats (0 parses in the thread pool)
+RAG_PROCESS_POOL_SIZE = int(
+    get_env_variable("RAG_PROCESS_POOL_SIZE", str(min(os.cpu_count() or 1, 4)))
+)
+# Time budget (seconds) after which a PDF/Word loader strategy running outside
+# the thread pool is killed and the next one tried (0 disables), and how many
+# per-file "strategy that worked" verdicts to remember by content hash.
+LOADER_STRATEGY_TIMEOUT = float(get_env_variable("LOADER_STRATEGY_TIMEOUT", "60"))
+LOADER_VERDICT_CACHE_SIZE = int(get_env_variable("LOADER_VERDICT_CACHE_SIZE", "1024"))
 
 if POSTGRES_USE_UNIX_SOCKET:
     connection_suffix = f"{urllib.parse.quote_plus(POSTGRES_USER)}:{urllib.parse.quote_plus(POSTGRES_PASSWORD)}@/{urllib.parse.quote_plus(POSTGRES_DB)}?host={urllib.parse.quote_plus(DB_HOST)}"
@@ -138,6 +163,8 @@ else:
 
 CONNECTION_STRING = f"postgresql+psycopg2://{connection_suffix}"
 DSN = f"postgresql://{connection_suffix}"
+# Size of the asyncpg pool; bounds concurrent native async queries.
+PG_POOL_MAX_SIZE = int(get_env_variable("PG_POOL_MAX_SIZE", "10"))
 
 ## Logging
 
@@ -368,6 +395,155 @@ else:
 
 embeddings = init_embeddings(EMBEDDINGS_PROVIDER, EMBEDDINGS_MODEL)
 
+# Maximum in-flight embedding calls to the provider per worker, shared by all
+# concurrent ingestions. Local/single-GPU providers gain nothing from parallel
+# calls, hosted APIs do until they start returning 429s.
+_default_provider_concurrency = {
+    EmbeddingsProvider.OPENAI: 4,
+    EmbeddingsProvider.AZURE: 4,
+    EmbeddingsProvider.BEDROCK: 4,
+    EmbeddingsProvider.GOOGLE_GENAI: 4,
+    EmbeddingsProvider.GOOGLE_VERTEXAI: 4,
+    EmbeddingsProvider.HUGGINGFACETEI: 2,
+    EmbeddingsProvider.OLLAMA: 1,
+    EmbeddingsProvider.HUGGINGFACE: 1,
+}
+EMBEDDING_PROVIDER_CONCURRENCY = int(
+    get_env_variable(
+        "EMBEDDING_PROVIDER_CONCURRENCY",
+        str(_default_provider_concurrency[EMBEDDINGS_PROVIDER]),
+    )
+)
+# Retries (with exponential backoff, in seconds) when the provider rate limits.
+EMBEDDING_RATE_LIMIT_RETRIES = int(
+    get_env_variable("EMBEDDING_RATE_LIMIT_RETRIES", "3")
+)
+EMBEDDING_RATE_LIMIT_BACKOFF = float(
+    get_env_variable("EMBEDDING_RATE_LIMIT_BACKOFF", "2.0")
+)
+
+# Adaptive, token-aware batching: batches are packed up to a token budget
+# (and at most EMBEDDING_BATCH_SIZE chunks). The budget starts at
+# EMBEDDING_BATCH_TOKENS, halves on rate limits, shrinks when provider calls
+# exceed the target latency (seconds) and grows back while they stay fast.
+EMBEDDING_ADAPTIVE_BATCHING = (
+    get_env_variable("EMBEDDING_ADAPTIVE_BATCHING", "True").lower() == "true"
+)
+EMBEDDING_BATCH_TOKENS = int(get_env_variable("EMBEDDING_BATCH_TOKENS", "100000"))
+EMBEDDING_BATCH_MIN_TOKENS = int(
+    get_env_variable("EMBEDDING_BATCH_MIN_TOKENS", "4000")
+)
+EMBEDDING_BATCH_MAX_TOKENS = int(
+    get_env_variable("EMBEDDING_BATCH_MAX_TOKENS", "250000")
+)
+EMBEDDING_BATCH_TARGET_LATENCY = float(
+    get_env_variable("EMBEDDING_BATCH_TARGET_LATENCY", "10")
+)
+
+# Content-addressed embedding cache (pgvector only): chunks whose digest was
+# already embedded with the same provider/model are not sent to the provider.
+EMBEDDING_CACHE_ENABLED = (
+    get_env_variable("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+)
+EMBEDDING_CACHE_MODEL_KEY = f"{EMBEDDINGS_PROVIDER.value}:{EMBEDDINGS_MODEL}"
+
+# Query embedding cache: bounded in-process LRU with a TTL (seconds), backed by
+# an optional Redis shared across workers.
+QUERY_EMBEDDING_CACHE_SIZE = int(get_env_variable("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_CACHE_TTL = int(get_env_variable("QUERY_EMBEDDING_CACHE_TTL", "86400"))
+QUERY_EMBEDDING_CACHE_REDIS_URL = get_env_variable(
+    "QUERY_EMBEDDING_CACHE_REDIS_URL", ""
+)
+QUERY_EMBEDDING_CACHE_CASE_INSENSITIVE = (
+    get_env_variable("QUERY_EMBEDDING_CACHE_CASE_INSENSITIVE", "True").lower()
+    == "true"
+)
+
+# Cache of ranked /query results per (file_ids, normalized query, k), invalidated
+# when a file is re-embedded or deleted. 0 disables it. Redis (defaulting to the
+# query embedding cache's) shares invalidations across workers; without it other
+# workers would keep serving deleted chunks, so the cache is off by default.
+QUERY_RESULT_CACHE_REDIS_URL = get_env_variable(
+    "QUERY_RESULT_CACHE_REDIS_URL", QUERY_EMBEDDING_CACHE_REDIS_URL
+)
+QUERY_RESULT_CACHE_SIZE = int(
+    get_env_variable(
+        "QUERY_RESULT_CACHE_SIZE", "512" if QUERY_RESULT_CACHE_REDIS_URL else "0"
+    )
+)
+QUERY_RESULT_CACHE_TTL = int(get_env_variable("QUERY_RESULT_CACHE_TTL", "600"))
+
+# Background ingestion (/embed?async=true): worker tasks per process, the
+# bound on queued jobs, and how long finished jobs stay queryable (seconds).
+INGESTION_JOB_WORKERS = int(get_env_variable("INGESTION_JOB_WORKERS", "2"))
+INGESTION_JOB_QUEUE_SIZE = int(get_env_variable("INGESTION_JOB_QUEUE_SIZE", "100"))
+INGESTION_JOB_RETENTION = int(get_env_variable("INGESTION_JOB_RETENTION", "3600"))
+# Redis URL mirroring job status, so /jobs/{id} can be answered by any worker
+INGESTION_JOB_REDIS_URL = get_env_variable(
+    "INGESTION_JOB_REDIS_URL", QUERY_EMBEDDING_CACHE_REDIS_URL
+)
+
+# Insert embeddings with binary COPY over the asyncpg pool instead of ORM
+# row inserts (pgvector only).
+PG_BULK_INSERT_ENABLED = (
+    get_env_variable("PG_BULK_INSERT_ENABLED", "True").lower() == "true"
+)
+
+# Run pgvector queries and deletes natively on the asyncpg pool instead of
+# sync SQLAlchemy calls in the thread pool (pgvector only).
+PG_NATIVE_ASYNC_ENABLED = (
+    get_env_variable("PG_NATIVE_ASYNC_ENABLED", "True").lower() == "true"
+)
+
+# Approximate nearest neighbour index on langchain_pg_embedding (pgvector only).
+# The embedding column has no fixed dimension, so the index is built on
+# embedding::vector(N); N is detected from stored rows unless configured.
+PG_VECTOR_INDEX_TYPE = get_env_variable("PG_VECTOR_INDEX_TYPE", "hnsw").lower()
+if PG_VECTOR_INDEX_TYPE not in ("hnsw", "ivfflat", "none"):
+    raise ValueError(
+        f"Invalid PG_VECTOR_INDEX_TYPE: {PG_VECTOR_INDEX_TYPE}. "
+        "Choose 'hnsw', 'ivfflat' or 'none'."
+    )
+PG_VECTOR_INDEX_DIMENSIONS = int(get_env_variable("PG_VECTOR_INDEX_DIMENSIONS", "0"))
+PG_HNSW_M = int(get_env_variable("PG_HNSW_M", "16"))
+PG_HNSW_EF_CONSTRUCTION = int(get_env_variable("PG_HNSW_EF_CONSTRUCTION", "64"))
+PG_HNSW_EF_SEARCH = int(get_env_variable("PG_HNSW_EF_SEARCH", "40"))
+PG_IVFFLAT_LISTS = int(get_env_variable("PG_IVFFLAT_LISTS", "100"))
+PG_IVFFLAT_PROBES = int(get_env_variable("PG_IVFFLAT_PROBES", "10"))
+# "prefilter": file-filtered queries order only that file's rows by exact
+# distance (via the file_id index); "ann": use the global ANN index with
+# iterative scans (pgvector >= 0.8 for HNSW); "auto": "ann" for an HNSW index
+# on pgvector >= 0.8, "prefilter" otherwise.
+PG_FILTERED_SEARCH_MODE = get_env_variable("PG_FILTERED_SEARCH_MODE", "auto").lower()
+if PG_FILTERED_SEARCH_MODE not in ("auto", "prefilter", "ann"):
+    raise ValueError(
+        f"Invalid PG_FILTERED_SEARCH_MODE: {PG_FILTERED_SEARCH_MODE}. "
+        "Choose 'auto', 'prefilter' or 'ann'."
+    )
+# Hybrid retrieval for /query and /query_multiple: lexical (full-text) and
+# vector rankings fused with reciprocal rank fusion in one query (pgvector only).
+HYBRID_SEARCH_ENABLED = (
+    get_env_variable("HYBRID_SEARCH_ENABLED", "False").lower() == "true"
+)
+# PostgreSQL text search configuration used for the lexical ranking
+HYBRID_SEARCH_LANGUAGE = get_env_variable("HYBRID_SEARCH_LANGUAGE", "spanish").lower()
+if not re.fullmatch(r"[a-z_]+", HYBRID_SEARCH_LANGUAGE):
+    raise ValueError(f"Invalid HYBRID_SEARCH_LANGUAGE: {HYBRID_SEARCH_LANGUAGE}")
+# Clone the chunks of an identical file (same SHA-256, same user) already
+# embedded instead of parsing and embedding an upload again (pgvector only).
+UPLOAD_DEDUP_ENABLED = (
+    get_env_variable("UPLOAD_DEDUP_ENABLED", "True").lower() == "true"
+)
+# Parse text uploads straight from the request's spooled file instead of
+# copying them under RAG_UPLOAD_DIR first
+UPLOAD_ZERO_COPY_ENABLED = (
+    get_env_variable("UPLOAD_ZERO_COPY_ENABLED", "True").lower() == "true"
+)
+# Maximum number of (query, file_ids, k) items accepted by /query_batch
+QUERY_BATCH_MAX_ITEMS = int(get_env_variable("QUERY_BATCH_MAX_ITEMS", "32"))
+# Rows updated per statement when backfilling the file_id/user_id columns
+PG_BACKFILL_BATCH_SIZE = int(get_env_variable("PG_BACKFILL_BATCH_SIZE", "5000"))
+
 logger.info(f"Initialized embeddings of type: {type(embeddings)}")
 
 # Vector store
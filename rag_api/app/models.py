@@ -24,6 +24,10 @@ class StoreDocument(BaseModel):
     filename: str
     file_content_type: str
     file_id: str
+    # Skip chunks already stored by an interrupted ingestion of this file_id
+    resume: bool = False
+    # Treat the file as a new version of file_id: embed only changed chunks
+    update: bool = False
 
 
 class QueryRequestBody(BaseModel):
@@ -42,3 +46,14 @@ class QueryMultipleBody(BaseModel):
     query: str
     file_ids: List[str]
     k: int = 4
+
+
+class QueryBatchItem(BaseModel):
+    query: str
+    file_ids: List[str]
+    k: int = 4
+
+
+class QueryBatchBody(BaseModel):
+    items: List[QueryBatchItem]
+    entity_id: Optional[str] = None
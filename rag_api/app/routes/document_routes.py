@@ -1,5 +1,6 @@
 # app/routes/document_routes.py
 import os
+import mmap
 import uuid
 from pathlib import Path
 import hashlib
@@ -7,7 +8,20 @@ import traceback
 import aiofiles
 import aiofiles.os
 from shutil import copyfileobj
-from typing import List, Iterable, Optional, TYPE_CHECKING
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Iterable,
+    Iterator,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
 from concurrent.futures import ThreadPoolExecutor
 from fastapi import (
     APIRouter,
@@ -20,9 +34,11 @@ from fastapi import (
     Query,
     status,
 )
+from fastapi.responses import JSONResponse
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from functools import lru_cache
+from functools import partial
 import asyncio
 
 if TYPE_CHECKING:
@@ -37,6 +53,10 @@ from app.config import (
     CHUNK_OVERLAP,
     EMBEDDING_BATCH_SIZE,
     EMBEDDING_MAX_QUEUE_SIZE,
+    EMBEDDING_CONCURRENCY,
+    QUERY_BATCH_MAX_ITEMS,
+    UPLOAD_DEDUP_ENABLED,
+    UPLOAD_ZERO_COPY_ENABLED,
 )
 from app.constants import ERROR_MESSAGES
 from app.models import (
@@ -44,26 +64,28 @@ from app.models import (
     QueryRequestBody,
     DocumentResponse,
     QueryMultipleBody,
+    QueryBatchBody,
 )
+from app.services.embedding_batcher import embedding_batch_sizer
+from app.services.embedding_limiter import embedding_limiter
+from app.services.ingestion_jobs import IngestionJob, ingestion_jobs
+from app.services.query_embedding_cache import query_embedding_cache
+from app.services.query_result_cache import query_result_cache
 from app.services.vector_store.async_pg_vector import AsyncPgVector
+from app.services.vector_store.extended_pg_vector import ExtendedPgVector
 from app.utils.document_loader import (
     get_loader,
     clean_text,
     process_documents,
     cleanup_temp_encoding_file,
+    lazy_load_documents,
+    supports_buffer,
 )
 from app.utils.health import is_health_ok
 
 router = APIRouter()
 
 
-def calculate_num_batches(total: int, batch_size: int) -> int:
-    """Calculate the number of batches needed to process total items."""
-    if batch_size <= 0:
-        return 1
-    return (total + batch_size - 1) // batch_size
-
-
 def get_user_id(request: Request, entity_id: str = None) -> str:
     """Extract user ID from request or entity_id."""
     if not hasattr(request.state, "user"):
@@ -72,13 +94,20 @@ def get_user_id(request: Request, entity_id: str = None) -> str:
         return entity_id if entity_id else request.state.user.get("id")
 
 
-async def save_upload_file_async(file: UploadFile, temp_file_path: str) -> None:
-    """Save uploaded file asynchronously."""
+async def save_upload_file_async(
+    file: UploadFile, temp_file_path: str, hash_content: bool = True
+) -> Optional[str]:
+    """Save uploaded file asynchronously; returns its SHA-256 hex digest, or
+    None without `hash_content`."""
     try:
+        sha256 = hashlib.sha256() if hash_content else None
         async with aiofiles.open(temp_file_path, "wb") as temp_file:
             chunk_size = 64 * 1024  # 64 KB
             while content := await file.read(chunk_size):
+                if sha256 is not None:
+                    sha256.update(content)
                 await temp_file.write(content)
+        return sha256.hexdigest() if sha256 is not None else None
     except Exception as e:
         logger.error(
             "Failed to save uploaded file | Path: %s | Error: %s | Traceback: %s",
@@ -110,6 +139,57 @@ def save_upload_file_sync(file: UploadFile, temp_file_path: str) -> None:
         )
 
 
+def _map_upload(spooled) -> Union[bytes, mmap.mmap]:
+    """Return the content of an upload's spooled file without copying it to disk.
+
+    Still in memory, the content is read as bytes; once rolled over to disk,
+    the spool file is memory-mapped.
+    """
+    spooled.seek(0)
+    if not getattr(spooled, "_rolled", True):
+        return spooled.read()
+    try:
+        fileno = spooled.fileno()
+    except OSError:
+        return spooled.read()
+    if os.fstat(fileno).st_size == 0:
+        return b""
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+@asynccontextmanager
+async def open_upload(
+    file: UploadFile, temp_file_path: str, executor, hash_content: bool = True
+):
+    """Yield (buffer, file_sha256) for an upload.
+
+    Types the loaders can parse from memory (see supports_buffer) are served
+    from Starlette's spooled upload, so they are never written to disk a
+    second time. Every other type is copied to `temp_file_path` and buffer
+    is None. A memory-mapped buffer is closed on exit. Without
+    `hash_content`, file_sha256 is None.
+    """
+    if not (
+        UPLOAD_ZERO_COPY_ENABLED
+        and supports_buffer(file.filename, file.content_type)
+    ):
+        yield None, await save_upload_file_async(file, temp_file_path, hash_content)
+        return
+
+    loop = asyncio.get_running_loop()
+    buffer = await loop.run_in_executor(executor, _map_upload, file.file)
+    try:
+        file_sha256 = None
+        if hash_content:
+            file_sha256 = await loop.run_in_executor(
+                executor, lambda: hashlib.sha256(buffer).hexdigest()
+            )
+        yield buffer, file_sha256
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+
 def validate_file_path(base_dir: str, file_path: str) -> Optional[str]:
     """Validate that file_path resolves within base_dir. Returns resolved absolute path or None."""
     if not file_path or not file_path.strip():
@@ -137,15 +217,33 @@ def _make_unique_temp_path(user_id: str, filename: str) -> Optional[str]:
     return str(Path(RAG_UPLOAD_DIR, user_id, unique_name).resolve())
 
 
+def _get_process_pool(request: Request):
+    """The app's loader process pool, or None when disabled (or not started)."""
+    return getattr(request.app.state, "process_pool", None)
+
+
 async def load_file_content(
-    filename: str, content_type: str, file_path: str, executor
+    filename: str,
+    content_type: str,
+    file_path: str,
+    executor,
+    process_pool=None,
+    buffer=None,
 ) -> tuple:
-    """Load file content using appropriate loader."""
+    """Load file content using appropriate loader.
+
+    With a `buffer`, types that support it are parsed from memory and
+    `file_path` need not exist.
+    """
     loader = None
     try:
-        loader, known_type, file_ext = get_loader(filename, content_type, file_path)
+        loader, known_type, file_ext = get_loader(
+            filename, content_type, file_path, buffer=buffer
+        )
         loop = asyncio.get_running_loop()
-        data = await loop.run_in_executor(executor, lambda: list(loader.lazy_load()))
+        data = await loop.run_in_executor(
+            executor, lambda: list(lazy_load_documents(loader, process_pool))
+        )
         return data, known_type, file_ext
     finally:
         # Clean up temporary UTF-8 file if it was created for encoding conversion
@@ -153,6 +251,34 @@ async def load_file_content(
             cleanup_temp_encoding_file(loader)
 
 
+@contextmanager
+def stream_file_content(
+    filename: str,
+    content_type: str,
+    file_path: str,
+    process_pool=None,
+    file_sha256: Optional[str] = None,
+    buffer=None,
+):
+    """Open a lazy document stream for a file without materialising its pages.
+
+    Yields (documents, known_type, file_ext); the documents iterator parses the
+    file as it is consumed. CPU-heavy formats are parsed in the process pool,
+    when given. With a `buffer`, types that support it are parsed from memory.
+    The loader's temporary files are removed on exit.
+    """
+    loader = None
+    try:
+        loader, known_type, file_ext = get_loader(
+            filename, content_type, file_path, file_sha256, buffer
+        )
+        yield lazy_load_documents(loader, process_pool), known_type, file_ext
+    finally:
+        # Clean up temporary UTF-8 file if it was created for encoding conversion
+        if loader is not None:
+            cleanup_temp_encoding_file(loader)
+
+
 def extract_text_from_documents(documents: List[Document], file_ext: str) -> str:
     """Extract text content from loaded documents."""
     text_content = ""
@@ -170,9 +296,11 @@ def extract_text_from_documents(documents: List[Document], file_ext: str) -> str
 
 
 async def cleanup_temp_file_async(file_path: str) -> None:
-    """Clean up temporary file asynchronously."""
+    """Clean up temporary file asynchronously; a file never written is ignored."""
     try:
         await aiofiles.os.remove(file_path)
+    except FileNotFoundError:
+        pass
     except Exception as e:
         logger.error(
             "Failed to remove temporary file | Path: %s | Error: %s | Traceback: %s",
@@ -224,6 +352,15 @@ async def health_check():
         return {"status": "DOWN", "error": str(e)}, 503
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    return {
+        "query_embeddings": query_embedding_cache.stats(),
+        "query_results": query_result_cache.stats(),
+        "embedding_batches": embedding_batch_sizer.stats(),
+    }
+
+
 @router.get("/documents", response_model=list[DocumentResponse])
 async def get_documents_by_ids(request: Request, ids: list[str] = Query(...)):
     try:
@@ -279,6 +416,7 @@ async def delete_documents(request: Request, document_ids: List[str] = Body(...)
         else:
             existing_ids = vector_store.get_filtered_ids(document_ids)
             vector_store.delete(ids=document_ids)
+        await query_result_cache.invalidate(document_ids)
 
         if not all(id in existing_ids for id in document_ids):
             raise HTTPException(status_code=404, detail="One or more IDs not found")
@@ -304,96 +442,220 @@ async def delete_documents(request: Request, document_ids: List[str] = Body(...)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-# Cache the embedding function with LRU cache
-@lru_cache(maxsize=128)
-def get_cached_query_embedding(query: str):
-    return vector_store.embedding_function.embed_query(query)
+# In-flight query embeddings by normalized query, shared by concurrent requests
+_pending_query_embeddings: Dict[str, "asyncio.Future[List[float]]"] = {}
 
 
-@router.post("/query")
-async def query_embeddings_by_file_id(
-    body: QueryRequestBody,
-    request: Request,
-):
-    if not hasattr(request.state, "user"):
-        user_authorized = body.entity_id if body.entity_id else "public"
-    else:
-        user_authorized = (
-            body.entity_id if body.entity_id else request.state.user.get("id")
+def _supports_async_embedding(embedding_function) -> bool:
+    """True when the provider implements aembed_query natively.
+
+    The Embeddings base class falls back to the loop's default executor, so
+    only an override is worth awaiting directly.
+    """
+    implementation = getattr(type(embedding_function), "aembed_query", None)
+    return implementation is not None and implementation is not Embeddings.aembed_query
+
+
+async def _embed_query(query: str, executor: ThreadPoolExecutor) -> List[float]:
+    embedding_function = vector_store.embedding_function
+    if _supports_async_embedding(embedding_function):
+        return await embedding_function.aembed_query(query)
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, embedding_function.embed_query, query
+    )
+
+
+async def get_query_embedding(query: str, executor: ThreadPoolExecutor):
+    """Return the query embedding, consulting the shared query embedding cache.
+
+    Misses are embedded from the normalized query, so every spelling that maps
+    to one cache entry gets the same vector. Concurrent misses for the same
+    query wait on a single provider call.
+    """
+    embedding = await query_embedding_cache.get(query)
+    if embedding is not None:
+        return embedding
+
+    normalized = query_embedding_cache.normalize(query)
+    pending = _pending_query_embeddings.get(normalized)
+    if pending is None:
+
+        async def embed_and_cache():
+            embedding = await _embed_query(normalized, executor)
+            await query_embedding_cache.set(normalized, embedding)
+            return embedding
+
+        pending = asyncio.ensure_future(embed_and_cache())
+        _pending_query_embeddings[normalized] = pending
+        pending.add_done_callback(
+            lambda _: _pending_query_embeddings.pop(normalized, None)
         )
+    # Shielded so one cancelled request does not cancel the others' embedding
+    return await asyncio.shield(pending)
 
-    authorized_documents = []
 
-    try:
-        # 1. Perform Exact Match Search First
-        exact_matches = []
-        if isinstance(vector_store, AsyncPgVector):
-            exact_matches = await vector_store.aget_exact_matches_by_text(
-                body.query,
-                file_id=body.file_id,
-                limit=3, # take top 3 exact matches
-                executor=request.app.state.thread_pool,
-            )
-        else:
-            exact_matches = vector_store.get_exact_matches_by_text(
-                body.query, file_id=body.file_id, limit=3
-            )
+def _merge_search_results(
+    exact_matches: List[Tuple[Document, float]],
+    vector_docs: List[Tuple[Document, float]],
+    k: int,
+) -> List[Tuple[Document, float]]:
+    """Exact matches first, then vector docs, avoiding duplicates, trimmed to k."""
+    documents = []
+    seen_content = set()
 
-        # 2. Perform Vector Similarity Search
-        embedding = get_cached_query_embedding(body.query)
+    for doc, score in exact_matches + vector_docs:
+        if doc.page_content not in seen_content:
+            documents.append((doc, score))
+            seen_content.add(doc.page_content)
 
-        if isinstance(vector_store, AsyncPgVector):
-            vector_docs = await vector_store.asimilarity_search_with_score_by_vector(
-                embedding,
-                k=body.k,
-                filter={"file_id": {"$eq": body.file_id}},
-                executor=request.app.state.thread_pool,
-            )
+    return documents[:k]
+
+
+async def _complete_file_ids(file_ids: List[str], executor) -> List[str]:
+    """Drop the file_ids whose ingestion has not completed.
+
+    A failed resumable ingestion keeps the chunks stored so far, marked
+    incomplete, for the next resumed submission; searches skip them, as
+    they skip a file still being ingested.
+    """
+    if not (
+        isinstance(vector_store, AsyncPgVector) and vector_store.file_status_available
+    ):
+        return file_ids
+    incomplete = await vector_store.aget_incomplete_file_ids(
+        file_ids, executor=executor
+    )
+    return [file_id for file_id in file_ids if file_id not in incomplete]
+
+
+async def _search_exact_and_vector(
+    query: str,
+    k: int,
+    exact_search: Callable[[], Awaitable[List[Tuple[Document, float]]]],
+    vector_filter: dict,
+    executor: ThreadPoolExecutor,
+    embedding: Optional[List[float]] = None,
+) -> List[Tuple[Document, float]]:
+    """Run the exact-match search concurrently with embedding + vector search.
+
+    The exact-match query runs on the database while the query embedding is
+    computed by the provider, so a query costs max(exact, embed + vector)
+    instead of the sum of the three round-trips. With hybrid search enabled,
+    a single fused lexical + vector query replaces both searches. A
+    precomputed embedding skips the provider call.
+    """
+    async def embed_query():
+        if embedding is not None:
+            return embedding
+        return await get_query_embedding(query, executor)
+
+    if vector_store.hybrid_search_available:
+        return await vector_store.ahybrid_search_with_score_by_vector(
+            query, await embed_query(), k=k, filter=vector_filter, executor=executor
+        )
+
+    async def vector_search():
+        return await vector_store.asimilarity_search_with_score_by_vector(
+            await embed_query(), k=k, filter=vector_filter, executor=executor
+        )
+
+    exact_matches, vector_docs = await asyncio.gather(exact_search(), vector_search())
+    return _merge_search_results(exact_matches, vector_docs, k)
+
+
+def _authorize_documents(
+    documents: List[Tuple[Document, float]],
+    request: Request,
+    entity_id: Optional[str],
+) -> List[Tuple[Document, float]]:
+    """Return the documents if the caller may read them, else an empty list.
+
+    Ownership is checked on the first document's user_id, falling back to
+    the authenticated user's id when the entity_id is not the owner.
+    """
+    user_authorized = get_user_id(request, entity_id)
+    authorized_documents = []
+
+    document, score = documents[0]
+    doc_metadata = document.metadata
+    doc_user_id = doc_metadata.get("user_id")
+
+    if doc_user_id is None or doc_user_id == user_authorized:
+        authorized_documents = documents
+    else:
+        # If using entity_id and access denied, try again with user's actual ID
+        if entity_id and hasattr(request.state, "user"):
+            user_authorized = request.state.user.get("id")
+            if doc_user_id == user_authorized:
+                authorized_documents = documents
+            else:
+                if entity_id == doc_user_id:
+                    logger.warning(
+                        f"Entity ID {entity_id} matches document user_id but user {user_authorized} is not authorized"
+                    )
+                else:
+                    logger.warning(
+                        f"Access denied for both entity ID {entity_id} and user {user_authorized} to document with user_id {doc_user_id}"
+                    )
         else:
-            vector_docs = vector_store.similarity_search_with_score_by_vector(
-                embedding, k=body.k, filter={"file_id": {"$eq": body.file_id}}
+            logger.warning(
+                f"Unauthorized access attempt by user {user_authorized} to a document with user_id {doc_user_id}"
             )
 
-        # 3. Combine Results (Exact matches first, then vector docs, avoiding duplicates)
-        documents = []
-        seen_content = set()
-        
-        for doc, score in exact_matches + vector_docs:
-            if doc.page_content not in seen_content:
-                documents.append((doc, score))
-                seen_content.add(doc.page_content)
-                
-        # Trim to the requested k limit
-        documents = documents[:body.k]
+    return authorized_documents
 
-        if not documents:
-            return authorized_documents
 
-        document, score = documents[0]
-        doc_metadata = document.metadata
-        doc_user_id = doc_metadata.get("user_id")
+@router.post("/query")
+async def query_embeddings_by_file_id(
+    body: QueryRequestBody,
+    request: Request,
+):
+    authorized_documents = []
 
-        if doc_user_id is None or doc_user_id == user_authorized:
-            authorized_documents = documents
-        else:
-            # If using entity_id and access denied, try again with user's actual ID
-            if body.entity_id and hasattr(request.state, "user"):
-                user_authorized = request.state.user.get("id")
-                if doc_user_id == user_authorized:
-                    authorized_documents = documents
-                else:
-                    if body.entity_id == doc_user_id:
-                        logger.warning(
-                            f"Entity ID {body.entity_id} matches document user_id but user {user_authorized} is not authorized"
-                        )
-                    else:
-                        logger.warning(
-                            f"Access denied for both entity ID {body.entity_id} and user {user_authorized} to document with user_id {doc_user_id}"
-                        )
+    try:
+        entry_key, documents = await query_result_cache.lookup(
+            [body.file_id], body.query, body.k
+        )
+        if documents is None:
+            if isinstance(vector_store, AsyncPgVector) and not (
+                await _complete_file_ids(
+                    [body.file_id], request.app.state.thread_pool
+                )
+            ):
+                documents = []
+            elif isinstance(vector_store, AsyncPgVector):
+                documents = await _search_exact_and_vector(
+                    body.query,
+                    body.k,
+                    partial(
+                        vector_store.aget_exact_matches_by_text,
+                        body.query,
+                        file_id=body.file_id,
+                        limit=3,  # take top 3 exact matches
+                        executor=request.app.state.thread_pool,
+                    ),
+                    {"file_id": {"$eq": body.file_id}},
+                    request.app.state.thread_pool,
+                )
             else:
-                logger.warning(
-                    f"Unauthorized access attempt by user {user_authorized} to a document with user_id {doc_user_id}"
+                exact_matches = vector_store.get_exact_matches_by_text(
+                    body.query, file_id=body.file_id, limit=3
                 )
+                embedding = await get_query_embedding(
+                    body.query, request.app.state.thread_pool
+                )
+                vector_docs = vector_store.similarity_search_with_score_by_vector(
+                    embedding, k=body.k, filter={"file_id": {"$eq": body.file_id}}
+                )
+                documents = _merge_search_results(exact_matches, vector_docs, body.k)
+            query_result_cache.store(entry_key, documents)
+
+        if not documents:
+            return authorized_documents
+
+        authorized_documents = _authorize_documents(
+            documents, request, body.entity_id
+        )
 
         return authorized_documents
 
@@ -415,219 +677,330 @@ async def query_embeddings_by_file_id(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+class DocumentLoadError(Exception):
+    """Raised when a loader fails while its documents are being streamed."""
+
+
+def _take_batch(batches: Iterator[List[Document]]) -> List[Document]:
+    """Pull the next batch from embedding_batch_sizer.batches().
+
+    Runs in the executor: pulling from a streaming source parses and splits
+    the next pages of the file. Loader/splitter errors are re-raised as
+    DocumentLoadError so callers can tell them apart from storage errors.
+    """
+    try:
+        return next(batches, [])
+    except Exception as e:
+        raise DocumentLoadError(str(e)) from e
+
+
 async def _process_documents_async_pipeline(
-    documents: List[Document],
+    documents: Iterable[Document],
     file_id: str,
     vector_store: "AsyncPgVector",
     executor: "ThreadPoolExecutor",
+    progress: Optional["IngestionJob"] = None,
+    rollback: bool = True,
 ) -> List[str]:
     """
-    Process documents using async producer-consumer pattern for batched embedding and insertion.
+    Process documents using an async pipeline with separate embed and insert stages.
+
+    Documents may be a lazy stream: the producer pulls one batch at a time
+    from it, so parsing and splitting of later pages overlaps with embedding
+    of earlier batches, and memory stays bounded by EMBEDDING_MAX_QUEUE_SIZE.
+    Up to EMBEDDING_CONCURRENCY embed workers call the provider (throttled by
+    the shared embedding limiter) and hand vectors to the insert workers over
+    a second bounded queue, so batch N+1 is embedded while batch N is written.
 
     Args:
-        documents: List of Document objects to process
+        documents: Documents (list or lazy iterable) to process
         file_id: Unique identifier for the file being processed
         vector_store: AsyncPgVector instance for document storage
         executor: ThreadPoolExecutor for concurrent operations
+        progress: Optional job notified of the stage and each inserted batch
+        rollback: Delete the file's inserted batches on failure; when False
+            they are kept as checkpoints for a resumed ingestion
 
     Returns:
-        List of document IDs that were successfully inserted
+        List of document IDs that were successfully inserted, in batch order
     """
-    total_chunks = len(documents)
-    if total_chunks == 0:
-        return []
+    num_workers = max(1, min(EMBEDDING_CONCURRENCY, embedding_limiter.max_concurrency))
 
-    # Create queues for producer-consumer pattern
-    # embedding_queue is bounded to limit document data held in memory.
-    # results_queue is unbounded — it holds only small UUID lists, and the
-    # drain loop runs after gather(), so bounding it would deadlock when
-    # num_batches > maxsize.
+    # Create queues for the three stages: producer -> embed -> insert.
+    # Both queues are bounded to limit document data and vectors held in memory.
+    # results are keyed by batch number so concurrent workers can finish
+    # out of order while the returned ids keep the document order.
     embedding_queue = asyncio.Queue(maxsize=EMBEDDING_MAX_QUEUE_SIZE)
-    results_queue = asyncio.Queue()
-    all_ids = []
-
-    num_batches = calculate_num_batches(total_chunks, EMBEDDING_BATCH_SIZE)
+    insert_queue = asyncio.Queue(maxsize=EMBEDDING_MAX_QUEUE_SIZE)
+    results = {}
+    errors = {}
+    # Cumulative time spent in each stage, logged when the pipeline ends
+    timings = {"load": 0.0, "embed": 0.0, "insert": 0.0}
+    # Set on the first failure: the producer stops reading the file and
+    # workers skip queued batches, so rollback happens as early as possible.
+    failed = asyncio.Event()
+    batches = embedding_batch_sizer.batches(documents, EMBEDDING_BATCH_SIZE)
+    loop = asyncio.get_running_loop()
+    pipeline_start = loop.time()
 
     logger.info(
-        "Starting async pipeline for file %s: %d chunks with %d batch size",
+        "Starting async pipeline for file %s with %d batch size and %d worker(s) per stage",
         file_id,
-        total_chunks,
         EMBEDDING_BATCH_SIZE,
+        num_workers,
     )
 
     async def batch_producer():
-        """Produce document batches and put them in the queue."""
+        """Produce document batches and put them in the embedding queue."""
         try:
-            for batch_idx in range(num_batches):
-                start_idx = batch_idx * EMBEDDING_BATCH_SIZE
-                end_idx = min(start_idx + EMBEDDING_BATCH_SIZE, total_chunks)
-                batch_documents = documents[start_idx:end_idx]
+            batch_num = 0
+            chunks_seen = 0
+            while not failed.is_set():
+                started = loop.time()
+                batch_documents = await loop.run_in_executor(
+                    executor, _take_batch, batches
+                )
+                timings["load"] += loop.time() - started
+                if not batch_documents:
+                    if progress is not None:
+                        progress.set_num_batches(batch_num)
+                    break
+
+                batch_num += 1
                 batch_ids = [file_id] * len(batch_documents)
+                if progress is not None and batch_num == 1:
+                    progress.set_stage("embedding")
 
                 logger.info(
-                    "Generating embeddings for batch %d/%d: chunks %d-%d",
-                    batch_idx + 1,
-                    num_batches,
-                    start_idx,
-                    end_idx - 1,
+                    "Generating embeddings for batch %d: chunks %d-%d",
+                    batch_num,
+                    chunks_seen,
+                    chunks_seen + len(batch_documents) - 1,
                 )
+                chunks_seen += len(batch_documents)
 
-                # Put batch in queue for processing
-                await embedding_queue.put(
-                    (batch_documents, batch_ids, batch_idx + 1, num_batches)
-                )
+                # Put batch in queue for embedding
+                await embedding_queue.put((batch_documents, batch_ids, batch_num))
         except Exception as e:
             logger.error("Error in batch producer: %s", e)
+            failed.set()
             raise
         finally:
-            # Always signal end of production
-            await embedding_queue.put(None)
-
-    async def embedding_consumer():
-        """Consume batches from queue, embed and insert into database."""
-        try:
-            while True:
-                item = await embedding_queue.get()
+            # Always signal end of production, once per embed worker
+            for _ in range(num_workers):
+                await embedding_queue.put(None)
+
+    async def embedding_worker():
+        """Consume batches from the embedding queue and embed them."""
+        while True:
+            item = await embedding_queue.get()
+            try:
                 if item is None:  # End signal
-                    embedding_queue.task_done()
                     break
 
-                batch_documents, batch_ids, batch_num, total_batches = item
+                batch_documents, batch_ids, batch_num = item
+                if failed.is_set():
+                    continue
 
-                logger.info(
-                    "Inserting batch %d/%d into database (%d chunks)",
-                    batch_num,
-                    total_batches,
-                    len(batch_documents),
+                try:
+                    started = loop.time()
+                    # Only the provider call is throttled, not the database write
+                    embeddings = await embedding_limiter.run(
+                        vector_store.aembed_documents,
+                        batch_documents,
+                        executor=executor,
+                    )
+                    elapsed = loop.time() - started
+                    timings["embed"] += elapsed
+                    logger.info(
+                        "Embedded batch %d (%d chunks) in %.2fs",
+                        batch_num,
+                        len(batch_documents),
+                        elapsed,
+                    )
+                except Exception as e:
+                    logger.error("Error embedding batch %d: %s", batch_num, e)
+                    errors[batch_num] = e
+                    failed.set()
+                    continue
+
+                await insert_queue.put(
+                    (batch_documents, batch_ids, batch_num, embeddings)
                 )
+            finally:
+                embedding_queue.task_done()
+
+    async def embedding_stage():
+        """Run the embed workers, then signal the insert stage."""
+        try:
+            await asyncio.gather(*(embedding_worker() for _ in range(num_workers)))
+        finally:
+            for _ in range(num_workers):
+                await insert_queue.put(None)
+
+    async def insert_worker():
+        """Consume embedded batches and insert them into the database."""
+        while True:
+            item = await insert_queue.get()
+            try:
+                if item is None:  # End signal
+                    break
+
+                batch_documents, batch_ids, batch_num, embeddings = item
+                if failed.is_set():
+                    continue
 
                 try:
-                    # Insert batch into database
-                    batch_result_ids = await vector_store.aadd_documents(
-                        batch_documents, ids=batch_ids, executor=executor
+                    started = loop.time()
+                    results[batch_num] = await vector_store.aadd_documents(
+                        batch_documents,
+                        ids=batch_ids,
+                        executor=executor,
+                        embeddings=embeddings,
                     )
-                    await results_queue.put(batch_result_ids)
-                except Exception as e:
-                    logger.error(
-                        "Error processing batch %d/%d: %s", batch_num, total_batches, e
+                    elapsed = loop.time() - started
+                    timings["insert"] += elapsed
+                    if progress is not None:
+                        progress.batch_done(len(batch_documents))
+                    logger.info(
+                        "Inserted batch %d into database (%d chunks) in %.2fs",
+                        batch_num,
+                        len(batch_documents),
+                        elapsed,
                     )
-                    await results_queue.put(e)  # Put exception object
-                finally:
-                    embedding_queue.task_done()
-
-        except Exception as e:
-            logger.error("Fatal error in embedding consumer: %s", e)
-            await results_queue.put(e)
-            raise
+                except Exception as e:
+                    logger.error("Error inserting batch %d: %s", batch_num, e)
+                    errors[batch_num] = e
+                    failed.set()
+            finally:
+                insert_queue.task_done()
 
-    producer_task = None
-    consumer_task = None
+    tasks = [
+        asyncio.create_task(batch_producer()),
+        asyncio.create_task(embedding_stage()),
+    ] + [asyncio.create_task(insert_worker()) for _ in range(num_workers)]
 
     try:
-        # Start producer and consumer concurrently
-        producer_task = asyncio.create_task(batch_producer())
-        consumer_task = asyncio.create_task(embedding_consumer())
+        # Wait for every task, so no insert is still in flight when rolling back
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    except BaseException:
+        # Request cancelled: stop the workers before propagating
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    logger.info(
+        "Pipeline timings for file %s: load %.2fs, embed %.2fs, insert %.2fs, wall %.2fs",
+        file_id,
+        timings["load"],
+        timings["embed"],
+        timings["insert"],
+        loop.time() - pipeline_start,
+    )
 
-        # Wait for both to complete
-        await asyncio.gather(producer_task, consumer_task, return_exceptions=False)
+    all_ids = []
+    for batch_num in sorted(results):
+        all_ids.extend(results[batch_num])
 
-        # Collect results from all batches
-        for _ in range(num_batches):
-            result = await results_queue.get()
-            if isinstance(result, Exception):
-                raise result
-            all_ids.extend(result)
+    error = next(
+        (outcome for outcome in outcomes if isinstance(outcome, BaseException)),
+        None,
+    )
+    if errors:
+        error = errors[min(errors)]
 
+    if error is None:
         logger.info(
             "Async pipeline completed for file %s: %d embeddings created",
             file_id,
             len(all_ids),
         )
-
         return all_ids
 
-    except Exception as e:
-        logger.error("Pipeline failed for file %s: %s", file_id, e)
-        if consumer_task is not None or producer_task is not None:
-            # if one of the tasks is still running, cancel it
-            if consumer_task is not None and not consumer_task.done():
-                consumer_task.cancel()
-            if producer_task is not None and not producer_task.done():
-                producer_task.cancel()
-
-            # Await cancelled tasks to ensure proper cleanup
-            if consumer_task is None:
-                await asyncio.gather(producer_task, return_exceptions=True)
-            elif producer_task is None:
-                await asyncio.gather(consumer_task, return_exceptions=True)
-            else:
-                await asyncio.gather(
-                    consumer_task, producer_task, return_exceptions=True
-                )
+    logger.error("Pipeline failed for file %s: %s", file_id, error)
 
-        # Attempt rollback only if we inserted something
-        if all_ids:
-            try:
-                logger.warning("Performing rollback of file %s", file_id)
-                await vector_store.delete(ids=[file_id], executor=executor)
-                logger.info("Rollback completed for file %s", file_id)
-            except Exception as cleanup_error:
-                logger.error("Rollback failed for file %s: %s", file_id, cleanup_error)
+    if all_ids and not rollback:
+        logger.warning(
+            "Keeping %d stored chunks of file %s for a resumed ingestion",
+            len(all_ids),
+            file_id,
+        )
+    # Attempt rollback only if we inserted something
+    elif all_ids:
+        if progress is not None:
+            progress.set_stage("rolling_back")
+        try:
+            logger.warning("Performing rollback of file %s", file_id)
+            await vector_store.delete(ids=[file_id], executor=executor)
+            logger.info("Rollback completed for file %s", file_id)
+        except Exception as cleanup_error:
+            logger.error("Rollback failed for file %s: %s", file_id, cleanup_error)
 
-        # Re-raise the original error
-        raise
+    # Re-raise the original error
+    raise error
 
 
 async def _process_documents_batched_sync(
-    documents: List[Document],
+    documents: Iterable[Document],
     file_id: str,
     vector_store: "PgVector",
     executor: "ThreadPoolExecutor",
+    progress: Optional["IngestionJob"] = None,
+    rollback: bool = True,
 ) -> List[str]:
     """
     Process documents in batches using synchronous vector store operations.
 
     Args:
-        documents: List of Document objects to process
+        documents: Documents (list or lazy iterable) to process
         file_id: Unique identifier for the file being processed
         vector_store: Synchronous PgVector instance for document storage
         executor: ThreadPoolExecutor for running sync operations
+        progress: Optional job notified of the stage and each inserted batch
+        rollback: Delete the file's inserted batches on failure; when False
+            they are kept as checkpoints for a resumed ingestion
 
     Returns:
         List of document IDs that were successfully inserted
     """
-    total_chunks = len(documents)
-    if total_chunks == 0:
-        return []
-
     all_ids = []
-    num_batches = calculate_num_batches(total_chunks, EMBEDDING_BATCH_SIZE)
+    batches = embedding_batch_sizer.batches(documents, EMBEDDING_BATCH_SIZE)
 
     logger.info(
-        "Processing file %s with sync batching: %d batches of %d chunks each",
+        "Processing file %s with sync batching: batches of up to %d chunks each",
         file_id,
-        num_batches,
         EMBEDDING_BATCH_SIZE,
     )
 
     loop = asyncio.get_running_loop()
+    batch_num = 0
+    chunks_seen = 0
 
-    for batch_idx in range(num_batches):
-        start_idx = batch_idx * EMBEDDING_BATCH_SIZE
-        end_idx = min(start_idx + EMBEDDING_BATCH_SIZE, total_chunks)
-        batch_documents = documents[start_idx:end_idx]
-        batch_ids = [file_id] * len(batch_documents)
-
-        logger.info(
-            "Processing batch %d/%d: chunks %d-%d (%d chunks)",
-            batch_idx + 1,
-            num_batches,
-            start_idx,
-            end_idx - 1,
-            len(batch_documents),
-        )
-
+    while True:
         try:
+            batch_documents = await loop.run_in_executor(
+                executor, _take_batch, batches
+            )
+            if not batch_documents:
+                if progress is not None:
+                    progress.set_num_batches(batch_num)
+                break
+
+            batch_num += 1
+            batch_ids = [file_id] * len(batch_documents)
+            if progress is not None and batch_num == 1:
+                progress.set_stage("embedding")
+
+            logger.info(
+                "Processing batch %d: chunks %d-%d (%d chunks)",
+                batch_num,
+                chunks_seen,
+                chunks_seen + len(batch_documents) - 1,
+                len(batch_documents),
+            )
+            chunks_seen += len(batch_documents)
+
             # Wrap sync call in executor to avoid blocking the event loop
             batch_result_ids = await loop.run_in_executor(
                 executor,
@@ -636,15 +1009,25 @@ async def _process_documents_batched_sync(
                 ),
             )
             all_ids.extend(batch_result_ids)
+            if progress is not None:
+                progress.batch_done(len(batch_documents))
 
         except Exception as batch_error:
-            logger.error("Batch %d failed: %s", batch_idx + 1, batch_error)
+            logger.error("Batch %d failed: %s", batch_num + 1, batch_error)
 
+            if all_ids and not rollback:
+                logger.warning(
+                    "Keeping %d stored chunks of file %s for a resumed ingestion",
+                    len(all_ids),
+                    file_id,
+                )
             # Rollback entire file from vector store
-            if (
+            elif (
                 all_ids
             ):  # any batch succeeded (i.e., any chunks for this file were inserted)
                 logger.warning("Rolling back file %s due to batch failure", file_id)
+                if progress is not None:
+                    progress.set_stage("rolling_back")
                 try:
                     await loop.run_in_executor(
                         executor, lambda: vector_store.delete(ids=[file_id])
@@ -664,39 +1047,241 @@ def generate_digest(page_content: str) -> str:
     return hashlib.md5(page_content.encode("utf-8", "ignore")).hexdigest()
 
 
-def _prepare_documents_sync(
+def _file_metadata(file_sha256: Optional[str]) -> dict:
+    return {"file_sha256": file_sha256} if file_sha256 else {}
+
+
+def _iter_prepared_documents(
     data: Iterable[Document],
     file_id: str,
     user_id: str,
     clean_content: bool,
-) -> List[Document]:
+    file_sha256: Optional[str] = None,
+) -> Iterator[Document]:
     """
-    Synchronous document preparation - runs in executor to avoid blocking event loop.
-    Handles text splitting, cleaning, and metadata preparation.
+    Lazily split, clean and annotate documents as the loader yields them.
+
+    Splitting is done page by page, which produces the same chunks as
+    splitting the whole list at once (the splitter works per document).
+    The upload's content hash, when known, is stored with every chunk.
     """
+    file_metadata = _file_metadata(file_sha256)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
     )
-    documents = text_splitter.split_documents(data)
+    for page in data:
+        for doc in text_splitter.split_documents([page]):
+            # If `clean_content` is True, clean the page_content (remove null bytes)
+            if clean_content:
+                doc.page_content = clean_text(doc.page_content)
+
+            # Preparing documents with page content and metadata for insertion.
+            yield Document(
+                page_content=doc.page_content,
+                metadata={
+                    "file_id": file_id,
+                    "user_id": user_id,
+                    "digest": generate_digest(doc.page_content),
+                    **file_metadata,
+                    **(doc.metadata or {}),
+                },
+            )
 
-    # If `clean_content` is True, clean the page_content of each document (remove null bytes)
-    if clean_content:
-        for doc in documents:
-            doc.page_content = clean_text(doc.page_content)
-
-    # Preparing documents with page content and metadata for insertion.
-    return [
-        Document(
-            page_content=doc.page_content,
-            metadata={
-                "file_id": file_id,
-                "user_id": user_id,
-                "digest": generate_digest(doc.page_content),
-                **(doc.metadata or {}),
-            },
+
+def _skip_stored_documents(
+    documents: Iterable[Document], stored_digests: Counter
+) -> Iterator[Document]:
+    """Drop the chunks already stored for the file, matched by digest.
+
+    Digests are counted, so a chunk repeated in the file is skipped only as
+    many times as it is stored.
+    """
+    for doc in documents:
+        digest = doc.metadata["digest"]
+        if stored_digests[digest] > 0:
+            stored_digests[digest] -= 1
+            continue
+        yield doc
+
+
+async def _get_stored_digests(file_id: str, executor) -> Counter:
+    """Count the digests of the chunks already stored for file_id."""
+    if isinstance(vector_store, AsyncPgVector):
+        digests = await vector_store.aget_file_digests(file_id, executor=executor)
+    else:
+        loop = asyncio.get_running_loop()
+        documents = await loop.run_in_executor(
+            executor, vector_store.get_documents_by_ids, [file_id]
         )
-        for doc in documents
+        digests = [doc.metadata.get("digest") for doc in documents]
+    return Counter(digest for digest in digests if digest)
+
+
+def _chunk_metadata(metadata: dict, file_metadata: dict) -> dict:
+    return {k: v for k, v in metadata.items() if k not in file_metadata}
+
+
+def _diff_file_documents(
+    documents: Iterable[Document], stored_chunks: List[Tuple[str, dict]]
+) -> Tuple[List[Document], List[str], List[Tuple[str, dict]], int, dict]:
+    """Match a new version's chunks against the stored ones by digest.
+
+    Runs in the executor, as it consumes the (lazy) document stream.
+    Returns the chunks to embed, the uuids of the stored chunks that
+    vanished, (uuid, metadata) of kept chunks whose metadata changed (e.g.
+    their page moved), the number of kept chunks and the file-level
+    metadata. File-level keys (those with one value across the new
+    version's chunks, e.g. file_sha256 or the upload's temp `source`) change
+    with every submission; they are left out of the per-chunk comparison
+    and refreshed for the whole file at once (see replace_file_chunks).
+    """
+    stored_by_digest = defaultdict(list)
+    for uuid, metadata in stored_chunks:
+        stored_by_digest[metadata.get("digest")].append((uuid, metadata))
+
+    new_documents, kept_chunks = [], []
+    file_metadata: Optional[dict] = None
+    for doc in documents:
+        if file_metadata is None:
+            file_metadata = dict(doc.metadata)
+        else:
+            file_metadata = {
+                k: v
+                for k, v in file_metadata.items()
+                if k in doc.metadata and doc.metadata[k] == v
+            }
+        matches = stored_by_digest.get(doc.metadata["digest"])
+        if not matches:
+            new_documents.append(doc)
+            continue
+        uuid, metadata = matches.pop()
+        kept_chunks.append((uuid, metadata, doc.metadata))
+
+    file_metadata = file_metadata or {}
+    metadata_updates = [
+        (uuid, new_metadata)
+        for uuid, metadata, new_metadata in kept_chunks
+        if _chunk_metadata(metadata, file_metadata)
+        != _chunk_metadata(new_metadata, file_metadata)
     ]
+    vanished = [uuid for matches in stored_by_digest.values() for uuid, _ in matches]
+    return new_documents, vanished, metadata_updates, len(kept_chunks), file_metadata
+
+
+async def _update_file_documents(
+    data: Iterable[Document],
+    file_id: str,
+    user_id: str,
+    clean_content: bool,
+    executor,
+    file_sha256: Optional[str] = None,
+    progress: Optional["IngestionJob"] = None,
+) -> dict:
+    """Store a new version of a file by embedding only its changed chunks.
+
+    Chunks whose digest is already stored for `file_id` keep their rows and
+    embeddings; new chunks are embedded, and the inserts, the deletes of
+    vanished chunks and metadata refreshes are applied in one transaction,
+    so searches see either the old or the new version.
+    """
+    if not isinstance(vector_store, ExtendedPgVector):
+        raise ValueError("Update mode is only supported with pgvector")
+
+    loop = asyncio.get_running_loop()
+    if isinstance(vector_store, AsyncPgVector):
+        stored_chunks = await vector_store.aget_file_chunks(file_id, executor=executor)
+    else:
+        stored_chunks = await loop.run_in_executor(
+            executor, vector_store.get_file_chunks, file_id
+        )
+
+    docs = _iter_prepared_documents(data, file_id, user_id, clean_content, file_sha256)
+    try:
+        (
+            new_documents,
+            vanished,
+            metadata_updates,
+            kept,
+            file_metadata,
+        ) = await loop.run_in_executor(
+            executor, _diff_file_documents, docs, stored_chunks
+        )
+    except Exception as e:
+        raise DocumentLoadError(str(e)) from e
+    logger.info(
+        "Updating file %s: %d chunks unchanged, %d new, %d vanished",
+        file_id,
+        kept,
+        len(new_documents),
+        len(vanished),
+    )
+
+    batch_size = EMBEDDING_BATCH_SIZE
+    if batch_size <= 0:
+        batch_size = max(len(new_documents), 1)
+    batches = list(embedding_batch_sizer.batches(new_documents, batch_size))
+    if progress is not None:
+        progress.set_num_batches(len(batches))
+        progress.set_stage("embedding")
+    embeddings = []
+    for batch in batches:
+        if isinstance(vector_store, AsyncPgVector):
+            embeddings += await embedding_limiter.run(
+                vector_store.aembed_documents, batch, executor=executor
+            )
+        else:
+            embeddings += await loop.run_in_executor(
+                executor,
+                vector_store.embedding_function.embed_documents,
+                [doc.page_content for doc in batch],
+            )
+        if progress is not None:
+            progress.batch_done(len(batch))
+
+    if isinstance(vector_store, AsyncPgVector):
+        await vector_store.areplace_file_chunks(
+            file_id,
+            new_documents,
+            embeddings,
+            vanished,
+            metadata_updates,
+            file_metadata,
+            executor=executor,
+        )
+    else:
+        await loop.run_in_executor(
+            executor,
+            vector_store.replace_file_chunks,
+            file_id,
+            new_documents,
+            embeddings,
+            vanished,
+            metadata_updates,
+            file_metadata,
+        )
+    return {
+        "message": "Documents updated successfully",
+        "ids": [file_id] * len(new_documents),
+        "added": len(new_documents),
+        "deleted": len(vanished),
+        "unchanged": kept,
+    }
+
+
+def _prepare_documents_sync(
+    data: Iterable[Document],
+    file_id: str,
+    user_id: str,
+    clean_content: bool,
+    file_sha256: Optional[str] = None,
+) -> List[Document]:
+    """
+    Synchronous document preparation - runs in executor to avoid blocking event loop.
+    Handles text splitting, cleaning, and metadata preparation.
+    """
+    return list(
+        _iter_prepared_documents(data, file_id, user_id, clean_content, file_sha256)
+    )
 
 
 async def store_data_in_vector_db(
@@ -705,44 +1290,163 @@ async def store_data_in_vector_db(
     user_id: str = "",
     clean_content: bool = False,
     executor=None,
+    file_sha256: Optional[str] = None,
+    progress: Optional["IngestionJob"] = None,
+    resume: bool = False,
+    update: bool = False,
+    source: Optional[str] = None,
 ) -> bool:
-    # Run document preparation in executor to avoid blocking the event loop
-    loop = asyncio.get_running_loop()
-    docs = await loop.run_in_executor(
-        executor,
-        _prepare_documents_sync,
-        data,
-        file_id,
-        user_id,
-        clean_content,
+    """Split, embed and store documents.
+
+    `data` may be a lazy loader stream; with batching enabled it is consumed
+    incrementally by the pipeline. Loader failures raise DocumentLoadError,
+    storage failures are reported in the returned dict.
+
+    With the upload's `file_sha256`, an identical file already embedded for
+    the same user is cloned under `file_id` without parsing or embedding;
+    `source` is the path this upload was loaded from, recorded on the clone.
+    Where the store tracks file status, `file_id` is marked incomplete while
+    its chunks are written and complete once they all are, so dedup never
+    clones a partially stored file.
+    A `progress` job is kept informed of the stage and completed batches.
+
+    With `resume`, chunks already stored for `file_id` (by an earlier,
+    interrupted ingestion of the same file) are not embedded again. Where
+    file status is tracked, a failure also keeps the batches stored so far
+    instead of rolling them back, so the next resumed submission continues
+    from there; the file stays marked incomplete, which keeps it out of
+    searches and dedup until then. A later submission without `resume`
+    removes those partial chunks before storing the file again.
+
+    With `update`, `data` is a new version of the stored file: only the
+    chunks that changed are embedded (see _update_file_documents).
+    """
+    tracks_status = (
+        isinstance(vector_store, AsyncPgVector) and vector_store.file_status_available
     )
-
     try:
+        if update:
+            result = await _update_file_documents(
+                data, file_id, user_id, clean_content, executor, file_sha256, progress
+            )
+            if tracks_status:
+                await vector_store.aset_file_status(
+                    file_id, user_id, file_sha256, True, executor=executor
+                )
+            return result
+
+        stored_digests = Counter()
+        if resume:
+            stored_digests = await _get_stored_digests(file_id, executor)
+            if stored_digests:
+                logger.info(
+                    "Resuming file %s: %d chunks already stored",
+                    file_id,
+                    sum(stored_digests.values()),
+                )
+        elif tracks_status and await vector_store.aget_incomplete_file_ids(
+            [file_id], executor=executor
+        ):
+            # Partial rows kept by a failed resumable ingestion; without
+            # resume they would be stored again next to the new ones.
+            logger.info("Removing the partial chunks of file %s", file_id)
+            await vector_store.delete(ids=[file_id], executor=executor)
+
+        if (
+            file_sha256
+            and not stored_digests
+            and UPLOAD_DEDUP_ENABLED
+            and isinstance(vector_store, AsyncPgVector)
+        ):
+            try:
+                cloned = await vector_store.aclone_file_documents(
+                    file_sha256, user_id, file_id, source=source, executor=executor
+                )
+            except Exception as e:
+                logger.warning("Upload dedup lookup failed for %s: %s", file_id, e)
+                cloned = 0
+            if cloned:
+                logger.info(
+                    "Cloned %d chunks of an identical upload into file %s",
+                    cloned,
+                    file_id,
+                )
+                return {
+                    "message": "Documents cloned from an identical upload",
+                    "ids": [file_id] * cloned,
+                }
+
+        if tracks_status:
+            await vector_store.aset_file_status(
+                file_id, user_id, file_sha256, False, executor=executor
+            )
+
         if EMBEDDING_BATCH_SIZE <= 0:
+            # Run document preparation in executor to avoid blocking the event loop
+            loop = asyncio.get_running_loop()
+            try:
+                docs = await loop.run_in_executor(
+                    executor,
+                    _prepare_documents_sync,
+                    data,
+                    file_id,
+                    user_id,
+                    clean_content,
+                    file_sha256,
+                )
+            except Exception as e:
+                raise DocumentLoadError(str(e)) from e
+            if stored_digests:
+                docs = list(_skip_stored_documents(docs, stored_digests))
+            if progress is not None:
+                progress.set_num_batches(1)
+                progress.set_stage("embedding")
+
             # synchronously embed the file and insert into vector store in one go
-            if isinstance(vector_store, AsyncPgVector):
+            if stored_digests and not docs:
+                ids = []  # every chunk was already stored
+            elif isinstance(vector_store, AsyncPgVector):
                 ids = await vector_store.aadd_documents(
                     docs, ids=[file_id] * len(docs), executor=executor
                 )
             else:
                 ids = vector_store.add_documents(docs, ids=[file_id] * len(docs))
+            if progress is not None:
+                progress.batch_done(len(docs))
         else:
-            # asynchronously embed the file and insert into vector store as it is embedding
-            # to lessen memory impact and speed up slightly as the majority of the document
-            # is inserted into db by the time it is fully embedded
+            # asynchronously embed the file and insert into vector store as it is
+            # being parsed and embedded, to bound memory and overlap parsing,
+            # embedding and insertion
+            docs = _iter_prepared_documents(
+                data, file_id, user_id, clean_content, file_sha256
+            )
+            if stored_digests:
+                docs = _skip_stored_documents(docs, stored_digests)
 
             if isinstance(vector_store, AsyncPgVector):
                 ids = await _process_documents_async_pipeline(
-                    docs, file_id, vector_store, executor
+                    docs,
+                    file_id,
+                    vector_store,
+                    executor,
+                    progress,
+                    not (resume and tracks_status),
                 )
             else:
-                # Fallback to batched processing for sync vector stores
+                # Fallback to batched processing for sync vector stores; they
+                # do not track file status, so failures are always rolled back
                 ids = await _process_documents_batched_sync(
-                    docs, file_id, vector_store, executor
+                    docs, file_id, vector_store, executor, progress
                 )
 
+        if tracks_status:
+            await vector_store.aset_file_status(
+                file_id, user_id, file_sha256, True, executor=executor
+            )
         return {"message": "Documents added successfully", "ids": ids}
 
+    except DocumentLoadError:
+        raise
     except Exception as e:
         logger.error(
             "Failed to store data in vector DB | File ID: %s | User ID: %s | Error: %s | Traceback: %s",
@@ -752,6 +1456,9 @@ async def store_data_in_vector_db(
             traceback.format_exc(),
         )
         return {"message": "An error occurred while adding documents.", "error": str(e)}
+    finally:
+        # Also covers rollbacks: any results cached before now may be stale
+        await query_result_cache.invalidate([file_id])
 
 
 @router.post("/local/embed")
@@ -773,23 +1480,22 @@ async def embed_local_file(
     else:
         user_id = entity_id if entity_id else request.state.user.get("id")
 
-    loader = None
     try:
-        loader, known_type, file_ext = get_loader(
-            document.filename, document.file_content_type, file_path
-        )
-        loop = asyncio.get_running_loop()
-        data = await loop.run_in_executor(
-            request.app.state.thread_pool, lambda: list(loader.lazy_load())
-        )
-
-        result = await store_data_in_vector_db(
-            data,
-            document.file_id,
-            user_id,
-            clean_content=file_ext == "pdf",
-            executor=request.app.state.thread_pool,
-        )
+        with stream_file_content(
+            document.filename,
+            document.file_content_type,
+            file_path,
+            _get_process_pool(request),
+        ) as (data, known_type, file_ext):
+            result = await store_data_in_vector_db(
+                data,
+                document.file_id,
+                user_id,
+                clean_content=file_ext == "pdf",
+                executor=request.app.state.thread_pool,
+                resume=document.resume,
+                update=document.update,
+            )
 
         if result:
             return {
@@ -822,10 +1528,74 @@ async def embed_local_file(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=ERROR_MESSAGES.DEFAULT(e),
             )
-    finally:
-        # Clean up temporary UTF-8 file if it was created for encoding conversion
-        if loader is not None:
-            cleanup_temp_encoding_file(loader)
+
+
+async def _enqueue_embed_job(
+    request: Request,
+    file: UploadFile,
+    file_id: str,
+    user_id: str,
+    file_path: str,
+    resume: bool = False,
+    update: bool = False,
+) -> JSONResponse:
+    """Save the upload and queue its ingestion; the job removes the copy when done.
+
+    The upload has to outlive the request, so it is always copied to disk.
+    """
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        file_sha256 = await save_upload_file_async(file, file_path)
+    except Exception:
+        await cleanup_temp_file_async(file_path)
+        raise
+
+    filename, content_type = file.filename, file.content_type
+    executor = request.app.state.thread_pool
+    process_pool = _get_process_pool(request)
+
+    async def ingest(job: IngestionJob) -> None:
+        with stream_file_content(
+            filename, content_type, file_path, process_pool, file_sha256
+        ) as (data, known_type, file_ext):
+            job.known_type = known_type
+            result = await store_data_in_vector_db(
+                data,
+                file_id,
+                user_id,
+                clean_content=file_ext == "pdf",
+                executor=executor,
+                file_sha256=file_sha256,
+                progress=job,
+                resume=resume,
+                update=update,
+                source=file_path,
+            )
+        if not result:
+            raise RuntimeError("Failed to process/store the file data.")
+        if "error" in result:
+            raise RuntimeError(str(result["error"]))
+
+    job = IngestionJob(file_id, user_id, filename)
+    cleanup = partial(cleanup_temp_file_async, file_path)
+    if not ingestion_jobs.submit(job, ingest, cleanup):
+        await cleanup_temp_file_async(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Ingestion queue is full, please retry later.",
+        )
+    logger.info("Queued ingestion job %s for file %s", job.id, file_id)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "status": True,
+            "message": "File queued for processing.",
+            "file_id": file_id,
+            "filename": filename,
+            "known_type": None,
+            "job_id": job.id,
+        },
+    )
 
 
 @router.post("/embed")
@@ -834,6 +1604,9 @@ async def embed_file(
     file_id: str = Form(...),
     file: UploadFile = File(...),
     entity_id: str = Form(None),
+    resume: bool = Form(False),
+    update: bool = Form(False),
+    async_mode: bool = Query(False, alias="async"),
 ):
     response_status = True
     response_message = "File processed successfully."
@@ -849,23 +1622,36 @@ async def embed_file(
             detail=ERROR_MESSAGES.DEFAULT("Invalid request"),
         )
 
-    try:
-        os.makedirs(os.path.dirname(validated_file_path), exist_ok=True)
-        await save_upload_file_async(file, validated_file_path)
-        data, known_type, file_ext = await load_file_content(
-            file.filename,
-            file.content_type,
-            validated_file_path,
-            request.app.state.thread_pool,
+    if async_mode:
+        # Returns at once with a job id; progress is polled at /jobs/{id}
+        return await _enqueue_embed_job(
+            request, file, file_id, user_id, validated_file_path, resume, update
         )
 
-        result = await store_data_in_vector_db(
-            data=data,
-            file_id=file_id,
-            user_id=user_id,
-            clean_content=file_ext == "pdf",
-            executor=request.app.state.thread_pool,
-        )
+    try:
+        os.makedirs(os.path.dirname(validated_file_path), exist_ok=True)
+        async with open_upload(
+            file, validated_file_path, request.app.state.thread_pool
+        ) as (buffer, file_sha256):
+            with stream_file_content(
+                file.filename,
+                file.content_type,
+                validated_file_path,
+                _get_process_pool(request),
+                file_sha256,
+                buffer,
+            ) as (data, known_type, file_ext):
+                result = await store_data_in_vector_db(
+                    data=data,
+                    file_id=file_id,
+                    user_id=user_id,
+                    clean_content=file_ext == "pdf",
+                    executor=request.app.state.thread_pool,
+                    file_sha256=file_sha256,
+                    resume=resume,
+                    update=update,
+                    source=validated_file_path,
+                )
 
         if not result:
             response_status = False
@@ -917,6 +1703,17 @@ async def embed_file(
     }
 
 
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(
+    request: Request, job_id: str, entity_id: str = Query(None)
+):
+    """Report the progress of a background ingestion started by /embed?async=true."""
+    job = await ingestion_jobs.get(job_id)
+    if job is None or job["user_id"] != get_user_id(request, entity_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
 @router.get("/documents/{id}/context")
 async def load_document_context(request: Request, id: str):
     ids = [id]
@@ -971,6 +1768,8 @@ async def embed_file_upload(
     file_id: str = Form(...),
     uploaded_file: UploadFile = File(...),
     entity_id: str = Form(None),
+    resume: bool = Form(False),
+    update: bool = Form(False),
 ):
     user_id = get_user_id(request, entity_id)
 
@@ -987,21 +1786,28 @@ async def embed_file_upload(
 
     try:
         os.makedirs(os.path.dirname(validated_temp_file_path), exist_ok=True)
-        await save_upload_file_async(uploaded_file, validated_temp_file_path)
-        data, known_type, file_ext = await load_file_content(
-            uploaded_file.filename,
-            uploaded_file.content_type,
-            validated_temp_file_path,
-            request.app.state.thread_pool,
-        )
-
-        result = await store_data_in_vector_db(
-            data,
-            file_id,
-            user_id,
-            clean_content=file_ext == "pdf",
-            executor=request.app.state.thread_pool,
-        )
+        async with open_upload(
+            uploaded_file, validated_temp_file_path, request.app.state.thread_pool
+        ) as (buffer, file_sha256):
+            with stream_file_content(
+                uploaded_file.filename,
+                uploaded_file.content_type,
+                validated_temp_file_path,
+                _get_process_pool(request),
+                file_sha256,
+                buffer,
+            ) as (data, known_type, file_ext):
+                result = await store_data_in_vector_db(
+                    data,
+                    file_id,
+                    user_id,
+                    clean_content=file_ext == "pdf",
+                    executor=request.app.state.thread_pool,
+                    file_sha256=file_sha256,
+                    resume=resume,
+                    update=update,
+                    source=validated_temp_file_path,
+                )
 
         if not result:
             raise HTTPException(
@@ -1041,45 +1847,43 @@ async def embed_file_upload(
 @router.post("/query_multiple")
 async def query_embeddings_by_file_ids(request: Request, body: QueryMultipleBody):
     try:
-        # 1. Exact Match Search First
-        exact_matches = []
-        if isinstance(vector_store, AsyncPgVector):
-            exact_matches = await vector_store._aget_exact_matches_multiple(
-                body.query,
-                file_ids=body.file_ids,
-                limit=3,
-                executor=request.app.state.thread_pool,
-            )
-        else:
-            exact_matches = vector_store._get_exact_matches_multiple(
-                body.query, file_ids=body.file_ids, limit=3
-            )
-
-        # 2. Vector Similarity Search
-        embedding = get_cached_query_embedding(body.query)
-
-        if isinstance(vector_store, AsyncPgVector):
-            vector_docs = await vector_store.asimilarity_search_with_score_by_vector(
-                embedding,
-                k=body.k,
-                filter={"file_id": {"$in": body.file_ids}},
-                executor=request.app.state.thread_pool,
-            )
-        else:
-            vector_docs = vector_store.similarity_search_with_score_by_vector(
-                embedding, k=body.k, filter={"file_id": {"$in": body.file_ids}}
-            )
-
-        # 3. Combine Results (Exact matches first, then vector docs, avoiding duplicates)
-        documents = []
-        seen_content = set()
-        
-        for doc, score in exact_matches + vector_docs:
-            if doc.page_content not in seen_content:
-                documents.append((doc, score))
-                seen_content.add(doc.page_content)
-                
-        documents = documents[:body.k]
+        entry_key, documents = await query_result_cache.lookup(
+            body.file_ids, body.query, body.k
+        )
+        if documents is None:
+            if isinstance(vector_store, AsyncPgVector):
+                file_ids = await _complete_file_ids(
+                    body.file_ids, request.app.state.thread_pool
+                )
+                documents = (
+                    await _search_exact_and_vector(
+                        body.query,
+                        body.k,
+                        partial(
+                            vector_store._aget_exact_matches_multiple,
+                            body.query,
+                            file_ids=file_ids,
+                            limit=3,
+                            executor=request.app.state.thread_pool,
+                        ),
+                        {"file_id": {"$in": file_ids}},
+                        request.app.state.thread_pool,
+                    )
+                    if file_ids
+                    else []
+                )
+            else:
+                exact_matches = vector_store._get_exact_matches_multiple(
+                    body.query, file_ids=body.file_ids, limit=3
+                )
+                embedding = await get_query_embedding(
+                    body.query, request.app.state.thread_pool
+                )
+                vector_docs = vector_store.similarity_search_with_score_by_vector(
+                    embedding, k=body.k, filter={"file_id": {"$in": body.file_ids}}
+                )
+                documents = _merge_search_results(exact_matches, vector_docs, body.k)
+            query_result_cache.store(entry_key, documents)
 
         # Ensure documents list is not empty
         if not documents:
@@ -1106,6 +1910,92 @@ async def query_embeddings_by_file_ids(request: Request, body: QueryMultipleBody
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/query_batch")
+async def query_embeddings_batch(request: Request, body: QueryBatchBody):
+    """Run several (query, file_ids, k) searches in one round-trip.
+
+    Items found in the query result cache are served from it. The other
+    items are embedded like /query (see get_query_embedding, so repeated
+    queries share one provider call), the searches run concurrently, and
+    results are returned per item in request order. Each item is authorized
+    like /query.
+    """
+    if not body.items:
+        return []
+    if len(body.items) > QUERY_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {QUERY_BATCH_MAX_ITEMS} items per batch",
+        )
+
+    try:
+        executor = request.app.state.thread_pool
+        lookups = await asyncio.gather(
+            *(
+                query_result_cache.lookup(item.file_ids, item.query, item.k)
+                for item in body.items
+            )
+        )
+
+        async def search(item, entry_key, cached_results):
+            if cached_results is not None:
+                return cached_results
+            embedding = await get_query_embedding(item.query, executor)
+            if isinstance(vector_store, AsyncPgVector):
+                file_ids = await _complete_file_ids(item.file_ids, executor)
+                documents = (
+                    await _search_exact_and_vector(
+                        item.query,
+                        item.k,
+                        partial(
+                            vector_store._aget_exact_matches_multiple,
+                            item.query,
+                            file_ids=file_ids,
+                            limit=3,
+                            executor=executor,
+                        ),
+                        {"file_id": {"$in": file_ids}},
+                        executor,
+                        embedding=embedding,
+                    )
+                    if file_ids
+                    else []
+                )
+            else:
+                exact_matches = vector_store._get_exact_matches_multiple(
+                    item.query, file_ids=item.file_ids, limit=3
+                )
+                vector_docs = vector_store.similarity_search_with_score_by_vector(
+                    embedding,
+                    k=item.k,
+                    filter={"file_id": {"$in": item.file_ids}},
+                )
+                documents = _merge_search_results(exact_matches, vector_docs, item.k)
+            query_result_cache.store(entry_key, documents)
+            return documents
+
+        results = await asyncio.gather(
+            *(
+                search(item, entry_key, cached_results)
+                for item, (entry_key, cached_results) in zip(body.items, lookups)
+            )
+        )
+        return [
+            _authorize_documents(documents, request, body.entity_id)
+            if documents
+            else []
+            for documents in results
+        ]
+    except Exception as e:
+        logger.error(
+            "Error in query batch | Items: %d | Error: %s | Traceback: %s",
+            len(body.items),
+            str(e),
+            traceback.format_exc(),
+        )
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/text")
 async def extract_text_from_file(
     request: Request,
@@ -1129,13 +2019,20 @@ async def extract_text_from_file(
 
     try:
         os.makedirs(os.path.dirname(validated_temp_file_path), exist_ok=True)
-        await save_upload_file_async(file, validated_temp_file_path)
-        data, known_type, file_ext = await load_file_content(
-            file.filename,
-            file.content_type,
+        async with open_upload(
+            file,
             validated_temp_file_path,
             request.app.state.thread_pool,
-        )
+            hash_content=False,
+        ) as (buffer, _):
+            data, known_type, file_ext = await load_file_content(
+                file.filename,
+                file.content_type,
+                validated_temp_file_path,
+                request.app.state.thread_pool,
+                _get_process_pool(request),
+                buffer,
+            )
 
         # Extract text content from loaded documents
         text_content = extract_text_from_documents(data, file_ext)
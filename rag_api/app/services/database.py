@@ -1,6 +1,46 @@
 # app/services/database.py
+import asyncio
+import re
+import uuid
 import asyncpg
-from app.config import DSN, logger
+from typing import Optional, Tuple
+from pgvector.utils import from_db_binary, to_db_binary
+from app.config import (
+    DSN,
+    PG_POOL_MAX_SIZE,
+    PG_VECTOR_INDEX_TYPE,
+    PG_VECTOR_INDEX_DIMENSIONS,
+    PG_HNSW_M,
+    PG_HNSW_EF_CONSTRUCTION,
+    PG_IVFFLAT_LISTS,
+    PG_BACKFILL_BATCH_SIZE,
+    HYBRID_SEARCH_ENABLED,
+    HYBRID_SEARCH_LANGUAGE,
+    logger,
+)
+
+# pgvector operator classes per LangChain DistanceStrategy value
+VECTOR_INDEX_OPS = {
+    "l2": "vector_l2_ops",
+    "cosine": "vector_cosine_ops",
+    "inner": "vector_ip_ops",
+}
+# pgvector cannot index vector columns with more dimensions than this
+MAX_INDEXABLE_DIMENSIONS = 2000
+# First pgvector release with hnsw.iterative_scan
+ITERATIVE_SCAN_MIN_VERSION = (0, 8)
+# Advisory lock key held by the worker building the search indexes
+SEARCH_INDEX_LOCK_ID = 72_616_701
+
+
+async def _init_connection(conn) -> None:
+    """Register the pgvector codec so vectors round-trip as lists of floats."""
+    await conn.set_type_codec(
+        "vector",
+        encoder=to_db_binary,
+        decoder=lambda value: from_db_binary(value).tolist(),
+        format="binary",
+    )
 
 
 class PSQLDatabase:
@@ -9,7 +49,12 @@ class PSQLDatabase:
     @classmethod
     async def get_pool(cls):
         if cls.pool is None:
-            cls.pool = await asyncpg.create_pool(dsn=DSN)
+            cls.pool = await asyncpg.create_pool(
+                dsn=DSN,
+                min_size=min(10, PG_POOL_MAX_SIZE),
+                max_size=PG_POOL_MAX_SIZE,
+                init=_init_connection,
+            )
         return cls.pool
 
     @classmethod
@@ -19,7 +64,11 @@ class PSQLDatabase:
             cls.pool = None
 
 
-async def ensure_vector_indexes():
+# Set as the comment of langchain_pg_embedding.file_id once the backfill finished
+ID_COLUMNS_READY_MARKER = "promoted from cmetadata"
+
+
+async def ensure_vector_indexes() -> None:
     """Ensure required indexes on langchain_pg_embedding and migrate cmetadata to JSONB.
 
     Runs at startup. Idempotent — safe to call repeatedly.
@@ -28,6 +77,11 @@ async def ensure_vector_indexes():
       2. Expression index on (cmetadata->>'file_id').
       3. DDL migration: JSON -> JSONB for cmetadata (skipped if already JSONB).
       4. GIN index (jsonb_path_ops) on cmetadata for containment queries.
+      5. Embedding cache table keyed by (chunk digest, embedding model).
+      6. Per-file ingestion status table, used by whole-file dedup.
+
+    The slow, CONCURRENTLY built search indexes are left to
+    build_search_indexes, which runs in the background.
     """
     table_name = "langchain_pg_embedding"
     column_name = "custom_id"
@@ -85,9 +139,349 @@ async def ensure_vector_indexes():
             """
         )
 
+        # Content-addressed embedding cache: identical chunk text embedded with
+        # the same model is looked up here instead of calling the provider again.
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS langchain_pg_embedding_cache (
+                digest TEXT NOT NULL,
+                model TEXT NOT NULL,
+                embedding vector NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (digest, model)
+            );
+            """
+        )
+
+        # Ingestion status per file: whole-file dedup only clones files whose
+        # ingestion completed, never the partial rows of one in progress.
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS langchain_pg_file_status (
+                collection_id UUID NOT NULL,
+                file_id TEXT NOT NULL,
+                user_id TEXT,
+                file_sha256 TEXT,
+                complete BOOLEAN NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                PRIMARY KEY (collection_id, file_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_langchain_pg_file_status_file_sha256
+            ON langchain_pg_file_status (file_sha256) WHERE complete;
+            """
+        )
+
         logger.info("Vector database indexes ensured")
 
 
+async def ensure_search_indexes() -> bool:
+    """Ensure the search indexes built CONCURRENTLY on langchain_pg_embedding.
+
+    Idempotent; runs in the background under build_search_indexes.
+    Operations:
+      1. Trigram GIN index on document for the exact-match (ILIKE) search.
+         With hybrid search enabled, also a full-text GIN index on
+         to_tsvector(HYBRID_SEARCH_LANGUAGE, document).
+      2. Partial expression index on (cmetadata->>'file_sha256').
+      3. Typed file_id/user_id columns promoted out of cmetadata (see
+         _promote_id_columns).
+
+    Returns True when the file_id/user_id columns are backfilled and indexed,
+    so queries can filter on them instead of extracting from JSONB.
+    """
+    table_name = "langchain_pg_embedding"
+    pool = await PSQLDatabase.get_pool()
+    async with pool.acquire() as conn:
+        # Trigram index: lets the planner answer the exact-match stage's
+        # document ILIKE '%...%' conditions with an index probe instead of
+        # scanning every chunk's text. Needs the pg_trgm extension.
+        try:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            trgm_index = f"idx_{table_name}_document_trgm"
+            if await _index_is_valid(conn, trgm_index) is False:
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {trgm_index};")
+            await conn.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {trgm_index}
+                ON {table_name} USING gin (document gin_trgm_ops);
+                """
+            )
+        except Exception as e:
+            logger.warning(
+                "Failed to ensure trigram index, exact matches will scan: %s", e
+            )
+
+        if HYBRID_SEARCH_ENABLED:
+            # Same expression as the lexical ranking in hybrid search queries
+            tsv_index = f"idx_{table_name}_document_tsv_{HYBRID_SEARCH_LANGUAGE}"
+            try:
+                if await _index_is_valid(conn, tsv_index) is False:
+                    await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {tsv_index};")
+                await conn.execute(
+                    f"""
+                    CREATE INDEX CONCURRENTLY IF NOT EXISTS {tsv_index}
+                    ON {table_name}
+                    USING gin (to_tsvector('{HYBRID_SEARCH_LANGUAGE}', document));
+                    """
+                )
+            except Exception as e:
+                logger.warning("Failed to ensure full-text index: %s", e)
+
+        # Whole-file dedup: finds an already-embedded upload by content hash.
+        sha_index = f"idx_{table_name}_file_sha256"
+        try:
+            if await _index_is_valid(conn, sha_index) is False:
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {sha_index};")
+            await conn.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {sha_index}
+                ON {table_name} ((cmetadata->>'file_sha256'))
+                WHERE cmetadata ? 'file_sha256';
+                """
+            )
+        except Exception as e:
+            logger.warning("Failed to ensure file_sha256 index: %s", e)
+
+        logger.info("Search indexes ensured")
+
+        return await _promote_id_columns(conn)
+
+
+async def _promote_id_columns(conn) -> bool:
+    """Add typed file_id/user_id columns mirroring cmetadata and backfill them.
+
+    A BEFORE INSERT/UPDATE trigger keeps the columns in sync for new rows
+    (including COPY), so the existing rows are backfilled in keyset batches
+    ordered by uuid, each committed on its own to avoid long row locks.
+    Indexes are then built CONCURRENTLY and a column comment marks the
+    migration as done so later startups skip it.
+    """
+    try:
+        done = await conn.fetchval(
+            """
+            SELECT col_description(a.attrelid, a.attnum) FROM pg_attribute a
+            WHERE a.attrelid = 'langchain_pg_embedding'::regclass
+              AND a.attname = 'file_id'
+            """
+        )
+        if done == ID_COLUMNS_READY_MARKER:
+            return True
+
+        await conn.execute(
+            """
+            SET lock_timeout = '10s';
+            ALTER TABLE langchain_pg_embedding
+                ADD COLUMN IF NOT EXISTS file_id TEXT,
+                ADD COLUMN IF NOT EXISTS user_id TEXT;
+            RESET lock_timeout;
+            """
+        )
+        await conn.execute(
+            """
+            CREATE OR REPLACE FUNCTION langchain_pg_embedding_sync_ids()
+            RETURNS trigger AS $$
+            BEGIN
+                NEW.file_id := NEW.cmetadata->>'file_id';
+                NEW.user_id := NEW.cmetadata->>'user_id';
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+
+            DO $$
+            BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_trigger
+                    WHERE tgname = 'langchain_pg_embedding_sync_ids'
+                      AND tgrelid = 'langchain_pg_embedding'::regclass
+                ) THEN
+                    CREATE TRIGGER langchain_pg_embedding_sync_ids
+                    BEFORE INSERT OR UPDATE OF cmetadata ON langchain_pg_embedding
+                    FOR EACH ROW EXECUTE FUNCTION langchain_pg_embedding_sync_ids();
+                END IF;
+            END
+            $$;
+            """
+        )
+
+        logger.info("Backfilling file_id/user_id columns on langchain_pg_embedding")
+        last_uuid = uuid.UUID(int=0)
+        while last_uuid is not None:
+            last_uuid = await conn.fetchval(
+                """
+                WITH batch AS (
+                    SELECT uuid FROM langchain_pg_embedding
+                    WHERE uuid > $1 ORDER BY uuid LIMIT $2
+                ), updated AS (
+                    UPDATE langchain_pg_embedding e
+                    SET file_id = e.cmetadata->>'file_id',
+                        user_id = e.cmetadata->>'user_id'
+                    FROM batch
+                    WHERE e.uuid = batch.uuid AND e.file_id IS NULL
+                )
+                SELECT uuid FROM batch ORDER BY uuid DESC LIMIT 1
+                """,
+                last_uuid,
+                PG_BACKFILL_BATCH_SIZE,
+            )
+
+        for column in ("file_id", "user_id"):
+            index_name = f"idx_langchain_pg_embedding_{column}_col"
+            if await _index_is_valid(conn, index_name) is False:
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+            await conn.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                ON langchain_pg_embedding ({column});
+                """
+            )
+        await conn.execute(
+            f"COMMENT ON COLUMN langchain_pg_embedding.file_id IS '{ID_COLUMNS_READY_MARKER}';"
+        )
+        logger.info("file_id/user_id columns promoted out of cmetadata")
+        return True
+    except Exception as e:
+        logger.warning("Failed to promote file_id/user_id columns: %s", e)
+        return False
+
+
+async def _index_is_valid(conn, index_name: str) -> Optional[bool]:
+    """Return whether an index is valid, or None if it does not exist.
+
+    An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind,
+    which IF NOT EXISTS would otherwise keep forever.
+    """
+    return await conn.fetchval(
+        """
+        SELECT i.indisvalid FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = $1
+        """,
+        index_name,
+    )
+
+
+async def ensure_vector_ann_index(distance_strategy: str = "cosine") -> Optional[int]:
+    """Ensure the HNSW/IVFFlat index for similarity search on langchain_pg_embedding.
+
+    The embedding column is declared without a dimension, so the index is a
+    partial expression index on embedding::vector(N) for rows with N
+    dimensions; queries must use the same expression to be served by it.
+    The index is built CONCURRENTLY so ingestion keeps working meanwhile;
+    like ensure_search_indexes it runs under build_search_indexes.
+
+    Returns the indexed dimension, or None when no index is in place.
+    """
+    if PG_VECTOR_INDEX_TYPE == "none":
+        return None
+
+    ops = VECTOR_INDEX_OPS[distance_strategy]
+    try:
+        pool = await PSQLDatabase.get_pool()
+        async with pool.acquire() as conn:
+            dimensions = PG_VECTOR_INDEX_DIMENSIONS or await conn.fetchval(
+                """
+                SELECT vector_dims(embedding) FROM langchain_pg_embedding
+                WHERE embedding IS NOT NULL LIMIT 1
+                """
+            )
+            if not dimensions:
+                logger.info(
+                    "No embeddings stored yet; %s index will be created on next startup "
+                    "(set PG_VECTOR_INDEX_DIMENSIONS to create it now)",
+                    PG_VECTOR_INDEX_TYPE,
+                )
+                return None
+            if dimensions > MAX_INDEXABLE_DIMENSIONS:
+                logger.warning(
+                    "Embeddings have %d dimensions; pgvector indexes support at most %d, "
+                    "similarity search will use exact scans",
+                    dimensions,
+                    MAX_INDEXABLE_DIMENSIONS,
+                )
+                return None
+
+            index_name = (
+                f"ix_langchain_pg_embedding_{PG_VECTOR_INDEX_TYPE}_"
+                f"{distance_strategy}_{dimensions}"
+            )
+            if PG_VECTOR_INDEX_TYPE == "hnsw":
+                options = f"m = {PG_HNSW_M}, ef_construction = {PG_HNSW_EF_CONSTRUCTION}"
+            else:
+                options = f"lists = {PG_IVFFLAT_LISTS}"
+
+            is_valid = await _index_is_valid(conn, index_name)
+            if is_valid:
+                return dimensions
+            if is_valid is False:
+                logger.warning("Dropping invalid index %s", index_name)
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+
+            logger.info(
+                "Building %s index %s (%s); this can take a while on large collections",
+                PG_VECTOR_INDEX_TYPE,
+                index_name,
+                options,
+            )
+            await conn.execute(
+                f"""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name}
+                ON langchain_pg_embedding
+                USING {PG_VECTOR_INDEX_TYPE} ((embedding::vector({dimensions})) {ops})
+                WITH ({options})
+                WHERE vector_dims(embedding) = {dimensions};
+                """
+            )
+            logger.info("Vector index %s ensured", index_name)
+            return dimensions
+    except Exception as e:
+        logger.warning("Failed to ensure vector index: %s", e)
+        return None
+
+
+async def build_search_indexes(
+    distance_strategy: str = "cosine", poll_interval: float = 5.0
+) -> Tuple[bool, Optional[int]]:
+    """Build the search and ANN indexes once across all workers.
+
+    Meant to run as a background task so startup does not wait for index
+    builds on large tables. A session advisory lock elects one builder; the
+    other workers poll for it (a blocked lock wait would hold a snapshot that
+    CREATE INDEX CONCURRENTLY has to wait for) and then run the same
+    idempotent steps, which find the indexes in place.
+
+    Returns (id_columns_ready, ann_dimensions) as from ensure_search_indexes
+    and ensure_vector_ann_index.
+    """
+    pool = await PSQLDatabase.get_pool()
+    async with pool.acquire() as conn:
+        waiting = False
+        while not await conn.fetchval(
+            "SELECT pg_try_advisory_lock($1)", SEARCH_INDEX_LOCK_ID
+        ):
+            if not waiting:
+                logger.info("Waiting for another worker to build search indexes")
+                waiting = True
+            await asyncio.sleep(poll_interval)
+        try:
+            id_columns_ready = await ensure_search_indexes()
+            ann_dimensions = await ensure_vector_ann_index(distance_strategy)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", SEARCH_INDEX_LOCK_ID)
+    return id_columns_ready, ann_dimensions
+
+
+async def get_pgvector_version() -> Optional[Tuple[int, ...]]:
+    """Return the installed pgvector extension version, e.g. (0, 8, 0)."""
+    pool = await PSQLDatabase.get_pool()
+    async with pool.acquire() as conn:
+        version = await conn.fetchval(
+            "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+        )
+    if not version:
+        return None
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
 async def pg_health_check() -> bool:
     try:
         pool = await PSQLDatabase.get_pool()
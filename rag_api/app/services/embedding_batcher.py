@@ -0,0 +1,172 @@
+# app/services/embedding_batcher.py
+import math
+import threading
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+
+from app.config import (
+    EmbeddingsProvider,
+    EMBEDDINGS_PROVIDER,
+    EMBEDDINGS_MODEL,
+    EMBEDDING_ADAPTIVE_BATCHING,
+    EMBEDDING_BATCH_TOKENS,
+    EMBEDDING_BATCH_MIN_TOKENS,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_TARGET_LATENCY,
+    logger,
+)
+from app.services.embedding_limiter import embedding_limiter
+
+TokenCounter = Callable[[str], int]
+
+# Rough characters per token for providers without a local tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def get_token_counter(provider: EmbeddingsProvider, model: str) -> TokenCounter:
+    """Return a token counter for the provider's model.
+
+    OpenAI and Azure models are counted exactly with tiktoken (falling back
+    to cl100k_base for unknown model or deployment names); other providers,
+    or a missing tiktoken, use a characters-per-token estimate.
+    """
+    if provider not in (EmbeddingsProvider.OPENAI, EmbeddingsProvider.AZURE):
+        return estimate_tokens
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed; estimating embedding tokens")
+        return estimate_tokens
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Failed to load the tiktoken encoding for %s: %s", model, e)
+        return estimate_tokens
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+class AdaptiveBatchSizer:
+    """Packs embedding batches up to a token budget tuned from provider feedback.
+
+    The budget follows AIMD: it is halved on a rate-limited call and cut by
+    a quarter when a call exceeds the target latency, and grows by a tenth of
+    the initial budget after each call finishing within half of it. One
+    sizer is shared by every ingestion in the worker, like the limiter that
+    feeds it.
+    """
+
+    def __init__(
+        self,
+        count_tokens: TokenCounter,
+        initial_tokens: int,
+        min_tokens: int,
+        max_tokens: int,
+        target_latency: float,
+        enabled: bool = True,
+    ):
+        self.count_tokens = count_tokens
+        self.min_tokens = max(1, min_tokens)
+        self.max_tokens = max(self.min_tokens, max_tokens)
+        self.initial_tokens = min(
+            max(initial_tokens, self.min_tokens), self.max_tokens
+        )
+        self.target_latency = target_latency
+        self.enabled = enabled
+        self.budget = self.initial_tokens
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rate_limited = 0
+        self.slow_calls = 0
+
+    def batches(
+        self, documents: Iterable[Document], max_items: int
+    ) -> Iterator[List[Document]]:
+        """Split a (lazy) document stream into batches.
+
+        Each batch holds at most `max_items` documents and, when enabled, at
+        most the current token budget; a single document over the budget is
+        a batch on its own. The budget is read per batch, so it adapts while
+        a file is being embedded.
+        """
+        documents = iter(documents)
+        if not self.enabled:
+            while batch := list(islice(documents, max_items)):
+                yield batch
+            return
+
+        pending: Optional[tuple] = None
+        while True:
+            budget = self.budget
+            batch: List[Document] = []
+            tokens = 0
+            if pending is not None:
+                batch.append(pending[0])
+                tokens = pending[1]
+                pending = None
+            for doc in documents:
+                doc_tokens = self.count_tokens(doc.page_content)
+                if batch and (
+                    tokens + doc_tokens > budget or len(batch) >= max_items
+                ):
+                    pending = (doc, doc_tokens)
+                    break
+                batch.append(doc)
+                tokens += doc_tokens
+            if not batch:
+                return
+            yield batch
+
+    def observe(self, duration: float, rate_limited: bool) -> None:
+        """Adjust the budget after a provider call."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.calls += 1
+            previous = self.budget
+            if rate_limited:
+                self.rate_limited += 1
+                self.budget = max(self.min_tokens, self.budget // 2)
+            elif self.target_latency > 0 and duration > self.target_latency:
+                self.slow_calls += 1
+                self.budget = max(self.min_tokens, self.budget * 3 // 4)
+            elif self.target_latency <= 0 or duration < self.target_latency / 2:
+                self.budget = min(
+                    self.max_tokens, self.budget + max(1, self.initial_tokens // 10)
+                )
+            if self.budget < previous:
+                logger.info(
+                    "Embedding batch budget reduced to %d tokens (%s)",
+                    self.budget,
+                    "rate limited" if rate_limited else f"call took {duration:.1f}s",
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "budget_tokens": self.budget,
+            "min_tokens": self.min_tokens,
+            "max_tokens": self.max_tokens,
+            "calls": self.calls,
+            "rate_limited": self.rate_limited,
+            "slow_calls": self.slow_calls,
+        }
+
+
+embedding_batch_sizer = AdaptiveBatchSizer(
+    get_token_counter(EMBEDDINGS_PROVIDER, EMBEDDINGS_MODEL),
+    EMBEDDING_BATCH_TOKENS,
+    EMBEDDING_BATCH_MIN_TOKENS,
+    EMBEDDING_BATCH_MAX_TOKENS,
+    EMBEDDING_BATCH_TARGET_LATENCY,
+    EMBEDDING_ADAPTIVE_BATCHING,
+)
+embedding_limiter.add_observer(embedding_batch_sizer.observe)
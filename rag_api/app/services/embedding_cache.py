@@ -0,0 +1,61 @@
+# app/services/embedding_cache.py
+from typing import Dict, List, Sequence
+
+from app.config import logger
+from app.services.database import PSQLDatabase
+
+
+class EmbeddingCache:
+    """Persistent digest -> vector cache stored next to langchain_pg_embedding.
+
+    Entries are keyed by the MD5 digest of the chunk text and the embedding
+    model, so re-uploads of known content skip the embedding provider. Cache
+    errors are logged and treated as misses; they never fail an ingestion.
+    """
+
+    table_name = "langchain_pg_embedding_cache"
+
+    def __init__(self, model: str):
+        self.model = model
+
+    async def get_many(self, digests: Sequence[str]) -> Dict[str, List[float]]:
+        """Return the cached embeddings for the given digests (misses omitted)."""
+        unique_digests = list(set(digests))
+        if not unique_digests:
+            return {}
+        try:
+            pool = await PSQLDatabase.get_pool()
+            async with pool.acquire() as conn:
+                rows = await conn.fetch(
+                    f"""
+                    SELECT digest, embedding FROM {self.table_name}
+                    WHERE model = $1 AND digest = ANY($2::text[])
+                    """,
+                    self.model,
+                    unique_digests,
+                )
+            return {row["digest"]: list(row["embedding"]) for row in rows}
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+            return {}
+
+    async def put_many(self, embeddings: Dict[str, List[float]]) -> None:
+        """Store embeddings by digest; existing entries are left untouched."""
+        if not embeddings:
+            return
+        try:
+            pool = await PSQLDatabase.get_pool()
+            async with pool.acquire() as conn:
+                await conn.executemany(
+                    f"""
+                    INSERT INTO {self.table_name} (digest, model, embedding)
+                    VALUES ($1, $2, $3)
+                    ON CONFLICT (digest, model) DO NOTHING
+                    """,
+                    [
+                        (digest, self.model, embedding)
+                        for digest, embedding in embeddings.items()
+                    ],
+                )
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
@@ -0,0 +1,123 @@
+# app/services/embedding_limiter.py
+import asyncio
+import random
+import re
+from typing import Any, Awaitable, Callable, List, Optional, TypeVar
+
+from app.config import (
+    EMBEDDING_PROVIDER_CONCURRENCY,
+    EMBEDDING_RATE_LIMIT_RETRIES,
+    EMBEDDING_RATE_LIMIT_BACKOFF,
+    logger,
+)
+
+T = TypeVar("T")
+
+
+# Last-resort match on the message of errors without a status code or a
+# throttling type: a 429 only counts next to "error", "status" or "code"
+RATE_LIMIT_MESSAGE = re.compile(
+    r"\b(?:(?:error|status|code|http)\W+(?:code\W+)?429"
+    r"|too many requests|rate[ _-]?limit(?:ed|s)?|throttl(?:ed|ing))\b",
+    re.IGNORECASE,
+)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Best-effort detection of provider throttling across embedding SDKs.
+
+    The HTTP status code (on the error or its response) decides when the SDK
+    exposes one; otherwise the error type, then the message, are checked.
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status_code, int):
+        return status_code == 429
+    name = type(error).__name__.lower()
+    if "ratelimit" in name or "throttl" in name or "resourceexhausted" in name:
+        return True
+    return RATE_LIMIT_MESSAGE.search(str(error)) is not None
+
+
+class EmbeddingRateLimiter:
+    """Bounds concurrent calls to the embedding provider and backs off on 429s.
+
+    One limiter is shared by every ingestion running in the worker, so
+    concurrent uploads cannot multiply the number of in-flight provider calls.
+    After a rate-limit error all callers pause until the cooldown expires.
+    Observers are told the duration of every provider call and whether it
+    was rate limited.
+    """
+
+    def __init__(self, max_concurrency: int, max_retries: int, backoff: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.backoff = backoff
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._cooldown_until = 0.0
+        self._observers: List[Callable[[float, bool], None]] = []
+
+    def add_observer(self, observer: Callable[[float, bool], None]) -> None:
+        """Call observer(duration, rate_limited) after every provider call."""
+        self._observers.append(observer)
+
+    def _notify(self, duration: float, rate_limited: bool) -> None:
+        for observer in self._observers:
+            try:
+                observer(duration, rate_limited)
+            except Exception as e:
+                logger.warning("Embedding limiter observer failed: %s", e)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives are bound to one event loop; recreate per loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+            self._cooldown_until = 0.0
+        return self._semaphore
+
+    async def run(
+        self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any
+    ) -> T:
+        """Await func(*args, **kwargs) within the provider's concurrency limit."""
+        semaphore = self._get_semaphore()
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            delay = self._cooldown_until - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with semaphore:
+                started = loop.time()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    rate_limited = is_rate_limit_error(e)
+                    self._notify(loop.time() - started, rate_limited)
+                    if attempt >= self.max_retries or not rate_limited:
+                        raise
+                    backoff = self.backoff * (2**attempt) * (1 + random.random())
+                    self._cooldown_until = max(
+                        self._cooldown_until, loop.time() + backoff
+                    )
+                    attempt += 1
+                    logger.warning(
+                        "Embedding provider rate limited, retrying in %.1fs (attempt %d/%d): %s",
+                        backoff,
+                        attempt,
+                        self.max_retries,
+                        e,
+                    )
+                else:
+                    self._notify(loop.time() - started, False)
+                    return result
+
+
+embedding_limiter = EmbeddingRateLimiter(
+    EMBEDDING_PROVIDER_CONCURRENCY,
+    EMBEDDING_RATE_LIMIT_RETRIES,
+    EMBEDDING_RATE_LIMIT_BACKOFF,
+)
@@ -0,0 +1,244 @@
+# app/services/ingestion_jobs.py
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import (
+    INGESTION_JOB_WORKERS,
+    INGESTION_JOB_QUEUE_SIZE,
+    INGESTION_JOB_RETENTION,
+    INGESTION_JOB_REDIS_URL,
+    logger,
+)
+from app.services.redis_client import get_redis_client
+
+
+class IngestionJob:
+    """Status of one background ingestion, as reported by /jobs/{id}.
+
+    Also the progress sink handed to store_data_in_vector_db: the pipeline
+    reports its stage, completed batches and, once the file has been fully
+    read, the total number of batches.
+    """
+
+    def __init__(self, file_id: str, user_id: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.file_id = file_id
+        self.user_id = user_id
+        self.filename = filename
+        self.status = "queued"  # queued -> running -> completed | failed
+        self.stage = "queued"
+        self.batches_done = 0
+        self.num_batches: Optional[int] = None
+        self.chunks_done = 0
+        self.known_type: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._on_change: Optional[Callable[["IngestionJob"], None]] = None
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change(self)
+
+    def set_stage(self, stage: str) -> None:
+        self.stage = stage
+        self._changed()
+
+    def set_num_batches(self, num_batches: int) -> None:
+        self.num_batches = num_batches
+        self._changed()
+
+    def batch_done(self, chunks: int) -> None:
+        self.batches_done += 1
+        self.chunks_done += chunks
+        self._changed()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "file_id": self.file_id,
+            "user_id": self.user_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "batches_done": self.batches_done,
+            "num_batches": self.num_batches,
+            "chunks_done": self.chunks_done,
+            "known_type": self.known_type,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+JobWork = Callable[[IngestionJob], Awaitable[None]]
+
+
+class IngestionJobQueue:
+    """Bounded in-process queue of ingestion jobs run by a fixed set of workers.
+
+    Jobs run on the worker's event loop, so they share the thread pool,
+    process pool and embedding limiter with request-bound ingestion. Status
+    lives in this process; with Redis configured it is mirrored there so any
+    worker can answer /jobs/{id}. Finished jobs are kept for `retention`
+    seconds.
+    """
+
+    key_prefix = "rag:ingestion_job:"
+
+    def __init__(
+        self, workers: int, max_size: int, retention: int, redis_url: str = ""
+    ):
+        self.workers = max(1, workers)
+        self.max_size = max(1, max_size)
+        self.retention = max(0, retention)
+        self.redis_url = redis_url
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Status writes in flight, referenced until done so they are not
+        # garbage collected mid-write
+        self._publishes: Set[asyncio.Task] = set()
+        self._loop = None
+        self._redis = None
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client(self.redis_url)
+        return self._redis
+
+    def start(self) -> None:
+        """Start the workers on the running loop (again, if it changed)."""
+        loop = asyncio.get_running_loop()
+        if self._queue is not None and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Finish the running jobs; jobs still queued are failed."""
+        if self._queue is None:
+            return
+        queue, self._queue = self._queue, None
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                job, _, cleanup = item
+                self._finish(job, "Server shut down before the job started")
+                await cleanup()
+        for _ in self._tasks:
+            queue.put_nowait(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Let the final statuses reach redis
+        await asyncio.gather(*self._publishes, return_exceptions=True)
+
+    def submit(
+        self, job: IngestionJob, work: JobWork, cleanup: Callable[[], Awaitable[None]]
+    ) -> bool:
+        """Queue `work(job)`; `cleanup()` runs after it, whatever the outcome.
+
+        Returns False when the queue is full; the job is not registered then.
+        """
+        self.start()
+        self._prune()
+        try:
+            self._queue.put_nowait((job, work, cleanup))
+        except asyncio.QueueFull:
+            return False
+        job._on_change = self._publish
+        self._jobs[job.id] = job
+        self._publish(job)
+        return True
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job's status, from this process or the Redis mirror."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        client = self._get_redis()
+        if client is None:
+            return None
+        try:
+            raw = await client.get(f"{self.key_prefix}{job_id}")
+        except Exception as e:
+            logger.warning("Ingestion job status lookup failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention
+        for job_id in [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    def _publish(self, job: IngestionJob) -> None:
+        client = self._get_redis()
+        if client is None:
+            return
+
+        async def store(payload: str):
+            try:
+                await client.set(
+                    f"{self.key_prefix}{job.id}",
+                    payload,
+                    ex=self.retention or None,
+                )
+            except Exception as e:
+                logger.warning("Ingestion job status publish failed: %s", e)
+
+        # Snapshot now; the write completes in the background
+        task = asyncio.ensure_future(store(json.dumps(job.to_dict())))
+        self._publishes.add(task)
+        task.add_done_callback(self._publishes.discard)
+
+    def _finish(self, job: IngestionJob, error: Optional[str]) -> None:
+        job.status = "failed" if error else "completed"
+        job.stage = job.status
+        job.error = error
+        job.finished_at = time.time()
+        self._publish(job)
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            job, work, cleanup = item
+            job.status = "running"
+            job.started_at = time.time()
+            job.set_stage("loading")
+            error = None
+            try:
+                await work(job)
+            except Exception as e:
+                logger.error(
+                    "Ingestion job %s (file %s) failed: %s", job.id, job.file_id, e
+                )
+                error = str(e) or type(e).__name__
+            finally:
+                try:
+                    await cleanup()
+                except Exception as e:
+                    logger.warning("Ingestion job %s cleanup failed: %s", job.id, e)
+            self._finish(job, error)
+
+
+ingestion_jobs = IngestionJobQueue(
+    INGESTION_JOB_WORKERS,
+    INGESTION_JOB_QUEUE_SIZE,
+    INGESTION_JOB_RETENTION,
+    INGESTION_JOB_REDIS_URL,
+)
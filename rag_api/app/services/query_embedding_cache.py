@@ -0,0 +1,152 @@
+# app/services/query_embedding_cache.py
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import (
+    EMBEDDING_CACHE_MODEL_KEY,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    QUERY_EMBEDDING_CACHE_TTL,
+    QUERY_EMBEDDING_CACHE_REDIS_URL,
+    QUERY_EMBEDDING_CACHE_CASE_INSENSITIVE,
+    logger,
+)
+from app.services.redis_client import get_redis_client
+
+
+class QueryEmbeddingCache:
+    """Two-level cache of query embeddings keyed by model and normalized text.
+
+    L1 is a bounded in-process LRU with a TTL. L2 is an optional Redis shared
+    by every worker, so a question embedded by one worker is never re-embedded
+    by another while the entry lives. Redis errors are logged and treated as
+    misses; they never fail a query.
+    """
+
+    key_prefix = "rag:query_embedding:"
+
+    def __init__(
+        self,
+        model: str,
+        max_size: int,
+        ttl: int,
+        redis_url: str = "",
+        case_insensitive: bool = True,
+    ):
+        self.model = model
+        self.max_size = max(0, max_size)
+        self.ttl = max(0, ttl)
+        self.redis_url = redis_url
+        self.case_insensitive = case_insensitive
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._redis = None
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def normalize(self, query: str) -> str:
+        """Collapse whitespace (and case, if enabled) so equivalent queries share an entry."""
+        normalized = " ".join(query.split())
+        return normalized.casefold() if self.case_insensitive else normalized
+
+    def _key(self, query: str) -> str:
+        digest = hashlib.sha256(
+            f"{self.model}\0{self.normalize(query)}".encode("utf-8")
+        ).hexdigest()
+        return f"{self.key_prefix}{digest}"
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client(self.redis_url)
+        return self._redis
+
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, embedding = entry
+        if self.ttl and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _set_local(self, key: str, embedding: List[float]) -> None:
+        if not self.max_size:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, query: str) -> Optional[List[float]]:
+        """Return the cached embedding for the query, or None on a miss."""
+        key = self._key(query)
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.l1_hits += 1
+            return embedding
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                raw = await client.get(key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning("Query embedding cache lookup failed: %s", e)
+                raw = None
+            if raw is not None:
+                embedding = json.loads(raw)
+                self._set_local(key, embedding)
+                self.l2_hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    async def set(self, query: str, embedding: List[float]) -> None:
+        """Store the embedding in L1 and, when configured, in Redis."""
+        key = self._key(query)
+        embedding = list(embedding)
+        self._set_local(key, embedding)
+
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(key, json.dumps(embedding), ex=self.ttl or None)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Query embedding cache store failed: %s", e)
+
+    def clear(self) -> None:
+        """Drop the in-process entries and reset the counters."""
+        self._entries.clear()
+        self.l1_hits = self.l2_hits = self.misses = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "model": self.model,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "redis": self._redis is not None,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": (self.l1_hits + self.l2_hits) / lookups if lookups else 0.0,
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    EMBEDDING_CACHE_MODEL_KEY,
+    QUERY_EMBEDDING_CACHE_SIZE,
+    QUERY_EMBEDDING_CACHE_TTL,
+    QUERY_EMBEDDING_CACHE_REDIS_URL,
+    QUERY_EMBEDDING_CACHE_CASE_INSENSITIVE,
+)
@@ -0,0 +1,149 @@
+# app/services/query_result_cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.config import (
+    QUERY_RESULT_CACHE_SIZE,
+    QUERY_RESULT_CACHE_TTL,
+    QUERY_RESULT_CACHE_REDIS_URL,
+    logger,
+)
+from app.services.query_embedding_cache import query_embedding_cache
+from app.services.redis_client import get_redis_client
+
+SearchResults = List[Tuple[Document, float]]
+
+
+class QueryResultCache:
+    """In-process cache of ranked search results keyed by (file_ids, query, k).
+
+    Entries are dropped when any of their file_ids is re-embedded or deleted.
+    With Redis configured, each file_id also has a shared version counter that
+    is part of the entry key, so an invalidation in one worker makes the
+    entries of every worker unreachable. If the versions cannot be read the
+    cache is bypassed rather than risk serving stale results.
+    """
+
+    version_prefix = "rag:query_result_version:"
+
+    def __init__(self, max_size: int, ttl: int, redis_url: str = ""):
+        self.max_size = max(0, max_size)
+        self.ttl = max(0, ttl)
+        self.redis_url = redis_url
+        self._entries: "OrderedDict[tuple, Tuple[float, SearchResults]]" = (
+            OrderedDict()
+        )
+        self._redis = None
+        # Bumped on every invalidation; results computed across a bump are
+        # not stored because they may predate the change.
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _get_redis(self):
+        if self._redis is None:
+            self._redis = get_redis_client(self.redis_url)
+        return self._redis
+
+    async def lookup(
+        self, file_ids: Iterable[str], query: str, k: int
+    ) -> Tuple[Optional[tuple], Optional[SearchResults]]:
+        """Return (entry_key, cached results or None).
+
+        Pass entry_key to store() once the results are computed; it is None
+        when the cache is disabled or unavailable for this lookup.
+        """
+        if not self.enabled:
+            return None, None
+        ids = tuple(sorted(set(file_ids)))
+        versions: tuple = ()
+        client = self._get_redis()
+        if client is not None:
+            try:
+                versions = tuple(
+                    await client.mget([f"{self.version_prefix}{id}" for id in ids])
+                )
+            except Exception as e:
+                logger.warning("Query result cache version lookup failed: %s", e)
+                return None, None
+
+        key = (ids, query_embedding_cache.normalize(query), k, versions)
+        entry = self._entries.get(key)
+        if entry is not None and (not self.ttl or entry[0] > time.monotonic()):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return None, entry[1]
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return (key, self._generation), None
+
+    def store(self, entry_key: Optional[tuple], results: SearchResults) -> None:
+        if entry_key is None:
+            return
+        key, generation = entry_key
+        if generation != self._generation:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, results)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, file_ids: Iterable[str]) -> None:
+        """Drop every entry that searched any of the given file_ids."""
+        ids = set(file_ids)
+        if not ids or not self.enabled:
+            return
+        self._generation += 1
+        self.invalidations += 1
+        for key in [key for key in self._entries if ids.intersection(key[0])]:
+            del self._entries[key]
+
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                for id in ids:
+                    pipe.incr(f"{self.version_prefix}{id}")
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("Query result cache invalidation failed: %s", e)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generation += 1
+        self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "redis": self._redis is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+query_result_cache = QueryResultCache(
+    QUERY_RESULT_CACHE_SIZE,
+    QUERY_RESULT_CACHE_TTL,
+    QUERY_RESULT_CACHE_REDIS_URL,
+)
+if query_result_cache.enabled and not QUERY_RESULT_CACHE_REDIS_URL:
+    logger.warning(
+        "Query result cache enabled without Redis: invalidations are per "
+        "worker, so only run a single worker with it"
+    )
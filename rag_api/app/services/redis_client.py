@@ -0,0 +1,32 @@
+# app/services/redis_client.py
+from typing import Any, Dict, Optional
+
+from app.config import logger
+
+_clients: Dict[str, Any] = {}
+_redis_missing = False
+
+
+def get_redis_client(url: str) -> Optional[Any]:
+    """Return a shared redis.asyncio client for the URL, or None if unavailable.
+
+    The redis package is optional; without it (or without a URL) callers fall
+    back to their in-process behaviour.
+    """
+    global _redis_missing
+    if not url or _redis_missing:
+        return None
+    client = _clients.get(url)
+    if client is not None:
+        return client
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning(
+            "A Redis URL is configured but the redis package is not installed; "
+            "using in-process caches only"
+        )
+        _redis_missing = True
+        return None
+    client = _clients[url] = redis.from_url(url)
+    return client
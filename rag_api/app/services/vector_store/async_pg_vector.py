@@ -1,13 +1,56 @@
-from typing import Callable, Optional, List, Tuple, Dict, Any, TypeVar
+from typing import Callable, Optional, List, Set, Tuple, Dict, Any, TypeVar
 import asyncio
+import hashlib
+import json
+import logging
+import uuid
 from concurrent.futures import Executor
 from langchain_core.documents import Document
+from langchain_community.vectorstores.pgvector import DistanceStrategy
 from .extended_pg_vector import ExtendedPgVector
 
 T = TypeVar("T")
 
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant (standard value from the RRF paper)
+RRF_K = 60
+# Candidates fetched from each ranking per requested hybrid search result
+HYBRID_CANDIDATES_PER_RESULT = 4
+# Chunk metadata keys holding the path an upload was loaded from
+UPLOAD_PATH_KEYS = ("source", "file_path")
+
+# pgvector operators matching PGVector.distance_strategy
+_DISTANCE_OPERATORS = {
+    DistanceStrategy.EUCLIDEAN: "<->",
+    DistanceStrategy.COSINE: "<=>",
+    DistanceStrategy.MAX_INNER_PRODUCT: "<#>",
+}
+
+
+def _row_metadata(row) -> dict:
+    metadata = row["cmetadata"]
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return metadata or {}
+
+
+def _row_to_document(row) -> Document:
+    return Document(page_content=row["document"], metadata=_row_metadata(row))
+
 
 class AsyncPgVector(ExtendedPgVector):
+    # Optional EmbeddingCache, attached at startup when the cache is enabled.
+    embedding_cache = None
+    # Optional asyncpg pool, attached at startup when bulk insertion is enabled.
+    bulk_insert_pool = None
+    # Optional asyncpg pool for native async queries and deletes, attached at
+    # startup. Without it every call runs sync SQLAlchemy in the thread pool.
+    asyncpg_pool = None
+    # Hybrid (lexical + vector) retrieval, configured at startup
+    hybrid_search_enabled = False
+    hybrid_search_language = "spanish"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._thread_pool = None
@@ -49,26 +92,167 @@ class AsyncPgVector(ExtendedPgVector):
         return await self._run_in_executor(executor, super().get_all_ids)
 
     async def get_filtered_ids(self, ids: list[str], executor=None) -> list[str]:
+        if self.asyncpg_pool is not None:
+            async with self.asyncpg_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT custom_id FROM langchain_pg_embedding
+                    WHERE custom_id = ANY($1::text[])
+                    """,
+                    list(ids),
+                )
+            return [row["custom_id"] for row in rows]
         executor = executor or self._get_thread_pool()
         return await self._run_in_executor(executor, super().get_filtered_ids, ids)
 
     async def get_documents_by_ids(
         self, ids: list[str], executor=None
     ) -> list[Document]:
+        if self.asyncpg_pool is not None:
+            async with self.asyncpg_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT document, cmetadata FROM langchain_pg_embedding
+                    WHERE custom_id = ANY($1::text[])
+                    """,
+                    list(ids),
+                )
+            return [_row_to_document(row) for row in rows]
         executor = executor or self._get_thread_pool()
         return await self._run_in_executor(executor, super().get_documents_by_ids, ids)
 
+    async def aget_file_digests(self, file_id: str, executor=None) -> list[str]:
+        """Return the content digest of every chunk stored for file_id."""
+        if self.asyncpg_pool is not None:
+            collection_uuid = await self._aget_collection_uuid(executor)
+            async with self.asyncpg_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT cmetadata->>'digest' AS digest FROM langchain_pg_embedding
+                    WHERE collection_id = $1 AND custom_id = $2
+                    """,
+                    collection_uuid,
+                    file_id,
+                )
+            return [row["digest"] for row in rows if row["digest"] is not None]
+        documents = await self.get_documents_by_ids([file_id], executor=executor)
+        return [
+            doc.metadata["digest"] for doc in documents if doc.metadata.get("digest")
+        ]
+
     async def delete(
         self,
         ids: Optional[list[str]] = None,
         collection_only: bool = False,
         executor=None,
     ) -> None:
+        if self.asyncpg_pool is not None:
+            if ids is None:
+                return
+            query = "DELETE FROM langchain_pg_embedding WHERE custom_id = ANY($1::text[])"
+            status_query = (
+                "DELETE FROM langchain_pg_file_status WHERE file_id = ANY($1::text[])"
+            )
+            args = [list(ids)]
+            if collection_only:
+                try:
+                    collection_uuid = await self._aget_collection_uuid(executor)
+                except ValueError:
+                    logger.warning("Collection not found")
+                    return
+                query += " AND collection_id = $2"
+                status_query += " AND collection_id = $2"
+                args.append(collection_uuid)
+            async with self.asyncpg_pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(query, *args)
+                    await conn.execute(status_query, *args)
+            return
         executor = executor or self._get_thread_pool()
         await self._run_in_executor(
             executor, self._delete_multiple, ids, collection_only
         )
 
+    async def _aget_collection_uuid(self, executor=None):
+        """Async version of get_collection_uuid"""
+        if self._collection_uuid is not None:
+            return self._collection_uuid
+        if self.asyncpg_pool is not None:
+            async with self.asyncpg_pool.acquire() as conn:
+                collection_uuid = await conn.fetchval(
+                    "SELECT uuid FROM langchain_pg_collection WHERE name = $1",
+                    self.collection_name,
+                )
+            if collection_uuid is None:
+                raise ValueError("Collection not found")
+            self._collection_uuid = collection_uuid
+            return collection_uuid
+        executor = executor or self._get_thread_pool()
+        return await self._run_in_executor(executor, self.get_collection_uuid)
+
+    @property
+    def _file_id_sql(self) -> str:
+        """SQL expression for a chunk's file_id, for filtering."""
+        return "file_id" if self.id_columns_ready else "cmetadata->>'file_id'"
+
+    def _file_id_clause(
+        self, filter: Optional[Dict[str, Any]], param: int
+    ) -> Optional[Tuple[str, Any]]:
+        """Translate a file_id filter like _query_collection does.
+
+        Returns (sql, value) for the given placeholder number, ("", None)
+        without filter, or None when the filter needs LangChain's translation.
+        """
+        if not filter:
+            return "", None
+        if "file_id" not in filter:
+            return None
+        file_id_val = filter["file_id"]
+        if isinstance(file_id_val, dict):
+            if "$eq" in file_id_val:
+                return f" AND {self._file_id_sql} = ${param}", file_id_val["$eq"]
+            if "$in" in file_id_val:
+                return (
+                    f" AND {self._file_id_sql} = ANY(${param}::text[])",
+                    list(file_id_val["$in"]),
+                )
+            return "", None
+        return f" AND {self._file_id_sql} = ${param}", str(file_id_val)
+
+    def _distance_sql(
+        self, embedding: List[float], filter: Optional[Dict[str, Any]]
+    ) -> Tuple[str, str, bool]:
+        """Distance expression against $1, extra WHERE sql, and ANN index use.
+
+        When the managed ANN index applies, the expression and the extra
+        condition match its partial expression index (ensure_vector_ann_index).
+        """
+        operator = _DISTANCE_OPERATORS[self._distance_strategy]
+        if self._uses_ann_index(embedding, filter):
+            dimensions = int(self.ann_index_dimensions)
+            return (
+                f"(embedding::vector({dimensions})) {operator} $1::vector({dimensions})",
+                f" AND vector_dims(embedding) = {dimensions}",
+                True,
+            )
+        return f"embedding {operator} $1", "", False
+
+    async def _afetch_search(
+        self,
+        query: str,
+        args: List[Any],
+        filter: Optional[Dict[str, Any]],
+        uses_ann_index: bool,
+    ) -> List[Any]:
+        """Fetch a search query, tuning the ANN index scan when it is used."""
+        async with self.asyncpg_pool.acquire() as conn:
+            if not uses_ann_index:
+                return await conn.fetch(query, *args)
+            async with conn.transaction():
+                for setting in self._ann_search_settings(filter):
+                    await conn.execute(setting)
+                return await conn.fetch(query, *args)
+
     async def asimilarity_search_with_score_by_vector(
         self,
         embedding: List[float],
@@ -77,6 +261,24 @@ class AsyncPgVector(ExtendedPgVector):
         executor=None,
     ) -> List[Tuple[Document, float]]:
         """Async version of similarity_search_with_score_by_vector"""
+        file_id_clause = self._file_id_clause(filter, 3)
+        if self.asyncpg_pool is not None and file_id_clause is not None:
+            collection_uuid = await self._aget_collection_uuid(executor)
+            clause, value = file_id_clause
+            args = [embedding, collection_uuid] + ([value] if clause else [])
+            distance, ann_clause, uses_ann_index = self._distance_sql(
+                embedding, filter
+            )
+            query = f"""
+                SELECT document, cmetadata, {distance} AS distance
+                FROM langchain_pg_embedding
+                WHERE collection_id = $2{clause}{ann_clause}
+                ORDER BY distance
+                LIMIT {int(k)}
+            """
+            rows = await self._afetch_search(query, args, filter, uses_ann_index)
+            return [(_row_to_document(row), row["distance"]) for row in rows]
+
         executor = executor or self._get_thread_pool()
         return await self._run_in_executor(
             executor,
@@ -86,19 +288,442 @@ class AsyncPgVector(ExtendedPgVector):
             filter,
         )
 
+    @property
+    def hybrid_search_available(self) -> bool:
+        """Whether ahybrid_search_with_score_by_vector can be used."""
+        return self.hybrid_search_enabled and self.asyncpg_pool is not None
+
+    async def ahybrid_search_with_score_by_vector(
+        self,
+        query: str,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        executor=None,
+    ) -> List[Tuple[Document, float]]:
+        """Hybrid lexical + vector search fused with reciprocal rank fusion.
+
+        Vector candidates (by distance) and lexical candidates (ts_rank_cd of
+        the query's stemmed words, OR-ed) are ranked and fused in a single
+        query. Scores follow the distance convention of the vector search:
+        0.0 for a chunk ranked first by both, approaching 1.0 otherwise.
+        Requires the asyncpg pool; only file_id filters are supported.
+        """
+        file_id_clause = self._file_id_clause(filter, 3)
+        if file_id_clause is None:
+            raise ValueError("Hybrid search only supports file_id filters")
+
+        collection_uuid = await self._aget_collection_uuid(executor)
+        clause, value = file_id_clause
+        args = [embedding, collection_uuid] + ([value] if clause else [])
+        args.append(query)
+        query_param = f"${len(args)}"
+        distance, ann_clause, uses_ann_index = self._distance_sql(embedding, filter)
+        candidates = max(int(k) * HYBRID_CANDIDATES_PER_RESULT, 20)
+        language = self.hybrid_search_language
+        document_tsvector = f"to_tsvector('{language}', document)"
+
+        sql = f"""
+            WITH vector_candidates AS (
+                SELECT uuid, {distance} AS distance
+                FROM langchain_pg_embedding
+                WHERE collection_id = $2{clause}{ann_clause}
+                ORDER BY distance
+                LIMIT {candidates}
+            ), vector_ranked AS (
+                SELECT uuid, row_number() OVER (ORDER BY distance) AS rank
+                FROM vector_candidates
+            ), lexical_query AS (
+                -- Match any of the query's stemmed words, not all of them
+                SELECT replace(
+                    plainto_tsquery('{language}', {query_param})::text, '&', '|'
+                )::tsquery AS q
+            ), lexical_candidates AS (
+                SELECT uuid, ts_rank_cd({document_tsvector}, q) AS lexical_score
+                FROM langchain_pg_embedding, lexical_query
+                WHERE collection_id = $2{clause} AND {document_tsvector} @@ q
+                ORDER BY lexical_score DESC
+                LIMIT {candidates}
+            ), lexical_ranked AS (
+                SELECT uuid, row_number() OVER (ORDER BY lexical_score DESC) AS rank
+                FROM lexical_candidates
+            ), fused AS (
+                SELECT COALESCE(v.uuid, l.uuid) AS uuid,
+                       COALESCE(1.0 / ({RRF_K} + v.rank), 0)
+                       + COALESCE(1.0 / ({RRF_K} + l.rank), 0) AS rrf_score
+                FROM vector_ranked v
+                FULL OUTER JOIN lexical_ranked l ON l.uuid = v.uuid
+            )
+            SELECT e.document, e.cmetadata,
+                   1 - f.rrf_score * ({RRF_K} + 1) / 2.0 AS score
+            FROM fused f
+            JOIN langchain_pg_embedding e ON e.uuid = f.uuid
+            ORDER BY f.rrf_score DESC
+            LIMIT {int(k)}
+        """
+        rows = await self._afetch_search(sql, args, filter, uses_ann_index)
+        return [(_row_to_document(row), float(row["score"])) for row in rows]
+
+    async def aembed_documents(
+        self, documents: List[Document], executor=None
+    ) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for already-seen chunk digests.
+
+        Only chunks missing from the embedding cache are sent to the provider;
+        duplicate chunks within the batch are embedded once.
+        """
+        executor = executor or self._get_thread_pool()
+        texts = [doc.page_content for doc in documents]
+        if self.embedding_cache is None:
+            return await self._run_in_executor(
+                executor, self.embedding_function.embed_documents, texts
+            )
+
+        digests = [
+            (doc.metadata or {}).get("digest")
+            or hashlib.md5(doc.page_content.encode("utf-8", "ignore")).hexdigest()
+            for doc in documents
+        ]
+        vectors = await self.embedding_cache.get_many(digests)
+
+        missing = {}
+        for digest, text in zip(digests, texts):
+            if digest not in vectors:
+                missing.setdefault(digest, text)
+
+        if missing:
+            new_vectors = await self._run_in_executor(
+                executor, self.embedding_function.embed_documents, list(missing.values())
+            )
+            fresh = dict(zip(missing.keys(), new_vectors))
+            await self.embedding_cache.put_many(fresh)
+            vectors.update(fresh)
+
+        logger.debug(
+            "Embedding cache: %d/%d chunks served from cache",
+            len(documents) - sum(1 for d in digests if d in missing),
+            len(documents),
+        )
+        return [vectors[digest] for digest in digests]
+
     async def aadd_documents(
         self,
         documents: List[Document],
         ids: Optional[List[str]] = None,
         executor=None,
+        embeddings: Optional[List[List[float]]] = None,
         **kwargs,
     ) -> List[str]:
-        """Async version of add_documents"""
+        """Async version of add_documents.
+
+        Pass precomputed ``embeddings`` (one per document) to only insert.
+        """
         executor = executor or self._get_thread_pool()
+        if embeddings is None:
+            embeddings = await self.aembed_documents(documents, executor=executor)
+        if self.bulk_insert_pool is not None:
+            return await self.acopy_embeddings(
+                [doc.page_content for doc in documents],
+                embeddings,
+                metadatas=[doc.metadata for doc in documents],
+                ids=ids,
+                executor=executor,
+            )
         return await self._run_in_executor(
-            executor, super().add_documents, documents, ids=ids, **kwargs
+            executor,
+            super().add_embeddings,
+            [doc.page_content for doc in documents],
+            embeddings,
+            metadatas=[doc.metadata for doc in documents],
+            ids=ids,
+            **kwargs,
         )
 
+    async def acopy_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        executor=None,
+    ) -> List[str]:
+        """Bulk insert embeddings with a binary COPY over the asyncpg pool.
+
+        Produces the same rows as add_embeddings, without the per-row ORM
+        overhead: vectors are sent in pgvector's binary format and metadata
+        as JSONB in a single COPY ... FROM STDIN.
+        """
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        if not metadatas:
+            metadatas = [{} for _ in texts]
+
+        collection_uuid = await self._aget_collection_uuid(executor)
+        records = [
+            (uuid.uuid4(), collection_uuid, embedding, text, json.dumps(metadata), id)
+            for text, metadata, embedding, id in zip(texts, metadatas, embeddings, ids)
+        ]
+        async with self.bulk_insert_pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                "langchain_pg_embedding",
+                records=records,
+                columns=[
+                    "uuid",
+                    "collection_id",
+                    "embedding",
+                    "document",
+                    "cmetadata",
+                    "custom_id",
+                ],
+            )
+        return ids
+
+    async def aclone_file_documents(
+        self,
+        file_sha256: str,
+        user_id: str,
+        file_id: str,
+        source: Optional[str] = None,
+        executor=None,
+    ) -> int:
+        """Copy the chunks of an identical, already-embedded upload to file_id.
+
+        Looks up another file of the same user with the same content hash
+        whose ingestion completed (see aset_file_status), inserts its rows
+        (text, embedding, metadata) under the new file_id and marks file_id
+        complete, in a single statement. With the new upload's `source` path,
+        the path keys of the copied metadata (UPLOAD_PATH_KEYS) are set to it.
+        Returns the number of rows cloned, 0 when no such file exists.
+        """
+        if self.asyncpg_pool is None:
+            return 0
+        collection_uuid = await self._aget_collection_uuid(executor)
+        async with self.asyncpg_pool.acquire() as conn:
+            cloned = await conn.fetchval(
+                """
+                WITH source AS (
+                    SELECT file_id FROM langchain_pg_file_status
+                    WHERE collection_id = $1
+                      AND file_sha256 = $2
+                      AND user_id = $3
+                      AND complete
+                      AND file_id <> $4
+                    LIMIT 1
+                ), cloned AS (
+                    INSERT INTO langchain_pg_embedding
+                        (uuid, collection_id, embedding, document, cmetadata, custom_id)
+                    SELECT gen_random_uuid(), collection_id, embedding, document,
+                           cmetadata
+                           || jsonb_build_object('file_id', $4::text)
+                           || COALESCE(
+                               (
+                                   SELECT jsonb_object_agg(key, $5::text)
+                                   FROM jsonb_object_keys(cmetadata) AS key
+                                   WHERE $5::text IS NOT NULL
+                                     AND key = ANY($6::text[])
+                               ),
+                               '{}'::jsonb
+                           ),
+                           $4
+                    FROM langchain_pg_embedding
+                    WHERE collection_id = $1
+                      AND custom_id = (SELECT file_id FROM source)
+                    RETURNING 1
+                ), status AS (
+                    INSERT INTO langchain_pg_file_status
+                        (collection_id, file_id, user_id, file_sha256, complete)
+                    SELECT $1, $4, $3, $2, true
+                    WHERE EXISTS (SELECT 1 FROM cloned)
+                    ON CONFLICT (collection_id, file_id) DO UPDATE
+                    SET user_id = EXCLUDED.user_id,
+                        file_sha256 = EXCLUDED.file_sha256,
+                        complete = true,
+                        updated_at = now()
+                )
+                SELECT count(*) FROM cloned
+                """,
+                collection_uuid,
+                file_sha256,
+                user_id,
+                file_id,
+                source,
+                list(UPLOAD_PATH_KEYS),
+            )
+        return cloned or 0
+
+    @property
+    def file_status_available(self) -> bool:
+        """Whether per-file ingestion status is tracked (native pool only)."""
+        return self.asyncpg_pool is not None
+
+    async def aget_incomplete_file_ids(
+        self, file_ids: List[str], executor=None
+    ) -> Set[str]:
+        """Return the file_ids whose ingestion has not completed.
+
+        Their stored chunks are partial (an ingestion in progress, or a
+        failed resumable one) and are left out of searches.
+        """
+        if self.asyncpg_pool is None or not file_ids:
+            return set()
+        collection_uuid = await self._aget_collection_uuid(executor)
+        async with self.asyncpg_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT file_id FROM langchain_pg_file_status
+                WHERE collection_id = $1
+                  AND file_id = ANY($2::text[])
+                  AND NOT complete
+                """,
+                collection_uuid,
+                list(file_ids),
+            )
+        return {row["file_id"] for row in rows}
+
+    async def aset_file_status(
+        self,
+        file_id: str,
+        user_id: str,
+        file_sha256: Optional[str],
+        complete: bool,
+        executor=None,
+    ) -> None:
+        """Record whether the ingestion of file_id has completed.
+
+        A file is marked incomplete before its chunks are written and
+        complete once all of them are stored; only complete files are
+        cloned by whole-file dedup.
+        """
+        if self.asyncpg_pool is None:
+            return
+        collection_uuid = await self._aget_collection_uuid(executor)
+        async with self.asyncpg_pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO langchain_pg_file_status
+                    (collection_id, file_id, user_id, file_sha256, complete)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (collection_id, file_id) DO UPDATE
+                SET user_id = EXCLUDED.user_id,
+                    file_sha256 = EXCLUDED.file_sha256,
+                    complete = EXCLUDED.complete,
+                    updated_at = now()
+                """,
+                collection_uuid,
+                file_id,
+                user_id,
+                file_sha256,
+                complete,
+            )
+
+    async def aget_file_chunks(
+        self, file_id: str, executor=None
+    ) -> List[Tuple[str, dict]]:
+        """Async version of get_file_chunks"""
+        if self.asyncpg_pool is not None:
+            collection_uuid = await self._aget_collection_uuid(executor)
+            async with self.asyncpg_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT uuid, cmetadata FROM langchain_pg_embedding
+                    WHERE collection_id = $1 AND custom_id = $2
+                    """,
+                    collection_uuid,
+                    file_id,
+                )
+            return [(str(row["uuid"]), _row_metadata(row)) for row in rows]
+        executor = executor or self._get_thread_pool()
+        return await self._run_in_executor(executor, super().get_file_chunks, file_id)
+
+    async def areplace_file_chunks(
+        self,
+        file_id: str,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        delete_uuids: List[str],
+        metadata_updates: List[Tuple[str, dict]],
+        file_metadata: Optional[dict] = None,
+        executor=None,
+    ) -> None:
+        """Async version of replace_file_chunks.
+
+        On the native pool, the new rows are sent with a binary COPY inside
+        the same transaction as the deletes and metadata updates.
+        """
+        if self.asyncpg_pool is None:
+            executor = executor or self._get_thread_pool()
+            await self._run_in_executor(
+                executor,
+                super().replace_file_chunks,
+                file_id,
+                documents,
+                embeddings,
+                delete_uuids,
+                metadata_updates,
+                file_metadata,
+            )
+            return
+
+        collection_uuid = await self._aget_collection_uuid(executor)
+        records = [
+            (
+                uuid.uuid4(),
+                collection_uuid,
+                embedding,
+                doc.page_content,
+                json.dumps(doc.metadata),
+                file_id,
+            )
+            for doc, embedding in zip(documents, embeddings)
+        ]
+        async with self.asyncpg_pool.acquire() as conn:
+            async with conn.transaction():
+                if delete_uuids:
+                    await conn.execute(
+                        """
+                        DELETE FROM langchain_pg_embedding
+                        WHERE uuid = ANY($1::uuid[])
+                        """,
+                        [uuid.UUID(u) for u in delete_uuids],
+                    )
+                if file_metadata:
+                    await conn.execute(
+                        """
+                        UPDATE langchain_pg_embedding
+                        SET cmetadata = cmetadata || $3::jsonb
+                        WHERE collection_id = $1
+                          AND custom_id = $2
+                          AND NOT cmetadata @> $3::jsonb
+                        """,
+                        collection_uuid,
+                        file_id,
+                        json.dumps(file_metadata),
+                    )
+                if metadata_updates:
+                    await conn.execute(
+                        """
+                        UPDATE langchain_pg_embedding e
+                        SET cmetadata = u.cmetadata
+                        FROM unnest($1::uuid[], $2::jsonb[]) AS u(uuid, cmetadata)
+                        WHERE e.uuid = u.uuid
+                        """,
+                        [uuid.UUID(u) for u, _ in metadata_updates],
+                        [json.dumps(metadata) for _, metadata in metadata_updates],
+                    )
+                if records:
+                    await conn.copy_records_to_table(
+                        "langchain_pg_embedding",
+                        records=records,
+                        columns=[
+                            "uuid",
+                            "collection_id",
+                            "embedding",
+                            "document",
+                            "cmetadata",
+                            "custom_id",
+                        ],
+                    )
+
     async def aget_exact_matches_by_text(
         self,
         query: str,
@@ -107,6 +732,10 @@ class AsyncPgVector(ExtendedPgVector):
         executor=None,
     ) -> List[Tuple[Document, float]]:
         """Async version of get_exact_matches_by_text"""
+        if self.asyncpg_pool is not None:
+            return await self._afetch_exact_matches(
+                query, [file_id] if file_id else None, limit, executor
+            )
         executor = executor or self._get_thread_pool()
         return await self._run_in_executor(
             executor, super().get_exact_matches_by_text, query, file_id, limit
@@ -120,7 +749,39 @@ class AsyncPgVector(ExtendedPgVector):
         executor=None,
     ) -> List[Tuple[Document, float]]:
         """Async version of _get_exact_matches_multiple"""
+        if self.asyncpg_pool is not None:
+            return await self._afetch_exact_matches(
+                query, file_ids or None, limit, executor
+            )
         executor = executor or self._get_thread_pool()
         return await self._run_in_executor(
             executor, super()._get_exact_matches_multiple, query, file_ids, limit
         )
+
+    async def _afetch_exact_matches(
+        self,
+        query: str,
+        file_ids: Optional[List[str]],
+        limit: int,
+        executor=None,
+    ) -> List[Tuple[Document, float]]:
+        """Run the exact text match search on the asyncpg pool."""
+        patterns = self._exact_search_patterns(query)
+        args: List[Any] = [await self._aget_collection_uuid(executor), *patterns]
+        conditions = ["collection_id = $1"] + [
+            f"document ILIKE ${i}" for i in range(2, len(args) + 1)
+        ]
+        if file_ids:
+            args.append(list(file_ids))
+            conditions.append(f"{self._file_id_sql} = ANY(${len(args)}::text[])")
+        args.append(limit)
+        async with self.asyncpg_pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT document, cmetadata FROM langchain_pg_embedding
+                WHERE {" AND ".join(conditions)}
+                LIMIT ${len(args)}
+                """,
+                *args,
+            )
+        return [(_row_to_document(row), 0.0) for row in rows]
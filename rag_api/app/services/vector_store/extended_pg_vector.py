@@ -2,17 +2,43 @@ import os
 import time
 import logging
 import sqlalchemy
-from typing import Optional, Any, Dict, List, Union
+from typing import Optional, Any, Dict, List, Tuple, Union
 from sqlalchemy import event
-from sqlalchemy import delete
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 from sqlalchemy.engine import Engine
 from langchain_core.documents import Document
 from langchain_community.vectorstores.pgvector import PGVector
+from pgvector.sqlalchemy import Vector
+
+# PGVector.distance_strategy comparator names per DistanceStrategy value
+_DISTANCE_COMPARATORS = {
+    "l2": "l2_distance",
+    "cosine": "cosine_distance",
+    "inner": "max_inner_product",
+}
 
 
 class ExtendedPgVector(PGVector):
     _query_logging_setup = False
+    _collection_uuid = None
+    # Managed ANN index attached at startup (see ensure_vector_ann_index):
+    # its type and indexed dimension, or None for exact distance scans.
+    ann_index_type: Optional[str] = None
+    ann_index_dimensions: Optional[int] = None
+    # Search breadth applied per query with SET LOCAL
+    hnsw_ef_search = 40
+    ivfflat_probes = 10
+    # How file-filtered queries are planned: "prefilter" orders the file's
+    # rows by exact distance, "ann" uses the global index with iterative scans,
+    # "auto" uses the HNSW index when pgvector supports iterative scans.
+    filtered_search_mode = "auto"
+    # Set at startup when the installed pgvector (0.8+) has iterative scans
+    iterative_scan_supported = False
+    # Set at startup once the typed file_id/user_id columns are backfilled
+    # (see ensure_vector_indexes); until then file_id is read from cmetadata.
+    id_columns_ready = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -119,6 +145,59 @@ class ExtendedPgVector(PGVector):
 
         ExtendedPgVector._query_logging_setup = True
 
+    def get_collection_uuid(self):
+        """Return the uuid of this store's collection (cached after first lookup)."""
+        if self._collection_uuid is None:
+            with Session(self._bind) as session:
+                collection = self.get_collection(session)
+                if not collection:
+                    raise ValueError("Collection not found")
+                self._collection_uuid = collection.uuid
+        return self._collection_uuid
+
+    def _file_id_column(self):
+        """SQL expression for a chunk's file_id, for filtering."""
+        if self.id_columns_ready:
+            return sqlalchemy.literal_column(
+                f"{self.EmbeddingStore.__tablename__}.file_id", sqlalchemy.String
+            )
+        return self.EmbeddingStore.cmetadata.op('->>')('file_id')
+
+    def _uses_ann_index(
+        self, embedding: List[float], filter: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Whether a query can be served by the managed ANN index.
+
+        File-filtered queries skip the global index in "prefilter" mode: without
+        the index expression, the planner narrows to the file's rows through
+        the file_id index and orders only those by exact distance, so a
+        selective filter always yields k results instead of post-filtering
+        an approximate candidate list. In "auto" mode they use the index only
+        when it is HNSW and iterative scans keep filling the k results.
+        """
+        if (
+            self.ann_index_type is None
+            or len(embedding) != self.ann_index_dimensions
+        ):
+            return False
+        if not (filter and "file_id" in filter):
+            return True
+        if self.filtered_search_mode == "auto":
+            return self.ann_index_type == "hnsw" and self.iterative_scan_supported
+        return self.filtered_search_mode == "ann"
+
+    def _ann_search_settings(
+        self, filter: Optional[Dict[str, Any]] = None
+    ) -> List[str]:
+        """SET LOCAL statements tuning the ANN index scan for one query."""
+        if self.ann_index_type == "hnsw":
+            settings = [f"SET LOCAL hnsw.ef_search = {int(self.hnsw_ef_search)}"]
+            if filter and self.iterative_scan_supported:
+                # Keep scanning the graph until enough rows pass the filter
+                settings.append("SET LOCAL hnsw.iterative_scan = strict_order")
+            return settings
+        return [f"SET LOCAL ivfflat.probes = {int(self.ivfflat_probes)}"]
+
     def get_all_ids(self) -> list[str]:
         with Session(self._bind) as session:
             results = session.query(self.EmbeddingStore.custom_id).all()
@@ -145,6 +224,74 @@ class ExtendedPgVector(PGVector):
                 if result.custom_id in ids
             ]
 
+    def get_file_chunks(self, file_id: str) -> List[Tuple[str, dict]]:
+        """Return (uuid, metadata) of every chunk stored for file_id."""
+        collection_uuid = self.get_collection_uuid()
+        with Session(self._bind) as session:
+            results = session.query(
+                self.EmbeddingStore.uuid, self.EmbeddingStore.cmetadata
+            ).filter(
+                self.EmbeddingStore.collection_id == collection_uuid,
+                self.EmbeddingStore.custom_id == file_id,
+            )
+            return [(str(uuid), cmetadata or {}) for uuid, cmetadata in results]
+
+    def replace_file_chunks(
+        self,
+        file_id: str,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        delete_uuids: List[str],
+        metadata_updates: List[Tuple[str, dict]],
+        file_metadata: Optional[dict] = None,
+    ) -> None:
+        """Apply a file diff atomically: insert the new chunks, delete the
+        vanished ones and refresh the metadata of the kept ones.
+
+        `file_metadata` (keys shared by every chunk of the new version) is
+        merged into all the file's rows with a single statement.
+        """
+        collection_uuid = self.get_collection_uuid()
+        with Session(self._bind) as session:
+            if delete_uuids:
+                session.execute(
+                    delete(self.EmbeddingStore).where(
+                        self.EmbeddingStore.uuid.in_(delete_uuids)
+                    )
+                )
+            if file_metadata:
+                file_metadata_value = sqlalchemy.literal(file_metadata, JSONB)
+                session.execute(
+                    update(self.EmbeddingStore)
+                    .where(
+                        self.EmbeddingStore.collection_id == collection_uuid,
+                        self.EmbeddingStore.custom_id == file_id,
+                        ~self.EmbeddingStore.cmetadata.contains(file_metadata),
+                    )
+                    .values(
+                        cmetadata=self.EmbeddingStore.cmetadata.op("||")(
+                            file_metadata_value
+                        )
+                    )
+                )
+            for uuid, metadata in metadata_updates:
+                session.execute(
+                    update(self.EmbeddingStore)
+                    .where(self.EmbeddingStore.uuid == uuid)
+                    .values(cmetadata=metadata)
+                )
+            session.add_all(
+                self.EmbeddingStore(
+                    embedding=embedding,
+                    document=doc.page_content,
+                    cmetadata=doc.metadata,
+                    custom_id=file_id,
+                    collection_id=collection_uuid,
+                )
+                for doc, embedding in zip(documents, embeddings)
+            )
+            session.commit()
+
     def _delete_multiple(
         self, ids: Optional[list[str]] = None, collection_only: bool = False
     ) -> None:
@@ -167,10 +314,10 @@ class ExtendedPgVector(PGVector):
                 session.execute(stmt)
             session.commit()
 
-    def _build_exact_search_filter(self, query: str):
-        """Helper to build smart ILIKE filters depending on query structure."""
+    @staticmethod
+    def _exact_search_patterns(query: str) -> List[str]:
+        """ILIKE patterns (combined with AND) for an exact text match search."""
         import re
-        from sqlalchemy import and_
 
         # Extract specific article numbers like "2.2.4.6.28"
         article_numbers = re.findall(r'\d+(?:\.\d+)+', query)
@@ -178,24 +325,30 @@ class ExtendedPgVector(PGVector):
         # Extract standalone years or document numbers over 3 digits (1072, 0312, 2015)
         standalone_numbers = re.findall(r'\b\d{3,4}\b', query)
 
-        conditions = []
         if article_numbers:
-            for num in article_numbers:
-                conditions.append(self.EmbeddingStore.document.ilike(f"%{num}%"))
             # Optionally add standalone numbers to make it more specific
-            for num in standalone_numbers:
-                conditions.append(self.EmbeddingStore.document.ilike(f"%{num}%"))
-            return and_(*conditions) if len(conditions) > 1 else conditions[0]
-        else:
-            # Fallback to the whole query string
-            safe_query = query.replace("%", "\\%").replace("_", "\\_")
-            return self.EmbeddingStore.document.ilike(f"%{safe_query}%")
+            return [f"%{num}%" for num in article_numbers + standalone_numbers]
+        # Fallback to the whole query string
+        safe_query = query.replace("%", "\\%").replace("_", "\\_")
+        return [f"%{safe_query}%"]
+
+    def _build_exact_search_filter(self, query: str):
+        """Helper to build smart ILIKE filters depending on query structure."""
+        from sqlalchemy import and_
+
+        conditions = [
+            self.EmbeddingStore.document.ilike(pattern)
+            for pattern in self._exact_search_patterns(query)
+        ]
+        return and_(*conditions) if len(conditions) > 1 else conditions[0]
 
     def get_exact_matches_by_text(
         self, query: str, file_id: Optional[str] = None, limit: int = 5
     ) -> List[tuple[Document, float]]:
         """
         Perform an exact text match search using SQL ILIKE.
+        The ILIKE conditions are served by the pg_trgm index on document
+        (see ensure_vector_indexes) when it exists.
         Returns a list of (Document, score) tuples for compatibility with vector search,
         where score is set to 0.0 (exact match).
         """
@@ -205,9 +358,8 @@ class ExtendedPgVector(PGVector):
             stmt = session.query(self.EmbeddingStore).filter(filter_condition)
             
             if file_id:
-                # Need to use the JSONB metadata field for file_id filtering
                 stmt = stmt.filter(
-                    self.EmbeddingStore.cmetadata.op('->>')('file_id') == file_id
+                    self._file_id_column() == file_id
                 )
                 
             results = stmt.limit(limit).all()
@@ -230,7 +382,7 @@ class ExtendedPgVector(PGVector):
             
             if file_ids:
                 stmt = stmt.filter(
-                    self.EmbeddingStore.cmetadata.op('->>')('file_id').in_(file_ids)
+                    self._file_id_column().in_(file_ids)
                 )
                 
             results = stmt.limit(limit).all()
@@ -263,17 +415,17 @@ class ExtendedPgVector(PGVector):
                         # Handle {"$eq": "val"}
                         if "$eq" in file_id_val:
                             filter_by.append(
-                                self.EmbeddingStore.cmetadata.op('->>')('file_id') == file_id_val["$eq"]
+                                self._file_id_column() == file_id_val["$eq"]
                             )
                         # Handle {"$in": ["val1", "val2"]}
                         elif "$in" in file_id_val:
                             filter_by.append(
-                                self.EmbeddingStore.cmetadata.op('->>')('file_id').in_(file_id_val["$in"])
+                                self._file_id_column().in_(file_id_val["$in"])
                             )
                     else:
                         # Handle plain value
                         filter_by.append(
-                            self.EmbeddingStore.cmetadata.op('->>')('file_id') == str(file_id_val)
+                            self._file_id_column() == str(file_id_val)
                         )
                 else:
                     # Fallback to langchain's default filter translation for other fields
@@ -285,10 +437,27 @@ class ExtendedPgVector(PGVector):
                         filter_clauses = self._create_filter_clause_json_deprecated(filter)
                         filter_by.extend(filter_clauses)
 
+            distance = self.distance_strategy(embedding)
+            if self._uses_ann_index(embedding, filter):
+                # Match the partial expression index built by ensure_vector_ann_index
+                dimensions = self.ann_index_dimensions
+                column = sqlalchemy.cast(
+                    self.EmbeddingStore.embedding, Vector(dimensions)
+                )
+                distance = getattr(
+                    column, _DISTANCE_COMPARATORS[self._distance_strategy]
+                )(embedding)
+                filter_by.append(
+                    sqlalchemy.func.vector_dims(self.EmbeddingStore.embedding)
+                    == sqlalchemy.literal_column(str(int(dimensions)))
+                )
+                for setting in self._ann_search_settings(filter):
+                    session.execute(sqlalchemy.text(setting))
+
             results: List[Any] = (
                 session.query(
                     self.EmbeddingStore,
-                    self.distance_strategy(embedding).label("distance"),
+                    distance.label("distance"),
                 )
                 .filter(*filter_by)
                 .order_by(sqlalchemy.asc("distance"))
@@ -1,16 +1,35 @@
 # app/utils/document_loader.py
 
 import os
+import time
 import codecs
+import hashlib
 import tempfile
+import multiprocessing
 import threading
 
-from typing import Iterator, List, Optional
+from collections import OrderedDict, deque
+from contextlib import nullcontext
+from datetime import datetime
+from itertools import islice
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 import chardet
 
 from langchain_core.documents import Document
 
-from app.config import known_source_ext, PDF_EXTRACT_IMAGES, CHUNK_OVERLAP, logger
+from app.config import (
+    known_source_ext,
+    PDF_EXTRACT_IMAGES,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PARALLEL_PAGES_PER_TASK,
+    PDF_PARALLEL_RANGES_IN_FLIGHT,
+    LOADER_STRATEGY_TIMEOUT,
+    LOADER_VERDICT_CACHE_SIZE,
+    RAG_PROCESS_POOL_SIZE,
+    CHUNK_OVERLAP,
+    logger,
+)
 from langchain_community.document_loaders import (
     TextLoader,
     PyMuPDFLoader,
@@ -32,7 +51,14 @@ def detect_file_encoding(filepath: str) -> str:
     """
     with open(filepath, "rb") as f:
         raw = f.read(4096)  # Read a larger sample for better detection
+    return detect_encoding(raw)
+
 
+def detect_encoding(raw: bytes) -> str:
+    """
+    Detect the encoding of a content sample using BOM markers and chardet.
+    Returns the detected encoding or 'utf-8' as default.
+    """
     # Check for BOM markers first
     if raw.startswith(codecs.BOM_UTF16_LE):
         return "utf-16-le"
@@ -69,16 +95,93 @@ def cleanup_temp_encoding_file(loader) -> None:
             logger.warning(f"Failed to remove temporary UTF-8 file: {e}")
 
 
-def get_loader(filename: str, file_content_type: str, filepath: str):
-    """Get the appropriate document loader based on file type and/or content type."""
+def detect_file_type(filename: str, file_content_type: str) -> Tuple[str, bool, str]:
+    """Classify a file by extension and/or content type.
+
+    Returns (file_type, known_type, file_ext); file_type selects the loader.
+    """
     file_ext = filename.split(".")[-1].lower()
-    known_type = True
 
     # File Content Type reference:
     # ref.: https://developer.mozilla.org/en-US/docs/Web/HTTP/Guides/MIME_types/Common_types
     if file_ext == "pdf" or file_content_type == "application/pdf":
-        loader = SafePyPDFLoader(filepath, extract_images=PDF_EXTRACT_IMAGES)
+        return "pdf", True, file_ext
     elif file_ext == "csv" or file_content_type == "text/csv":
+        return "csv", True, file_ext
+    elif file_ext == "rst":
+        return "rst", True, file_ext
+    elif file_ext == "xml" or file_content_type in [
+        "application/xml",
+        "text/xml",
+        "application/xhtml+xml",
+    ]:
+        return "xml", True, file_ext
+    elif file_ext in ["ppt", "pptx"] or file_content_type in [
+        "application/vnd.ms-powerpoint",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ]:
+        return "ppt", True, file_ext
+    elif file_ext == "md" or file_content_type in [
+        "text/markdown",
+        "text/x-markdown",
+        "application/markdown",
+        "application/x-markdown",
+    ]:
+        return "md", True, file_ext
+    elif file_ext == "epub" or file_content_type == "application/epub+zip":
+        return "epub", True, file_ext
+    elif file_ext in ["doc", "docx"] or file_content_type in [
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ]:
+        return "word", True, file_ext
+    elif file_ext in ["xls", "xlsx"] or file_content_type in [
+        "application/vnd.ms-excel",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ]:
+        return "excel", True, file_ext
+    elif file_ext == "json" or file_content_type == "application/json":
+        return "json", True, file_ext
+    elif file_ext in known_source_ext or (
+        file_content_type and file_content_type.find("text/") >= 0
+    ):
+        return "text", True, file_ext
+    else:
+        return "text", False, file_ext
+
+
+# File types whose loader can parse an in-memory buffer; every other type
+# needs a named file on disk.
+BUFFER_FILE_TYPES = ("json", "text")
+
+
+def supports_buffer(filename: str, file_content_type: str) -> bool:
+    """Whether get_loader() can parse this file from a buffer instead of a path."""
+    return detect_file_type(filename, file_content_type)[0] in BUFFER_FILE_TYPES
+
+
+def get_loader(
+    filename: str,
+    file_content_type: str,
+    filepath: str,
+    file_sha256: Optional[str] = None,
+    buffer=None,
+):
+    """Get the appropriate document loader based on file type and/or content type.
+
+    A known `file_sha256` spares fallback-chain loaders from re-hashing the
+    file for their verdict lookup. With a `buffer` (bytes, memoryview or
+    mmap) holding the file's content, types in BUFFER_FILE_TYPES are parsed
+    from it and `filepath` is only used as the documents' source; other
+    types require `filepath` to exist.
+    """
+    file_type, known_type, file_ext = detect_file_type(filename, file_content_type)
+
+    if buffer is not None and file_type in BUFFER_FILE_TYPES:
+        loader = BufferTextLoader(buffer, filepath)
+    elif file_type == "pdf":
+        loader = SafePyPDFLoader(filepath, extract_images=PDF_EXTRACT_IMAGES)
+    elif file_type == "csv":
         # Detect encoding for CSV files
         encoding = detect_file_encoding(filepath)
 
@@ -109,47 +212,25 @@ def get_loader(filename: str, file_content_type: str, filepath: str):
                 raise e
         else:
             loader = CSVLoader(filepath)
-    elif file_ext == "rst":
+    elif file_type == "rst":
         loader = UnstructuredRSTLoader(filepath, mode="elements")
-    elif file_ext == "xml" or file_content_type in [
-        "application/xml",
-        "text/xml",
-        "application/xhtml+xml",
-    ]:
+    elif file_type == "xml":
         loader = UnstructuredXMLLoader(filepath)
-    elif file_ext in ["ppt", "pptx"] or file_content_type in [
-        "application/vnd.ms-powerpoint",
-        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
-    ]:
+    elif file_type == "ppt":
         loader = UnstructuredPowerPointLoader(filepath)
-    elif file_ext == "md" or file_content_type in [
-        "text/markdown",
-        "text/x-markdown",
-        "application/markdown",
-        "application/x-markdown",
-    ]:
+    elif file_type == "md":
         loader = UnstructuredMarkdownLoader(filepath)
-    elif file_ext == "epub" or file_content_type == "application/epub+zip":
+    elif file_type == "epub":
         loader = UnstructuredEPubLoader(filepath)
-    elif file_ext in ["doc", "docx"] or file_content_type in [
-        "application/msword",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-    ]:
+    elif file_type == "word":
         loader = SafeWordLoader(filepath)
-    elif file_ext in ["xls", "xlsx"] or file_content_type in [
-        "application/vnd.ms-excel",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    ]:
+    elif file_type == "excel":
         loader = PandasExcelLoader(filepath)
-    elif file_ext == "json" or file_content_type == "application/json":
-        loader = TextLoader(filepath, autodetect_encoding=True)
-    elif file_ext in known_source_ext or (
-        file_content_type and file_content_type.find("text/") >= 0
-    ):
-        loader = TextLoader(filepath, autodetect_encoding=True)
     else:
         loader = TextLoader(filepath, autodetect_encoding=True)
-        known_type = False
+
+    if file_sha256 and isinstance(loader, FallbackChainLoader):
+        loader._signature = file_sha256
 
     return loader, known_type, file_ext
 
@@ -216,120 +297,374 @@ def process_documents(documents: List[Document]) -> str:
     return processed_text.strip()
 
 
+# PyMuPDF is not thread-safe: PDF extraction in this process's threads is
+# serialized. Process pool workers parse one file at a time and skip it.
 pdf_extraction_lock = threading.Lock()
 
+# Processes parsing files are started from a fork server (spawned where it is
+# unavailable), never forked from this threaded process. The server imports
+# this module once, so children start without re-importing it.
+if "forkserver" in multiprocessing.get_all_start_methods():
+    loader_mp_context = multiprocessing.get_context("forkserver")
+    loader_mp_context.set_forkserver_preload([__name__])
+else:
+    loader_mp_context = multiprocessing.get_context("spawn")
+
+# Child processes running loader strategies with a deadline
+strategy_slots = threading.BoundedSemaphore(max(1, RAG_PROCESS_POOL_SIZE))
 
-class SafePyPDFLoader:
+
+def file_content_hash(filepath: str) -> str:
+    """Content hash of a file, read in chunks."""
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class LoaderVerdictCache:
     """
-    A wrapper around PyPDFLoader that handles image extraction failures gracefully.
-    Falls back to text-only extraction when image extraction fails.
-    Also falls back to PyPDFLoader or UnstructuredPDFLoader if PyMuPDFLoader fails.
+    Remembers which loader strategy succeeded for a file's content hash.
+
+    The same broken template is often uploaded many times; starting with the
+    strategy that worked last time skips the failing ones entirely.
     """
 
-    def __init__(self, filepath: str, extract_images: bool = False):
+    def __init__(self, max_size: int):
+        self.max_size = max(0, max_size)
+        self._verdicts: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, signature: Optional[str]) -> Optional[str]:
+        if not signature:
+            return None
+        with self._lock:
+            strategy = self._verdicts.get(signature)
+            if strategy is not None:
+                self._verdicts.move_to_end(signature)
+            return strategy
+
+    def record(self, signature: Optional[str], strategy: Optional[str]) -> None:
+        if not signature or not strategy or not self.max_size:
+            return
+        with self._lock:
+            self._verdicts[signature] = strategy
+            self._verdicts.move_to_end(signature)
+            while len(self._verdicts) > self.max_size:
+                self._verdicts.popitem(last=False)
+
+
+loader_verdicts = LoaderVerdictCache(LOADER_VERDICT_CACHE_SIZE)
+
+
+class FallbackChainLoader:
+    """
+    Base for loaders that try several extraction strategies in order.
+
+    Subclasses return (name, load) pairs from `_strategies`. The strategy that
+    last succeeded for the same content hash is tried first. In a thread,
+    strategies run to completion one after another; outside of it,
+    LOADER_STRATEGY_TIMEOUT bounds how long each one may run (see
+    _load_chain_in_process).
+    """
+
+    # Held while a strategy extracts in a thread of this process, for parsers
+    # that are not thread-safe; cleared on the instance in pool workers.
+    extraction_lock: Optional[threading.Lock] = None
+
+    def __init__(self, filepath: str):
         self.filepath = filepath
-        self.extract_images = extract_images
         self._temp_filepath = None  # For compatibility with cleanup function
+        self._signature: Optional[str] = None
+        self.strategy_used: Optional[str] = None
 
-    def lazy_load(self) -> Iterator[Document]:
-        with pdf_extraction_lock:
-            # 1. Try PyMuPDFLoader first (fastest and handles formatting well)
-            try:
-                from langchain_community.document_loaders import PyMuPDFLoader
-                loader = PyMuPDFLoader(self.filepath)
-                pages = list(loader.lazy_load())
-                if pages:
-                    yield from pages
-                    return
-            except Exception as e:
-                logger.warning(
-                    f"PyMuPDFLoader failed for {self.filepath}: {e}. Trying PyPDFLoader fallback."
-                )
+    def _strategies(self) -> List[Tuple[str, Callable[[], Iterable[Document]]]]:
+        raise NotImplementedError
 
-            # 2. Try PyPDFLoader (pure Python, highly reliable)
+    def _on_exhausted(self, error: Optional[Exception]) -> None:
+        """Called when no strategy produced documents."""
+        if error is not None:
+            raise error
+
+    def signature(self) -> Optional[str]:
+        """Content hash of the file (computed once), or None if unreadable."""
+        if self._signature is None:
             try:
-                from langchain_community.document_loaders import PyPDFLoader
-                loader = PyPDFLoader(self.filepath)
-                pages = list(loader.lazy_load())
-                if pages:
-                    yield from pages
+                self._signature = file_content_hash(self.filepath)
+            except OSError:
+                return None
+        return self._signature
+
+    def preferred_strategy(self) -> Optional[str]:
+        return loader_verdicts.get(self.signature())
+
+    def strategy_names(self) -> List[str]:
+        """Strategy names in the order they are tried."""
+        names = [name for name, _ in self._strategies()]
+        preferred = self.preferred_strategy()
+        names.sort(key=lambda name: name != preferred)
+        return names
+
+    def iter_strategy(self, name: str) -> Iterator[Document]:
+        """Stream the pages extracted by one strategy.
+
+        The extraction lock, if any, is held while the strategy produces each
+        page, not while the consumer processes it, so other files can be
+        extracted between pages.
+        """
+        for strategy_name, load in self._strategies():
+            if strategy_name == name:
+                break
+        else:
+            raise ValueError(f"Unknown loader strategy: {name}")
+        lock = self.extraction_lock or nullcontext()
+        with lock:
+            pages = iter(load())
+        try:
+            while True:
+                with lock:
+                    page = next(pages, None)
+                if page is None:
                     return
-            except Exception as e:
-                logger.warning(
-                    f"PyPDFLoader failed for {self.filepath}: {e}. Trying Unstructured fallback."
-                )
+                yield page
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                with lock:
+                    close()
+
+    def load_strategy(self, name: str) -> List[Document]:
+        """Extract all pages with one strategy."""
+        return list(self.iter_strategy(name))
 
-            # 3. Try UnstructuredPDFLoader
+    def lazy_load(self) -> Iterator[Document]:
+        """Stream pages from the first strategy that produces one.
+
+        A strategy is only replaced by the next one if it fails before its
+        first page; once pages were yielded, a failure is raised, since
+        falling back would yield those pages twice.
+        """
+        names = self.strategy_names()
+        error = None
+        for position, name in enumerate(names):
+            is_last = position == len(names) - 1
+            pages = self.iter_strategy(name)
             try:
-                from langchain_community.document_loaders import UnstructuredPDFLoader
-                loader = UnstructuredPDFLoader(self.filepath)
-                pages = list(loader.lazy_load())
-                if pages:
-                    yield from pages
-                    return
+                first = next(pages, None)
             except Exception as e:
-                logger.error(f"All PDF loading strategies failed for {self.filepath}: {e}")
-                raise
+                error = e
+                if is_last:
+                    logger.error(
+                        f"All loading strategies failed for {self.filepath}: {e}"
+                    )
+                else:
+                    logger.warning(
+                        f"{name} failed for {self.filepath}: {e}. Trying fallback."
+                    )
+                continue
+            if first is None:
+                continue
+            self.strategy_used = name
+            yield first
+            yield from pages
+            loader_verdicts.record(self.signature(), name)
+            return
+        self._on_exhausted(error)
 
     def load(self) -> List[Document]:
         return list(self.lazy_load())
 
 
-class SafeWordLoader:
+class SafePyPDFLoader(FallbackChainLoader):
+    """
+    A wrapper around PyPDFLoader that handles image extraction failures gracefully.
+    Falls back to text-only extraction when image extraction fails.
+    Also falls back to PyPDFLoader or UnstructuredPDFLoader if PyMuPDFLoader fails.
+    """
+
+    extraction_lock = pdf_extraction_lock
+
+    def __init__(self, filepath: str, extract_images: bool = False):
+        super().__init__(filepath)
+        self.extract_images = extract_images
+
+    def _strategies(self) -> List[Tuple[str, Callable[[], Iterable[Document]]]]:
+        def pymupdf():
+            # Fastest and handles formatting well
+            from langchain_community.document_loaders import PyMuPDFLoader
+
+            return PyMuPDFLoader(self.filepath).lazy_load()
+
+        def pypdf():
+            # Pure Python, highly reliable
+            from langchain_community.document_loaders import PyPDFLoader
+
+            return PyPDFLoader(self.filepath).lazy_load()
+
+        def unstructured():
+            from langchain_community.document_loaders import UnstructuredPDFLoader
+
+            return UnstructuredPDFLoader(self.filepath).lazy_load()
+
+        return [
+            ("PyMuPDFLoader", pymupdf),
+            ("PyPDFLoader", pypdf),
+            ("UnstructuredPDFLoader", unstructured),
+        ]
+
+    def parallel_page_ranges(self) -> List[Tuple[int, int]]:
+        """
+        Split the PDF into [start, stop) page ranges for page-parallel extraction.
+
+        Returns an empty list when the PDF is below PDF_PARALLEL_MIN_PAGES, is
+        encrypted, cannot be opened by PyMuPDF or previously needed a fallback
+        strategy, in which case it is parsed sequentially.
+        """
+        if PDF_PARALLEL_MIN_PAGES <= 0:
+            return []
+        if self.preferred_strategy() not in (None, "PyMuPDFLoader"):
+            # PyMuPDF is known to fail on this content
+            return []
+        try:
+            import pymupdf
+
+            # Runs in the caller's thread, where PyMuPDF must be serialized
+            with pdf_extraction_lock, pymupdf.open(self.filepath) as doc:
+                if doc.is_encrypted:
+                    return []
+                page_count = doc.page_count
+        except Exception:
+            return []
+        if page_count < PDF_PARALLEL_MIN_PAGES:
+            return []
+        step = max(1, PDF_PARALLEL_PAGES_PER_TASK)
+        return [
+            (start, min(start + step, page_count))
+            for start in range(0, page_count, step)
+        ]
+
+
+def _pdf_metadata(doc, filepath: str) -> dict:
+    """Document-level metadata of a PDF in the shape PyMuPDFLoader gives it:
+    lower-cased PDF info keys, PDF dates as ISO strings (the raw
+    `creationDate`/`modDate` are kept too), plus source and page count."""
+    metadata = {
+        "producer": "PyMuPDF",
+        "creator": "PyMuPDF",
+        "creationdate": "",
+        "source": filepath,
+        "file_path": filepath,
+        "total_pages": doc.page_count,
+    }
+    for key, value in doc.metadata.items():
+        if not isinstance(value, (str, int)):
+            continue
+        name = key.lower()
+        if name in ("creationdate", "moddate"):
+            try:
+                value = datetime.strptime(
+                    value.replace("'", ""), "D:%Y%m%d%H%M%S%z"
+                ).isoformat("T")
+            except ValueError:
+                pass
+        elif isinstance(value, str):
+            value = value.strip()
+        metadata[name] = value
+    for key in ("modDate", "creationDate"):
+        if key in doc.metadata:
+            metadata[key] = doc.metadata[key]
+    return metadata
+
+
+def extract_pdf_pages(filepath: str, start: int, stop: int) -> List[Document]:
+    """
+    Extract pages [start, stop) of a PDF exactly as PyMuPDFLoader would.
+
+    Process pool entry point for page-parallel extraction: page text and
+    metadata (including the 0-based `page` and `total_pages`) match the
+    sequential loader, so ranges can be concatenated in order.
+    """
+    import pymupdf
+
+    with pymupdf.open(filepath) as doc:
+        doc_metadata = _pdf_metadata(doc, filepath)
+        return [
+            Document(
+                page_content=doc[number].get_text().strip(),
+                metadata=doc_metadata | {"page": number},
+            )
+            for number in range(start, min(stop, doc.page_count))
+        ]
+
+
+class SafeWordLoader(FallbackChainLoader):
     """
     A robust Word document loader that uses Docx2txtLoader for .docx,
     and falls back to UnstructuredWordDocumentLoader or other text extraction strategies.
     Handles legacy .doc files via UnstructuredWordDocumentLoader.
     """
 
-    def __init__(self, filepath: str):
-        self.filepath = filepath
-        self._temp_filepath = None  # For compatibility with cleanup function
+    def _strategies(self) -> List[Tuple[str, Callable[[], Iterable[Document]]]]:
+        def docx2txt():
+            from langchain_community.document_loaders import Docx2txtLoader
 
-    def lazy_load(self) -> Iterator[Document]:
-        file_ext = self.filepath.split(".")[-1].lower()
+            return Docx2txtLoader(self.filepath).lazy_load()
 
-        # 1. For .docx, try Docx2txtLoader first
-        if file_ext == "docx":
-            try:
-                from langchain_community.document_loaders import Docx2txtLoader
-                loader = Docx2txtLoader(self.filepath)
-                pages = list(loader.lazy_load())
-                if pages:
-                    yield from pages
-                    return
-            except Exception as e:
-                logger.warning(
-                    f"Docx2txtLoader failed for {self.filepath}: {e}. Trying fallback."
-                )
-
-        # 2. Try UnstructuredWordDocumentLoader (supports both doc and docx)
-        try:
-            from langchain_community.document_loaders import UnstructuredWordDocumentLoader
-            loader = UnstructuredWordDocumentLoader(self.filepath)
-            pages = list(loader.lazy_load())
-            if pages:
-                yield from pages
-                return
-        except Exception as e:
-            logger.warning(
-                f"UnstructuredWordDocumentLoader failed for {self.filepath}: {e}. Trying raw text conversion."
+        def unstructured():
+            # Supports both doc and docx
+            from langchain_community.document_loaders import (
+                UnstructuredWordDocumentLoader,
             )
 
-        # 3. Fallback to pypandoc (since pandoc is installed in the container)
-        try:
+            return UnstructuredWordDocumentLoader(self.filepath).lazy_load()
+
+        def pandoc():
+            # pandoc is installed in the container
             import pypandoc
+
             text = pypandoc.convert_file(self.filepath, "plain")
-            if text:
-                yield Document(page_content=text, metadata={"source": self.filepath})
-                return
-        except Exception as e:
-            logger.warning(
-                f"pypandoc conversion failed for {self.filepath}: {e}."
-            )
+            if not text:
+                return []
+            return [Document(page_content=text, metadata={"source": self.filepath})]
+
+        strategies = [
+            ("UnstructuredWordDocumentLoader", unstructured),
+            ("pypandoc", pandoc),
+        ]
+        if self.filepath.split(".")[-1].lower() == "docx":
+            strategies.insert(0, ("Docx2txtLoader", docx2txt))
+        return strategies
+
+    def _on_exhausted(self, error: Optional[Exception]) -> None:
+        raise ValueError(
+            f"Failed to load Word document {self.filepath} with any strategy."
+        )
+
+
+class BufferTextLoader:
+    """
+    Text loader over an in-memory buffer (bytes, memoryview or mmap).
 
-        # 4. If all else fails, raise error
-        raise ValueError(f"Failed to load Word document {self.filepath} with any strategy.")
+    Produces the same document as TextLoader(autodetect_encoding=True) would
+    for the file, without the file having to exist on disk. Content that is
+    not UTF-8 is decoded with the encoding detected from its first 4 KB.
+    """
+
+    def __init__(self, buffer, source: str):
+        self.buffer = buffer
+        self.source = source
+        self._temp_filepath = None  # For compatibility with cleanup function
+
+    def _decode(self) -> str:
+        try:
+            return str(self.buffer, "utf-8")
+        except UnicodeDecodeError:
+            encoding = detect_encoding(bytes(self.buffer[:4096]))
+            return str(self.buffer, encoding, "replace")
+
+    def lazy_load(self) -> Iterator[Document]:
+        yield Document(page_content=self._decode(), metadata={"source": self.source})
 
     def load(self) -> List[Document]:
         return list(self.lazy_load())
@@ -376,3 +711,195 @@ class PandasExcelLoader:
     def load(self) -> List[Document]:
         """Load sheets from the Excel file."""
         return list(self.lazy_load())
+
+
+# Loaders whose parsing is CPU-bound and holds the GIL; they are run in the
+# process pool when one is configured.
+PROCESS_POOL_LOADERS = (
+    SafePyPDFLoader,
+    SafeWordLoader,
+    PandasExcelLoader,
+    UnstructuredEPubLoader,
+    UnstructuredMarkdownLoader,
+    UnstructuredXMLLoader,
+    UnstructuredRSTLoader,
+    UnstructuredPowerPointLoader,
+)
+
+
+def load_documents(loader) -> List[Document]:
+    """Load all documents of a loader; the process pool entry point."""
+    return loader.load()
+
+
+def load_strategy_in_worker(loader: FallbackChainLoader, name: str) -> List[Document]:
+    """Process pool entry point: extract all pages with one strategy."""
+    # This worker parses one file at a time; no extraction lock needed.
+    loader.extraction_lock = None
+    return loader.load_strategy(name)
+
+
+def _strategy_child(loader: FallbackChainLoader, name: str, conn) -> None:
+    """Child process entry point: send back (True, documents) or (False, error)."""
+    try:
+        result = (True, load_strategy_in_worker(loader, name))
+    except Exception as e:
+        result = (False, e)
+    try:
+        conn.send(result)
+    except Exception as e:
+        # Unpicklable documents or exception
+        conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+
+def _load_strategy_in_child(
+    loader: FallbackChainLoader, name: str, timeout: float
+) -> List[Document]:
+    """Run one strategy in its own child process, killed after `timeout`.
+
+    Pool tasks cannot be interrupted, so a strategy with a deadline gets a
+    dedicated process; at most RAG_PROCESS_POOL_SIZE run at a time, and the
+    budget starts once one of those slots is free.
+    """
+    receiver, sender = loader_mp_context.Pipe(duplex=False)
+    process = loader_mp_context.Process(
+        target=_strategy_child, args=(loader, name, sender), daemon=True
+    )
+    with strategy_slots:
+        process.start()
+        sender.close()
+        try:
+            if not receiver.poll(timeout):
+                raise TimeoutError(f"{name} did not finish within {timeout}s")
+            succeeded, result = receiver.recv()
+        except EOFError:
+            raise RuntimeError(
+                f"{name} exited with code {process.exitcode} without a result"
+            )
+        finally:
+            if process.is_alive():
+                process.kill()
+            process.join()
+            receiver.close()
+    if not succeeded:
+        raise result
+    return result
+
+
+def _load_chain_in_process(
+    loader: FallbackChainLoader, process_pool: Executor
+) -> List[Document]:
+    """Run a fallback chain outside the calling process.
+
+    With LOADER_STRATEGY_TIMEOUT, each strategy runs in a child process that
+    is killed once it exceeds the budget, and the next strategy is tried, so
+    a file that hangs a parser cannot keep a process busy. Without it, the
+    strategies run as process pool tasks until they return.
+    """
+    # Verdicts live in this process; workers get the strategy by name.
+    names = loader.strategy_names()
+    error: Optional[Exception] = None
+    for position, name in enumerate(names):
+        is_last = position == len(names) - 1
+        try:
+            if LOADER_STRATEGY_TIMEOUT > 0:
+                documents = _load_strategy_in_child(
+                    loader, name, LOADER_STRATEGY_TIMEOUT
+                )
+            else:
+                documents = process_pool.submit(
+                    load_strategy_in_worker, loader, name
+                ).result()
+        except Exception as e:
+            error = e
+            if not is_last:
+                logger.warning(
+                    f"{name} failed for {loader.filepath}: {e}. Trying fallback."
+                )
+            continue
+        if documents:
+            loader.strategy_used = name
+            loader_verdicts.record(loader.signature(), name)
+            return documents
+
+    if error is not None:
+        logger.error(f"All loading strategies failed for {loader.filepath}: {error}")
+    loader._on_exhausted(error)
+    return []
+
+
+def _load_in_process(loader, process_pool: Executor) -> Iterator[Document]:
+    # Submitted on first iteration, so the stream stays lazy for its consumer.
+    if isinstance(loader, FallbackChainLoader):
+        yield from _load_chain_in_process(loader, process_pool)
+    else:
+        yield from process_pool.submit(load_documents, loader).result()
+
+
+def _load_pdf_pages_in_process(
+    loader: SafePyPDFLoader, ranges: List[Tuple[int, int]], process_pool: Executor
+) -> Iterator[Document]:
+    # Ranges are extracted concurrently, at most PDF_PARALLEL_RANGES_IN_FLIGHT
+    # ahead of the consumer, and yielded in page order as each one finishes.
+    futures = deque()
+    pending = iter(ranges)
+
+    def submit_next() -> None:
+        for start, stop in islice(pending, 1):
+            futures.append(
+                process_pool.submit(extract_pdf_pages, loader.filepath, start, stop)
+            )
+
+    for _ in range(max(1, PDF_PARALLEL_RANGES_IN_FLIGHT)):
+        submit_next()
+    yielded = False
+    try:
+        while futures:
+            future = futures.popleft()
+            try:
+                documents = future.result()
+            except Exception as e:
+                if yielded:
+                    raise
+                # Nothing was yielded yet: a fallback strategy (which may not
+                # report page numbers) can still replace the whole file
+                logger.warning(
+                    f"Page-parallel extraction failed for {loader.filepath}: {e}. "
+                    "Falling back to sequential extraction."
+                )
+                for other in futures:
+                    other.cancel()
+                futures.clear()
+                yield from _load_chain_in_process(loader, process_pool)
+                return
+            submit_next()
+            yielded = yielded or bool(documents)
+            yield from documents
+    finally:
+        for future in futures:
+            future.cancel()
+    loader_verdicts.record(loader.signature(), "PyMuPDFLoader")
+
+
+def lazy_load_documents(
+    loader, process_pool: Optional[Executor] = None
+) -> Iterator[Document]:
+    """
+    Return a document iterator for the loader.
+
+    CPU-heavy loaders are parsed in the process pool (when given) so that
+    concurrent uploads scale across cores instead of contending for the GIL;
+    their documents are returned in one piece. Large PDFs are split into page
+    ranges extracted in parallel and streamed back in page order. Other
+    loaders, and every loader without a process pool, stream page by page
+    in the calling thread.
+    """
+    if process_pool is None or not isinstance(loader, PROCESS_POOL_LOADERS):
+        return loader.lazy_load()
+    if isinstance(loader, SafePyPDFLoader):
+        ranges = loader.parallel_page_ranges()
+        if len(ranges) > 1:
+            return _load_pdf_pages_in_process(loader, ranges, process_pool)
+    return _load_in_process(loader, process_pool)
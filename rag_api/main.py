@@ -1,11 +1,12 @@
 # main.py
+import asyncio
 import os
 import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from starlette.responses import JSONResponse
 
@@ -18,14 +19,52 @@ from app.config import (
     CHUNK_OVERLAP,
     PDF_EXTRACT_IMAGES,
     VECTOR_DB_TYPE,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_MODEL_KEY,
+    PG_BULK_INSERT_ENABLED,
+    PG_NATIVE_ASYNC_ENABLED,
+    PG_VECTOR_INDEX_TYPE,
+    PG_HNSW_EF_SEARCH,
+    PG_IVFFLAT_PROBES,
+    PG_FILTERED_SEARCH_MODE,
+    HYBRID_SEARCH_ENABLED,
+    HYBRID_SEARCH_LANGUAGE,
+    RAG_PROCESS_POOL_SIZE,
     LogMiddleware,
     logger,
     vector_store,
 )
 from app.middleware import security_middleware
 from app.routes import document_routes, pgvector_routes
-from app.services.database import PSQLDatabase, ensure_vector_indexes
+from app.services.database import (
+    ITERATIVE_SCAN_MIN_VERSION,
+    PSQLDatabase,
+    build_search_indexes,
+    ensure_vector_indexes,
+    get_pgvector_version,
+)
+from app.services.embedding_cache import EmbeddingCache
+from app.services.ingestion_jobs import ingestion_jobs
 from app.services.vector_store.factory import close_vector_store_connections
+from app.utils.document_loader import loader_mp_context
+
+
+async def attach_search_indexes():
+    """Build the search indexes and switch the vector store over to them."""
+    try:
+        id_columns_ready, ann_dimensions = await build_search_indexes(
+            vector_store._distance_strategy.value
+        )
+    except Exception as e:
+        logger.warning("Failed to build search indexes: %s", e)
+        return
+    vector_store.id_columns_ready = id_columns_ready
+    if ann_dimensions:
+        vector_store.ann_index_type = PG_VECTOR_INDEX_TYPE
+        vector_store.ann_index_dimensions = ann_dimensions
+        vector_store.hnsw_ef_search = PG_HNSW_EF_SEARCH
+        vector_store.ivfflat_probes = PG_IVFFLAT_PROBES
+        vector_store.filtered_search_mode = PG_FILTERED_SEARCH_MODE
 
 
 @asynccontextmanager
@@ -42,13 +81,69 @@ async def lifespan(app: FastAPI):
         f"Initialized thread pool with {max_workers} workers (CPU cores: {os.cpu_count()})"
     )
 
+    # Separate process pool for CPU-heavy loaders (PDF, Office, Unstructured),
+    # so parsing scales across cores instead of contending for the GIL.
+    # RAG_PROCESS_POOL_SIZE=0 parses in the thread pool instead. Workers start
+    # lazily, mid-request; they come from a fork server rather than a fork of
+    # this process, whose threads and sockets a fork would copy.
+    process_workers = RAG_PROCESS_POOL_SIZE
+    app.state.process_pool = (
+        ProcessPoolExecutor(max_workers=process_workers, mp_context=loader_mp_context)
+        if process_workers > 0
+        else None
+    )
+    if app.state.process_pool is not None:
+        logger.info(f"Initialized loader process pool with {process_workers} workers")
+
+    # Workers for background ingestion (/embed?async=true)
+    ingestion_jobs.start()
+
+    app.state.index_task = None
     if VECTOR_DB_TYPE == VectorDBType.PGVECTOR:
-        await PSQLDatabase.get_pool()  # Initialize the pool
+        pool = await PSQLDatabase.get_pool()  # Initialize the pool
         await ensure_vector_indexes()
+        pgvector_version = await get_pgvector_version()
+        vector_store.iterative_scan_supported = (
+            pgvector_version is not None
+            and pgvector_version >= ITERATIVE_SCAN_MIN_VERSION
+        )
+        if (
+            PG_FILTERED_SEARCH_MODE == "ann"
+            and not vector_store.iterative_scan_supported
+        ):
+            logger.warning(
+                "PG_FILTERED_SEARCH_MODE=ann without pgvector 0.8+ iterative "
+                "scans: file-filtered queries may return fewer than k results"
+            )
+        vector_store.hybrid_search_enabled = HYBRID_SEARCH_ENABLED
+        vector_store.hybrid_search_language = HYBRID_SEARCH_LANGUAGE
+        # Search indexes are built in the background; until they are ready
+        # queries filter on cmetadata and use exact distance scans.
+        app.state.index_task = asyncio.create_task(attach_search_indexes())
+        if PG_BULK_INSERT_ENABLED:
+            vector_store.bulk_insert_pool = pool
+            logger.info("Bulk COPY insertion enabled for pgvector")
+        if PG_NATIVE_ASYNC_ENABLED:
+            vector_store.asyncpg_pool = pool
+            logger.info("Native asyncpg query path enabled for pgvector")
+        if EMBEDDING_CACHE_ENABLED:
+            vector_store.embedding_cache = EmbeddingCache(EMBEDDING_CACHE_MODEL_KEY)
+            logger.info(
+                "Embedding cache enabled for model %s", EMBEDDING_CACHE_MODEL_KEY
+            )
 
     yield
 
     # Cleanup logic
+    if app.state.index_task is not None and not app.state.index_task.done():
+        logger.info("Cancelling search index build")
+        app.state.index_task.cancel()
+        await asyncio.gather(app.state.index_task, return_exceptions=True)
+
+    # Let running ingestion jobs finish while the pools are still open
+    logger.info("Stopping ingestion job workers")
+    await ingestion_jobs.stop()
+
     if VECTOR_DB_TYPE == VectorDBType.PGVECTOR:
         try:
             logger.info("Closing asyncpg connection pool")
@@ -61,6 +156,9 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down thread pool")
     app.state.thread_pool.shutdown(wait=True)
     logger.info("Thread pool shutdown complete")
+    if app.state.process_pool is not None:
+        app.state.process_pool.shutdown(wait=True)
+        logger.info("Loader process pool shutdown complete")
 
     # Close vector store connections (MongoDB client / SQLAlchemy engine)
     try:
@@ -76,13 +76,73 @@ async def test_asimilarity_search_passes_args(store):
 
 @pytest.mark.asyncio
 async def test_aadd_documents_passes_args(store):
-    docs = [Document(page_content="test", metadata={})]
-    with patch.object(ExtendedPgVector, "add_documents", return_value=["id1"]) as mock:
+    docs = [Document(page_content="test", metadata={"file_id": "id1"})]
+    store.embedding_function = MagicMock()
+    store.embedding_function.embed_documents.return_value = [[0.1, 0.2]]
+    with patch.object(ExtendedPgVector, "add_embeddings", return_value=["id1"]) as mock:
         result = await store.aadd_documents(docs, ids=["id1"])
-    mock.assert_called_once_with(docs, ids=["id1"])
+    mock.assert_called_once_with(
+        ["test"], [[0.1, 0.2]], metadatas=[{"file_id": "id1"}], ids=["id1"]
+    )
+    assert result == ["id1"]
+
+
+@pytest.mark.asyncio
+async def test_aadd_documents_with_precomputed_embeddings_skips_provider(store):
+    docs = [Document(page_content="test", metadata={"file_id": "id1"})]
+    store.embedding_function = MagicMock()
+    with patch.object(ExtendedPgVector, "add_embeddings", return_value=["id1"]) as mock:
+        result = await store.aadd_documents(docs, ids=["id1"], embeddings=[[0.3, 0.4]])
+    store.embedding_function.embed_documents.assert_not_called()
+    mock.assert_called_once_with(
+        ["test"], [[0.3, 0.4]], metadatas=[{"file_id": "id1"}], ids=["id1"]
+    )
     assert result == ["id1"]
 
 
+class FakeEmbeddingCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.stored = {}
+
+    async def get_many(self, digests):
+        return {d: self.entries[d] for d in digests if d in self.entries}
+
+    async def put_many(self, embeddings):
+        self.stored.update(embeddings)
+        self.entries.update(embeddings)
+
+
+@pytest.mark.asyncio
+async def test_aembed_documents_only_embeds_cache_misses(store):
+    docs = [
+        Document(page_content="known", metadata={"digest": "d1"}),
+        Document(page_content="new", metadata={"digest": "d2"}),
+        Document(page_content="new", metadata={"digest": "d2"}),
+    ]
+    store.embedding_cache = FakeEmbeddingCache({"d1": [1.0, 1.0]})
+    store.embedding_function = MagicMock()
+    store.embedding_function.embed_documents.return_value = [[2.0, 2.0]]
+
+    result = await store.aembed_documents(docs)
+
+    store.embedding_function.embed_documents.assert_called_once_with(["new"])
+    assert result == [[1.0, 1.0], [2.0, 2.0], [2.0, 2.0]]
+    assert store.embedding_cache.stored == {"d2": [2.0, 2.0]}
+
+
+@pytest.mark.asyncio
+async def test_aembed_documents_full_cache_hit_skips_provider(store):
+    docs = [Document(page_content="known", metadata={"digest": "d1"})]
+    store.embedding_cache = FakeEmbeddingCache({"d1": [1.0, 1.0]})
+    store.embedding_function = MagicMock()
+
+    result = await store.aembed_documents(docs)
+
+    store.embedding_function.embed_documents.assert_not_called()
+    assert result == [[1.0, 1.0]]
+
+
 @pytest.mark.asyncio
 async def test_run_in_executor_converts_stop_iteration(store):
     """StopIteration can't be set on an asyncio.Future — verify it becomes RuntimeError."""
@@ -93,3 +153,485 @@ async def test_run_in_executor_converts_stop_iteration(store):
     with patch.object(ExtendedPgVector, "get_all_ids", side_effect=raises_stop):
         with pytest.raises(RuntimeError):
             await store.get_all_ids()
+
+
+class FakeTransaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, rows=None, fetchval_result=None, execute_status=None):
+        self.copies = []
+        self.calls = []
+        self.rows = rows or []
+        self.fetchval_result = fetchval_result
+        self.execute_status = execute_status
+
+    async def fetch(self, query, *args):
+        self.calls.append(("fetch", query, args))
+        return self.rows
+
+    async def fetchval(self, query, *args):
+        self.calls.append(("fetchval", query, args))
+        return self.fetchval_result
+
+    async def execute(self, query, *args):
+        self.calls.append(("execute", query, args))
+        return self.execute_status
+
+    def transaction(self):
+        return FakeTransaction()
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, list(records), columns))
+
+
+class FakePool:
+    def __init__(self, conn=None):
+        self.conn = conn or FakeConnection()
+
+    def acquire(self):
+        pool = self
+
+        class _Acquire:
+            async def __aenter__(self):
+                return pool.conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Acquire()
+
+
+@pytest.mark.asyncio
+async def test_aadd_documents_uses_copy_when_bulk_pool_attached(store):
+    import json
+    import uuid
+
+    collection_uuid = uuid.uuid4()
+    store.bulk_insert_pool = FakePool()
+    docs = [
+        Document(page_content="a", metadata={"file_id": "f1"}),
+        Document(page_content="b", metadata={"file_id": "f1", "page": 2}),
+    ]
+    with patch.object(
+        ExtendedPgVector, "get_collection_uuid", return_value=collection_uuid
+    ), patch.object(ExtendedPgVector, "add_embeddings") as orm_insert:
+        result = await store.aadd_documents(
+            docs, ids=["f1", "f1"], embeddings=[[0.1, 0.2], [0.3, 0.4]]
+        )
+
+    orm_insert.assert_not_called()
+    assert result == ["f1", "f1"]
+    [(table, records, columns)] = store.bulk_insert_pool.conn.copies
+    assert table == "langchain_pg_embedding"
+    assert columns == [
+        "uuid",
+        "collection_id",
+        "embedding",
+        "document",
+        "cmetadata",
+        "custom_id",
+    ]
+    assert [r[1:] for r in records] == [
+        (collection_uuid, [0.1, 0.2], "a", json.dumps({"file_id": "f1"}), "f1"),
+        (
+            collection_uuid,
+            [0.3, 0.4],
+            "b",
+            json.dumps({"file_id": "f1", "page": 2}),
+            "f1",
+        ),
+    ]
+    assert len({r[0] for r in records}) == 2
+
+
+@pytest.fixture
+def native_store(store):
+    import uuid
+
+    store.collection_name = "testcollection"
+    store._distance_strategy = "cosine"
+    store.asyncpg_pool = FakePool(
+        FakeConnection(
+            rows=[
+                {
+                    "custom_id": "id1",
+                    "document": "text",
+                    "cmetadata": '{"file_id": "id1"}',
+                    "distance": 0.25,
+                }
+            ],
+            fetchval_result=uuid.uuid4(),
+        )
+    )
+    return store
+
+
+@pytest.mark.asyncio
+async def test_native_get_filtered_ids(native_store):
+    with patch.object(ExtendedPgVector, "get_filtered_ids") as sync_mock:
+        result = await native_store.get_filtered_ids(["id1", "id2"])
+    sync_mock.assert_not_called()
+    assert result == ["id1"]
+    [(_, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert "custom_id = ANY($1::text[])" in query
+    assert args == (["id1", "id2"],)
+
+
+@pytest.mark.asyncio
+async def test_native_get_documents_by_ids_decodes_metadata(native_store):
+    result = await native_store.get_documents_by_ids(["id1"])
+    assert result == [Document(page_content="text", metadata={"file_id": "id1"})]
+
+
+@pytest.mark.asyncio
+async def test_native_similarity_search_filters_by_file_ids(native_store):
+    with patch.object(
+        ExtendedPgVector, "similarity_search_with_score_by_vector"
+    ) as sync_mock:
+        result = await native_store.asimilarity_search_with_score_by_vector(
+            [0.1, 0.2], k=3, filter={"file_id": {"$in": ["id1", "id2"]}}
+        )
+    sync_mock.assert_not_called()
+    assert result == [
+        (Document(page_content="text", metadata={"file_id": "id1"}), 0.25)
+    ]
+    conn = native_store.asyncpg_pool.conn
+    _, query, args = conn.calls[-1]
+    assert "embedding <=> $1" in query
+    assert "cmetadata->>'file_id' = ANY($3::text[])" in query
+    assert "LIMIT 3" in query
+    assert args == ([0.1, 0.2], conn.fetchval_result, ["id1", "id2"])
+
+
+@pytest.mark.asyncio
+async def test_native_similarity_search_falls_back_for_other_filters(native_store):
+    with patch.object(
+        ExtendedPgVector, "similarity_search_with_score_by_vector", return_value=[]
+    ) as sync_mock:
+        await native_store.asimilarity_search_with_score_by_vector(
+            [0.1], k=2, filter={"page": {"$eq": 1}}
+        )
+    sync_mock.assert_called_once_with([0.1], 2, {"page": {"$eq": 1}})
+    assert native_store.asyncpg_pool.conn.calls == []
+
+
+@pytest.mark.asyncio
+async def test_native_exact_matches_use_ilike_patterns(native_store):
+    result = await native_store._aget_exact_matches_multiple(
+        "articulo 2.2.4.6.28 de 1072", ["id1"], limit=4
+    )
+    assert result == [(Document(page_content="text", metadata={"file_id": "id1"}), 0.0)]
+    conn = native_store.asyncpg_pool.conn
+    _, query, args = conn.calls[-1]
+    assert "collection_id = $1 AND document ILIKE $2 AND document ILIKE $3" in query
+    assert args == (conn.fetchval_result, "%2.2.4.6.28%", "%1072%", ["id1"], 4)
+
+
+@pytest.mark.asyncio
+async def test_native_delete(native_store):
+    await native_store.delete(ids=["id1"])
+    [(kind, query, args), (_, status_query, status_args)] = (
+        native_store.asyncpg_pool.conn.calls
+    )
+    assert kind == "execute"
+    assert query.startswith("DELETE FROM langchain_pg_embedding")
+    assert args == (["id1"],)
+    assert status_query.startswith("DELETE FROM langchain_pg_file_status")
+    assert status_args == (["id1"],)
+
+
+@pytest.mark.asyncio
+async def test_native_delete_warns_when_collection_missing(native_store):
+    native_store.asyncpg_pool.conn.fetchval_result = None
+    await native_store.delete(ids=["id1"], collection_only=True)
+    kinds = [kind for kind, _, _ in native_store.asyncpg_pool.conn.calls]
+    assert kinds == ["fetchval"]
+
+
+@pytest.mark.asyncio
+async def test_clone_file_documents_copies_rows_of_identical_upload(native_store):
+    native_store._collection_uuid = "collection-uuid"
+    native_store.asyncpg_pool.conn.fetchval_result = 12
+
+    cloned = await native_store.aclone_file_documents(
+        "abc123", "user1", "new-file", source="/uploads/user1/new-file.pdf"
+    )
+
+    assert cloned == 12
+    [(kind, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert kind == "fetchval"
+    assert "INSERT INTO langchain_pg_embedding" in query
+    assert "jsonb_build_object('file_id', $4::text)" in query
+    assert "jsonb_object_agg(key, $5::text)" in query
+    assert args == (
+        "collection-uuid",
+        "abc123",
+        "user1",
+        "new-file",
+        "/uploads/user1/new-file.pdf",
+        ["source", "file_path"],
+    )
+
+
+@pytest.mark.asyncio
+async def test_clone_file_documents_only_uses_completed_files(native_store):
+    native_store._collection_uuid = "collection-uuid"
+    native_store.asyncpg_pool.conn.fetchval_result = 0
+
+    assert await native_store.aclone_file_documents("abc", "user1", "new") == 0
+    [(_, query, _)] = native_store.asyncpg_pool.conn.calls
+    source = query[query.index("source AS") : query.index("cloned AS")]
+    assert "FROM langchain_pg_file_status" in source
+    assert "AND complete" in source
+    assert "INSERT INTO langchain_pg_file_status" in query
+
+
+@pytest.mark.asyncio
+async def test_get_incomplete_file_ids(native_store):
+    native_store._collection_uuid = "collection-uuid"
+    native_store.asyncpg_pool.conn.rows = [{"file_id": "f2"}]
+
+    assert await native_store.aget_incomplete_file_ids(["f1", "f2"]) == {"f2"}
+    [(kind, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert "NOT complete" in query
+    assert args == ("collection-uuid", ["f1", "f2"])
+
+
+@pytest.mark.asyncio
+async def test_set_file_status_upserts(native_store):
+    native_store._collection_uuid = "collection-uuid"
+
+    await native_store.aset_file_status("f1", "user1", "abc", False)
+
+    [(kind, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert kind == "execute"
+    assert "ON CONFLICT (collection_id, file_id) DO UPDATE" in query
+    assert args == ("collection-uuid", "f1", "user1", "abc", False)
+
+
+@pytest.mark.asyncio
+async def test_clone_file_documents_requires_native_pool(store):
+    assert await store.aclone_file_documents("abc123", "user1", "new-file") == 0
+
+
+@pytest.mark.asyncio
+async def test_get_file_digests_native(native_store):
+    native_store._collection_uuid = "collection-uuid"
+    native_store.asyncpg_pool.conn.rows = [{"digest": "d1"}, {"digest": None}]
+    assert await native_store.aget_file_digests("file-1") == ["d1"]
+    [(kind, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert "cmetadata->>'digest'" in query
+    assert "WHERE collection_id = $1 AND custom_id = $2" in query
+    assert args == ("collection-uuid", "file-1")
+
+
+@pytest.mark.asyncio
+async def test_get_file_digests_falls_back_to_documents(store):
+    docs = [
+        Document(page_content="a", metadata={"digest": "d1"}),
+        Document(page_content="b", metadata={}),
+    ]
+    with patch.object(ExtendedPgVector, "get_documents_by_ids", return_value=docs):
+        assert await store.aget_file_digests("file-1") == ["d1"]
+
+
+@pytest.mark.asyncio
+async def test_get_file_chunks_native(native_store):
+    native_store.asyncpg_pool.conn.rows = [
+        {"uuid": "00000000-0000-0000-0000-000000000001", "cmetadata": '{"digest": "d"}'}
+    ]
+    native_store._collection_uuid = "collection-uuid"
+    chunks = await native_store.aget_file_chunks("file-1")
+    assert chunks == [("00000000-0000-0000-0000-000000000001", {"digest": "d"})]
+    [(_, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert "WHERE collection_id = $1 AND custom_id = $2" in query
+    assert args == ("collection-uuid", "file-1")
+
+
+@pytest.mark.asyncio
+async def test_replace_file_chunks_runs_in_one_transaction(native_store):
+    native_store._collection_uuid = "collection-uuid"
+    old = "00000000-0000-0000-0000-000000000001"
+    kept = "00000000-0000-0000-0000-000000000002"
+    doc = Document(page_content="new", metadata={"file_id": "file-1"})
+
+    await native_store.areplace_file_chunks(
+        "file-1", [doc], [[0.1, 0.2]], [old], [(kept, {"page": 3})]
+    )
+
+    conn = native_store.asyncpg_pool.conn
+    (_, delete_query, delete_args), (_, update_query, update_args) = conn.calls
+    assert "DELETE FROM langchain_pg_embedding" in delete_query
+    assert [str(u) for u in delete_args[0]] == [old]
+    assert "unnest($1::uuid[], $2::jsonb[])" in update_query
+    assert update_args[1] == ['{"page": 3}']
+    [(table, records, _)] = conn.copies
+    assert table == "langchain_pg_embedding"
+    assert records[0][1:] == (
+        "collection-uuid",
+        [0.1, 0.2],
+        "new",
+        '{"file_id": "file-1"}',
+        "file-1",
+    )
+
+
+@pytest.mark.asyncio
+async def test_replace_file_chunks_merges_file_metadata_in_one_statement(
+    native_store,
+):
+    native_store._collection_uuid = "collection-uuid"
+
+    await native_store.areplace_file_chunks(
+        "file-1", [], [], [], [], {"file_sha256": "new"}
+    )
+
+    [(_, query, args)] = native_store.asyncpg_pool.conn.calls
+    assert "SET cmetadata = cmetadata || $3::jsonb" in query
+    assert "NOT cmetadata @> $3::jsonb" in query
+    assert args == ("collection-uuid", "file-1", '{"file_sha256": "new"}')
+
+
+@pytest.mark.asyncio
+async def test_native_similarity_search_uses_ann_index_expression(native_store):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 2
+    native_store.hnsw_ef_search = 100
+    await native_store.asimilarity_search_with_score_by_vector([0.1, 0.2], k=3)
+    calls = native_store.asyncpg_pool.conn.calls
+    assert calls[-2] == ("execute", "SET LOCAL hnsw.ef_search = 100", ())
+    _, query, _ = calls[-1]
+    assert "(embedding::vector(2)) <=> $1::vector(2)" in query
+    assert "vector_dims(embedding) = 2" in query
+
+
+@pytest.mark.asyncio
+async def test_native_similarity_search_skips_ann_index_on_dimension_mismatch(
+    native_store,
+):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 1536
+    await native_store.asimilarity_search_with_score_by_vector([0.1, 0.2], k=3)
+    calls = native_store.asyncpg_pool.conn.calls
+    assert all("SET LOCAL" not in query for _, query, _ in calls)
+    assert "embedding <=> $1" in calls[-1][1]
+
+
+@pytest.mark.asyncio
+async def test_native_file_filtered_search_prefilters_by_default(native_store):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 2
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": "id1"}
+    )
+    calls = native_store.asyncpg_pool.conn.calls
+    assert all("SET LOCAL" not in query for _, query, _ in calls)
+    _, query, _ = calls[-1]
+    assert "embedding <=> $1" in query
+    assert "cmetadata->>'file_id' = $3" in query
+
+
+@pytest.mark.asyncio
+async def test_native_file_filtered_search_ann_mode_uses_iterative_scan(
+    native_store,
+):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 2
+    native_store.filtered_search_mode = "ann"
+    native_store.iterative_scan_supported = True
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": "id1"}
+    )
+    calls = native_store.asyncpg_pool.conn.calls
+    settings = [query for kind, query, _ in calls if kind == "execute"]
+    assert "SET LOCAL hnsw.iterative_scan = strict_order" in settings
+    assert "(embedding::vector(2)) <=> $1::vector(2)" in calls[-1][1]
+
+
+@pytest.mark.asyncio
+async def test_native_file_filtered_search_ann_mode_without_iterative_scan(
+    native_store,
+):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 2
+    native_store.filtered_search_mode = "ann"
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": "id1"}
+    )
+    calls = native_store.asyncpg_pool.conn.calls
+    settings = [query for kind, query, _ in calls if kind == "execute"]
+    assert settings == ["SET LOCAL hnsw.ef_search = 40"]
+    assert "(embedding::vector(2)) <=> $1::vector(2)" in calls[-1][1]
+
+
+@pytest.mark.asyncio
+async def test_native_file_filtered_search_auto_mode_uses_hnsw_with_iterative_scan(
+    native_store,
+):
+    native_store.ann_index_type = "hnsw"
+    native_store.ann_index_dimensions = 2
+    native_store.iterative_scan_supported = True
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": "id1"}
+    )
+    calls = native_store.asyncpg_pool.conn.calls
+    assert ("execute", "SET LOCAL hnsw.iterative_scan = strict_order", ()) in calls
+    assert "(embedding::vector(2)) <=> $1::vector(2)" in calls[-1][1]
+
+    native_store.asyncpg_pool.conn.calls.clear()
+    native_store.ann_index_type = "ivfflat"
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": "id1"}
+    )
+    assert "embedding <=> $1" in native_store.asyncpg_pool.conn.calls[-1][1]
+
+
+@pytest.mark.asyncio
+async def test_native_queries_use_promoted_file_id_column(native_store):
+    native_store.id_columns_ready = True
+    await native_store.asimilarity_search_with_score_by_vector(
+        [0.1, 0.2], k=3, filter={"file_id": {"$eq": "id1"}}
+    )
+    await native_store.aget_exact_matches_by_text("hello", file_id="id1")
+    calls = native_store.asyncpg_pool.conn.calls
+    assert "AND file_id = $3" in calls[-2][1]
+    assert "file_id = ANY($3::text[])" in calls[-1][1]
+    assert all("cmetadata->>'file_id'" not in query for _, query, _ in calls)
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_vector_and_lexical_rankings(native_store):
+    native_store.hybrid_search_enabled = True
+    native_store.asyncpg_pool.conn.rows = [
+        {"document": "text", "cmetadata": {"file_id": "id1"}, "score": 0.0}
+    ]
+    assert native_store.hybrid_search_available
+
+    result = await native_store.ahybrid_search_with_score_by_vector(
+        "decreto 1072", [0.1, 0.2], k=2, filter={"file_id": {"$eq": "id1"}}
+    )
+
+    assert result == [(Document(page_content="text", metadata={"file_id": "id1"}), 0.0)]
+    conn = native_store.asyncpg_pool.conn
+    _, query, args = conn.calls[-1]
+    assert args == ([0.1, 0.2], conn.fetchval_result, "id1", "decreto 1072")
+    assert "plainto_tsquery('spanish', $4)" in query
+    assert "to_tsvector('spanish', document) @@ q" in query
+    assert "FULL OUTER JOIN lexical_ranked" in query
+    assert "1.0 / (60 + v.rank)" in query
+    assert "LIMIT 20" in query  # candidates per ranking
+    assert "LIMIT 2" in query
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_rejects_non_file_filters(native_store):
+    with pytest.raises(ValueError):
+        await native_store.ahybrid_search_with_score_by_vector(
+            "q", [0.1], k=2, filter={"page": 1}
+        )
@@ -1,7 +1,11 @@
 import asyncio
 
 import pytest
-from app.services.database import ensure_vector_indexes, PSQLDatabase
+from app.services.database import (
+    ensure_search_indexes,
+    ensure_vector_indexes,
+    PSQLDatabase,
+)
 
 
 class CapturingConnection:
@@ -10,8 +14,8 @@ class CapturingConnection:
     def __init__(self):
         self.statements = []
 
-    async def fetchval(self, query, index_name):
-        return False
+    async def fetchval(self, query, *args):
+        return None
 
     async def execute(self, query):
         self.statements.append(query)
@@ -37,8 +41,8 @@ class CapturingPool:
         return CapturingAcquire(self._conn)
 
 
-def _run_with_captured_conn(monkeypatch):
-    """Run ensure_vector_indexes() and return the captured connection."""
+def _run_with_captured_conn(monkeypatch, ensure=ensure_vector_indexes):
+    """Run ensure() and return the captured connection."""
     conn = CapturingConnection()
     pool = CapturingPool(conn)
 
@@ -46,13 +50,14 @@ def _run_with_captured_conn(monkeypatch):
         return pool
 
     monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
-    asyncio.run(ensure_vector_indexes())
+    asyncio.run(ensure())
     return conn
 
 
 def test_ensure_vector_indexes(monkeypatch):
     conn = _run_with_captured_conn(monkeypatch)
     assert len(conn.statements) > 0
+    assert not any("CONCURRENTLY" in s for s in conn.statements)
 
 
 def test_ensure_vector_indexes_do_block_dollar_quoting(monkeypatch):
@@ -84,3 +89,178 @@ def test_ensure_vector_indexes_gin_index(monkeypatch):
     gin_stmt = next(s for s in conn.statements if "ix_cmetadata_gin" in s)
     assert "jsonb_path_ops" in gin_stmt
     assert "USING gin" in gin_stmt
+
+
+def test_ensure_vector_indexes_embedding_cache_table(monkeypatch):
+    """Embedding cache table is keyed by digest and model."""
+    conn = _run_with_captured_conn(monkeypatch)
+    cache_stmt = next(
+        s for s in conn.statements if "langchain_pg_embedding_cache" in s
+    )
+    assert "CREATE TABLE IF NOT EXISTS" in cache_stmt
+    assert "PRIMARY KEY (digest, model)" in cache_stmt
+
+
+def test_ensure_vector_indexes_file_status_table(monkeypatch):
+    """File status table is keyed by collection and file, indexed by hash."""
+    conn = _run_with_captured_conn(monkeypatch)
+    status_stmt = next(s for s in conn.statements if "langchain_pg_file_status" in s)
+    assert "PRIMARY KEY (collection_id, file_id)" in status_stmt
+    assert "WHERE complete" in status_stmt
+
+
+class AnnIndexConnection(CapturingConnection):
+    """Returns the stored dimension, then the index validity flag."""
+
+    def __init__(self, dimensions, is_valid):
+        super().__init__()
+        self.fetchval_results = [dimensions, is_valid]
+
+    async def fetchval(self, query, *args):
+        return self.fetchval_results.pop(0)
+
+
+def _run_ann_index(monkeypatch, conn, distance_strategy="cosine"):
+    from app.services.database import ensure_vector_ann_index
+
+    async def fake_get_pool():
+        return CapturingPool(conn)
+
+    monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
+    return asyncio.run(ensure_vector_ann_index(distance_strategy))
+
+
+def test_ensure_vector_ann_index_builds_hnsw(monkeypatch):
+    conn = AnnIndexConnection(dimensions=1536, is_valid=None)
+    assert _run_ann_index(monkeypatch, conn) == 1536
+    [statement] = conn.statements
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS" in statement
+    assert "USING hnsw ((embedding::vector(1536)) vector_cosine_ops)" in statement
+    assert "m = 16, ef_construction = 64" in statement
+    assert "WHERE vector_dims(embedding) = 1536" in statement
+
+
+def test_ensure_vector_ann_index_rebuilds_invalid_index(monkeypatch):
+    conn = AnnIndexConnection(dimensions=768, is_valid=False)
+    assert _run_ann_index(monkeypatch, conn, "l2") == 768
+    assert conn.statements[0].startswith("DROP INDEX CONCURRENTLY")
+    assert "vector_l2_ops" in conn.statements[1]
+
+
+def test_ensure_vector_ann_index_skips_existing_and_empty(monkeypatch):
+    conn = AnnIndexConnection(dimensions=1536, is_valid=True)
+    assert _run_ann_index(monkeypatch, conn) == 1536
+    assert conn.statements == []
+
+    conn = AnnIndexConnection(dimensions=None, is_valid=None)
+    assert _run_ann_index(monkeypatch, conn) is None
+    assert conn.statements == []
+
+
+def test_ensure_search_indexes_promotes_id_columns(monkeypatch):
+    conn = CapturingConnection()
+
+    async def fake_get_pool():
+        return CapturingPool(conn)
+
+    monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
+    assert asyncio.run(ensure_search_indexes()) is True
+
+    ddl = "\n".join(conn.statements)
+    assert "ADD COLUMN IF NOT EXISTS file_id TEXT" in ddl
+    assert "ADD COLUMN IF NOT EXISTS user_id TEXT" in ddl
+    assert "BEFORE INSERT OR UPDATE OF cmetadata ON langchain_pg_embedding" in ddl
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_langchain_pg_embedding_file_id_col" in ddl
+    assert conn.statements[-1].startswith("COMMENT ON COLUMN langchain_pg_embedding.file_id")
+
+
+def test_ensure_search_indexes_skips_promoted_id_columns(monkeypatch):
+    from app.services.database import ID_COLUMNS_READY_MARKER
+
+    class PromotedConnection(CapturingConnection):
+        async def fetchval(self, query, *args):
+            return ID_COLUMNS_READY_MARKER
+
+    conn = PromotedConnection()
+
+    async def fake_get_pool():
+        return CapturingPool(conn)
+
+    monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
+    assert asyncio.run(ensure_search_indexes()) is True
+    assert not any("file_id TEXT" in s for s in conn.statements)
+
+
+def test_ensure_search_indexes_trigram_index(monkeypatch):
+    """Exact-match ILIKE search is backed by a pg_trgm GIN index."""
+    conn = _run_with_captured_conn(monkeypatch, ensure_search_indexes)
+    assert any("CREATE EXTENSION IF NOT EXISTS pg_trgm" in s for s in conn.statements)
+    index = next(s for s in conn.statements if "gin_trgm_ops" in s)
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS" in index
+    assert "USING gin (document gin_trgm_ops)" in index
+
+
+def test_ensure_search_indexes_file_sha256_index(monkeypatch):
+    """Whole-file upload dedup looks files up by content hash."""
+    conn = _run_with_captured_conn(monkeypatch, ensure_search_indexes)
+    index = next(s for s in conn.statements if "file_sha256" in s and "CREATE" in s)
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS" in index
+    assert "((cmetadata->>'file_sha256'))" in index
+    assert "WHERE cmetadata ? 'file_sha256'" in index
+
+
+def test_build_search_indexes_waits_for_advisory_lock(monkeypatch):
+    """Only the worker holding the advisory lock builds; others poll for it."""
+    from app.services import database
+
+    class LockConnection(CapturingConnection):
+        def __init__(self):
+            super().__init__()
+            self.lock_attempts = [False, True]
+
+        async def fetchval(self, query, *args):
+            return self.lock_attempts.pop(0)
+
+        async def execute(self, query, *args):
+            self.statements.append(query)
+
+    conn = LockConnection()
+    built = []
+
+    async def fake_get_pool():
+        return CapturingPool(conn)
+
+    async def fake_ensure_search_indexes():
+        built.append("search")
+        return True
+
+    async def fake_ensure_vector_ann_index(distance_strategy):
+        built.append(distance_strategy)
+        return 1536
+
+    monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
+    monkeypatch.setattr(database, "ensure_search_indexes", fake_ensure_search_indexes)
+    monkeypatch.setattr(
+        database, "ensure_vector_ann_index", fake_ensure_vector_ann_index
+    )
+
+    result = asyncio.run(database.build_search_indexes("l2", poll_interval=0))
+
+    assert result == (True, 1536)
+    assert built == ["search", "l2"]
+    assert conn.lock_attempts == []
+    assert conn.statements == ["SELECT pg_advisory_unlock($1)"]
+
+
+def test_get_pgvector_version(monkeypatch):
+    from app.services.database import get_pgvector_version
+
+    class VersionConnection(CapturingConnection):
+        async def fetchval(self, query, *args):
+            return "0.8.0"
+
+    async def fake_get_pool():
+        return CapturingPool(VersionConnection())
+
+    monkeypatch.setattr(PSQLDatabase, "get_pool", fake_get_pool)
+    assert asyncio.run(get_pgvector_version()) == (0, 8, 0)
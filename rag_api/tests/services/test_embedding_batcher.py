@@ -0,0 +1,94 @@
+from langchain_core.documents import Document
+
+from app.config import EmbeddingsProvider
+from app.services.embedding_batcher import (
+    AdaptiveBatchSizer,
+    estimate_tokens,
+    get_token_counter,
+)
+
+
+def make_sizer(**kwargs):
+    params = dict(
+        count_tokens=len,
+        initial_tokens=10,
+        min_tokens=4,
+        max_tokens=20,
+        target_latency=1.0,
+    )
+    params.update(kwargs)
+    return AdaptiveBatchSizer(**params)
+
+
+def docs(*texts):
+    return [Document(page_content=text) for text in texts]
+
+
+def contents(batches):
+    return [[doc.page_content for doc in batch] for batch in batches]
+
+
+def test_batches_pack_up_to_token_budget():
+    sizer = make_sizer()
+    batches = sizer.batches(iter(docs("aaaa", "bbbb", "cc", "dddddd", "e")), 100)
+    assert contents(batches) == [["aaaa", "bbbb", "cc"], ["dddddd", "e"]]
+
+
+def test_batches_respect_max_items():
+    sizer = make_sizer()
+    batches = sizer.batches(docs("a", "b", "c", "d", "e"), 2)
+    assert contents(batches) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_oversized_document_is_its_own_batch():
+    sizer = make_sizer()
+    batches = sizer.batches(docs("a", "x" * 50, "b"), 100)
+    assert contents(batches) == [["a"], ["x" * 50], ["b"]]
+
+
+def test_disabled_sizer_uses_fixed_batches():
+    sizer = make_sizer(enabled=False)
+    batches = sizer.batches(docs("x" * 50, "y" * 50, "z"), 2)
+    assert contents(batches) == [["x" * 50, "y" * 50], ["z"]]
+    sizer.observe(5.0, True)
+    assert sizer.budget == 10
+
+
+def test_budget_read_per_batch():
+    sizer = make_sizer()
+    batches = sizer.batches(docs("aaaa", "bbbb", "cccc", "dddd"), 100)
+    assert contents([next(batches)]) == [["aaaa", "bbbb"]]
+    sizer.observe(0.0, True)
+    assert sizer.budget == 5
+    assert contents(batches) == [["cccc"], ["dddd"]]
+
+
+def test_observe_shrinks_on_rate_limit_and_slow_calls():
+    sizer = make_sizer(initial_tokens=16)
+    sizer.observe(0.1, True)
+    assert sizer.budget == 8
+    sizer.observe(2.0, False)
+    assert sizer.budget == 6
+    sizer.observe(0.1, True)
+    sizer.observe(0.1, True)
+    assert sizer.budget == 4
+    assert sizer.stats()["rate_limited"] == 3
+    assert sizer.stats()["slow_calls"] == 1
+
+
+def test_observe_grows_on_fast_calls_up_to_max():
+    sizer = make_sizer()
+    sizer.observe(0.1, False)
+    assert sizer.budget == 11
+    sizer.observe(0.7, False)  # between half the target and the target
+    assert sizer.budget == 11
+    for _ in range(20):
+        sizer.observe(0.1, False)
+    assert sizer.budget == 20
+
+
+def test_token_counter_by_provider():
+    assert get_token_counter(EmbeddingsProvider.OLLAMA, "nomic") is estimate_tokens
+    assert estimate_tokens("abcde") == 2
+    count = get_token_counter(EmbeddingsProvider.OPENAI, "text-embedding-3-small")
+    assert count("hello world") > 0
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.services.embedding_limiter import EmbeddingRateLimiter, is_rate_limit_error
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_is_rate_limit_error():
+    assert is_rate_limit_error(RateLimited("slow down"))
+    assert is_rate_limit_error(Exception("Error code: 429 - Too Many Requests"))
+    assert not is_rate_limit_error(ValueError("bad input"))
+
+
+def test_is_rate_limit_error_ignores_other_429_mentions():
+    class BadRequest(Exception):
+        status_code = 400
+
+    assert not is_rate_limit_error(BadRequest("rate limit for chunk 7"))
+    assert not is_rate_limit_error(ValueError("chunk 429 of 1429 is empty"))
+    assert is_rate_limit_error(RuntimeError("HTTP 429"))
+    assert is_rate_limit_error(RuntimeError("Rate limited, retry later"))
+
+
+@pytest.mark.asyncio
+async def test_limiter_bounds_concurrency():
+    limiter = EmbeddingRateLimiter(max_concurrency=2, max_retries=0, backoff=0)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def work():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await asyncio.gather(*(limiter.run(work) for _ in range(6)))
+    assert max_in_flight == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_retries_rate_limit_errors():
+    limiter = EmbeddingRateLimiter(max_concurrency=1, max_retries=2, backoff=0.001)
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RateLimited("429")
+        return "ok"
+
+    assert await limiter.run(flaky) == "ok"
+    assert attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_limiter_does_not_retry_other_errors():
+    limiter = EmbeddingRateLimiter(max_concurrency=1, max_retries=3, backoff=0.001)
+    attempts = 0
+
+    async def broken():
+        nonlocal attempts
+        attempts += 1
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        await limiter.run(broken)
+    assert attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_limiter_notifies_observers_of_each_attempt():
+    limiter = EmbeddingRateLimiter(max_concurrency=1, max_retries=1, backoff=0.001)
+    observed = []
+    limiter.add_observer(lambda duration, rate_limited: observed.append(rate_limited))
+    attempts = 0
+
+    async def flaky():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RateLimited("429")
+        return "ok"
+
+    assert await limiter.run(flaky) == "ok"
+    assert observed == [True, False]
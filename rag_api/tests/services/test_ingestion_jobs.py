@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+from app.services.ingestion_jobs import IngestionJob, IngestionJobQueue
+
+
+async def _wait_finished(queue, job_id):
+    for _ in range(100):
+        status = await queue.get(job_id)
+        if status["finished_at"] is not None:
+            return status
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_and_reports_progress():
+    queue = IngestionJobQueue(workers=1, max_size=4, retention=60)
+    cleaned = []
+
+    async def work(job):
+        job.set_stage("embedding")
+        job.batch_done(10)
+        job.batch_done(5)
+        job.set_num_batches(2)
+
+    async def cleanup():
+        cleaned.append(True)
+
+    job = IngestionJob("file-1", "user-1", "a.pdf")
+    assert queue.submit(job, work, cleanup)
+    status = await _wait_finished(queue, job.id)
+    await queue.stop()
+
+    assert status["status"] == status["stage"] == "completed"
+    assert (status["batches_done"], status["num_batches"]) == (2, 2)
+    assert status["chunks_done"] == 15
+    assert status["error"] is None
+    assert cleaned == [True]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error_and_cleans_up():
+    queue = IngestionJobQueue(workers=1, max_size=4, retention=60)
+    cleaned = []
+
+    async def work(job):
+        raise RuntimeError("provider down")
+
+    async def cleanup():
+        cleaned.append(True)
+
+    job = IngestionJob("file-1", "user-1", "a.pdf")
+    queue.submit(job, work, cleanup)
+    status = await _wait_finished(queue, job.id)
+    await queue.stop()
+
+    assert status["status"] == "failed"
+    assert status["error"] == "provider down"
+    assert cleaned == [True]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_jobs_and_stop_fails_queued_jobs():
+    queue = IngestionJobQueue(workers=1, max_size=1, retention=60)
+    release = asyncio.Event()
+    cleaned = []
+
+    async def blocking(job):
+        await release.wait()
+
+    async def cleanup():
+        cleaned.append(True)
+
+    running = IngestionJob("f1", "u", "a.txt")
+    queued = IngestionJob("f2", "u", "b.txt")
+    assert queue.submit(running, blocking, cleanup)
+    await asyncio.sleep(0.01)  # let the worker pick up the first job
+    assert queue.submit(queued, blocking, cleanup)
+    assert not queue.submit(IngestionJob("f3", "u", "c.txt"), blocking, cleanup)
+
+    stopping = asyncio.ensure_future(queue.stop())
+    await asyncio.sleep(0.01)
+    release.set()
+    await stopping
+
+    assert (await queue.get(running.id))["status"] == "completed"
+    assert (await queue.get(queued.id))["status"] == "failed"
+    assert len(cleaned) == 2
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_are_pruned_after_retention():
+    queue = IngestionJobQueue(workers=1, max_size=4, retention=0)
+
+    async def work(job):
+        pass
+
+    async def cleanup():
+        pass
+
+    job = IngestionJob("f1", "u", "a.txt")
+    queue.submit(job, work, cleanup)
+    await _wait_finished(queue, job.id)
+    queue.submit(IngestionJob("f2", "u", "b.txt"), work, cleanup)
+    await queue.stop()
+
+    assert await queue.get(job.id) is None
+
+
+@pytest.mark.asyncio
+async def test_status_publishes_are_referenced_until_written():
+    written = []
+    release = asyncio.Event()
+
+    class SlowRedis:
+        async def set(self, key, payload, ex=None):
+            await release.wait()
+            written.append(key)
+
+    queue = IngestionJobQueue(workers=1, max_size=4, retention=60)
+    queue._redis = SlowRedis()
+    queue._publish(IngestionJob("file-1", "user-1", "a.pdf"))
+
+    assert len(queue._publishes) == 1
+    release.set()
+    await asyncio.gather(*queue._publishes)
+    await asyncio.sleep(0)
+    assert written and not queue._publishes
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services.query_embedding_cache import QueryEmbeddingCache
+
+
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.data = {}
+        self.fail = fail
+
+    async def get(self, key):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.data[key] = value.encode("utf-8")
+
+
+def test_normalize_collapses_whitespace_and_case():
+    cache = QueryEmbeddingCache("openai:m", max_size=4, ttl=60)
+    assert cache.normalize("  What is\n the   Plan? ") == "what is the plan?"
+    cache.case_insensitive = False
+    assert cache.normalize("  What is\n the   Plan? ") == "What is the Plan?"
+
+
+@pytest.mark.asyncio
+async def test_equivalent_queries_share_an_entry():
+    cache = QueryEmbeddingCache("openai:m", max_size=4, ttl=60)
+    assert await cache.get("Hello  world") is None
+    await cache.set("Hello  world", [0.1, 0.2])
+
+    assert await cache.get("hello world") == [0.1, 0.2]
+    stats = cache.stats()
+    assert (stats["l1_hits"], stats["misses"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_entries_are_keyed_by_model():
+    redis = FakeRedis()
+    first = QueryEmbeddingCache("openai:a", max_size=4, ttl=60)
+    second = QueryEmbeddingCache("openai:b", max_size=4, ttl=60)
+    first._redis = second._redis = redis
+
+    await first.set("q", [1.0])
+    assert await second.get("q") is None
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(
+        "app.services.query_embedding_cache.time.monotonic", lambda: now[0]
+    )
+    cache = QueryEmbeddingCache("openai:m", max_size=2, ttl=10)
+    await cache.set("a", [1.0])
+    await cache.set("b", [2.0])
+    assert await cache.get("a") == [1.0]
+    await cache.set("c", [3.0])  # evicts "b", the least recently used
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == [1.0]
+
+    now[0] += 11
+    assert await cache.get("a") is None
+    assert cache.stats()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_shares_entries_across_workers():
+    redis = FakeRedis()
+    worker_a = QueryEmbeddingCache("openai:m", max_size=4, ttl=60)
+    worker_b = QueryEmbeddingCache("openai:m", max_size=4, ttl=60)
+    worker_a._redis = worker_b._redis = redis
+
+    await worker_a.set("shared question", [0.5, 0.25])
+    assert await worker_b.get("Shared  question") == [0.5, 0.25]
+    assert worker_b.stats()["l2_hits"] == 1
+
+    # The L2 hit was promoted into worker B's L1
+    assert await worker_b.get("shared question") == [0.5, 0.25]
+    assert worker_b.stats()["l1_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_misses():
+    cache = QueryEmbeddingCache("openai:m", max_size=0, ttl=60)
+    cache._redis = FakeRedis(fail=True)
+
+    await cache.set("q", [1.0])
+    assert await cache.get("q") is None
+    assert cache.stats()["errors"] == 2
@@ -0,0 +1,102 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.services.query_result_cache import QueryResultCache
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.redis.data[key] = self.redis.data.get(key, 0) + 1
+
+    async def execute(self):
+        return []
+
+
+class FakeRedis:
+    def __init__(self, fail=False):
+        self.data = {}
+        self.fail = fail
+
+    async def mget(self, keys):
+        if self.fail:
+            raise ConnectionError("redis down")
+        return [self.data.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+RESULTS = [(Document(page_content="answer", metadata={"file_id": "f1"}), 0.2)]
+
+
+@pytest.mark.asyncio
+async def test_hit_after_store_with_normalized_query_and_file_order():
+    cache = QueryResultCache(max_size=4, ttl=60)
+    entry_key, cached = await cache.lookup(["f1", "f2"], "Qué dice  el artículo?", 4)
+    assert cached is None
+    cache.store(entry_key, RESULTS)
+
+    _, cached = await cache.lookup(["f2", "f1"], "qué dice el artículo?", 4)
+    assert cached == RESULTS
+    # k is part of the key
+    _, cached = await cache.lookup(["f1", "f2"], "qué dice el artículo?", 5)
+    assert cached is None
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_entries_touching_the_file():
+    cache = QueryResultCache(max_size=4, ttl=60)
+    for file_ids in (["f1"], ["f1", "f2"], ["f3"]):
+        entry_key, _ = await cache.lookup(file_ids, "q", 4)
+        cache.store(entry_key, RESULTS)
+
+    await cache.invalidate(["f1"])
+
+    assert (await cache.lookup(["f1"], "q", 4))[1] is None
+    assert (await cache.lookup(["f1", "f2"], "q", 4))[1] is None
+    assert (await cache.lookup(["f3"], "q", 4))[1] == RESULTS
+
+
+@pytest.mark.asyncio
+async def test_results_computed_across_an_invalidation_are_not_stored():
+    cache = QueryResultCache(max_size=4, ttl=60)
+    entry_key, _ = await cache.lookup(["f1"], "q", 4)
+    await cache.invalidate(["f1"])
+    cache.store(entry_key, RESULTS)
+
+    assert (await cache.lookup(["f1"], "q", 4))[1] is None
+
+
+@pytest.mark.asyncio
+async def test_redis_versions_invalidate_other_workers():
+    redis = FakeRedis()
+    worker_a = QueryResultCache(max_size=4, ttl=60)
+    worker_b = QueryResultCache(max_size=4, ttl=60)
+    worker_a._redis = worker_b._redis = redis
+
+    entry_key, _ = await worker_b.lookup(["f1"], "q", 4)
+    worker_b.store(entry_key, RESULTS)
+    assert (await worker_b.lookup(["f1"], "q", 4))[1] == RESULTS
+
+    await worker_a.invalidate(["f1"])
+    assert (await worker_b.lookup(["f1"], "q", 4))[1] is None
+
+
+@pytest.mark.asyncio
+async def test_bypassed_when_disabled_or_versions_unavailable():
+    disabled = QueryResultCache(max_size=0, ttl=60)
+    assert await disabled.lookup(["f1"], "q", 4) == (None, None)
+
+    cache = QueryResultCache(max_size=4, ttl=60)
+    cache._redis = FakeRedis(fail=True)
+    assert await cache.lookup(["f1"], "q", 4) == (None, None)
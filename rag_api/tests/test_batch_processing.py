@@ -1,6 +1,6 @@
 # tests/test_batch_processing.py
 import pytest
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
+from unittest.mock import Mock, AsyncMock, patch, MagicMock, call
 from langchain_core.documents import Document
 
 
@@ -234,31 +234,6 @@ class TestBatchProcessing:
 class TestBatchConfiguration:
     """Test configuration and edge cases."""
 
-    def test_batch_calculation(self):
-        """Test batch count calculation using the utility function."""
-        from app.routes.document_routes import calculate_num_batches
-
-        # 10 docs, batch size 3 = 4 batches (3+3+3+1)
-        assert calculate_num_batches(10, 3) == 4
-
-        # Exact division
-        assert calculate_num_batches(9, 3) == 3
-
-        # Single item
-        assert calculate_num_batches(1, 3) == 1
-
-        # Zero items
-        assert calculate_num_batches(0, 3) == 0
-
-        # Batch size larger than total
-        assert calculate_num_batches(5, 10) == 1
-
-        # Edge case: batch_size of 0 returns 1 (fallback)
-        assert calculate_num_batches(10, 0) == 1
-
-        # Edge case: batch_size of 1
-        assert calculate_num_batches(5, 1) == 5
-
     def test_embedding_batch_size_from_env(self):
         """Test that EMBEDDING_BATCH_SIZE is read from environment variable."""
         import os
@@ -433,3 +408,730 @@ class TestProducerConsumerPattern:
 
         assert len(result) == 5
         assert result == ["id1", "id2", "id3", "id4", "id5"]
+
+
+class TestStreamingIngestion:
+    """Test that lazy document streams are consumed incrementally."""
+
+    @pytest.mark.asyncio
+    async def test_pipeline_consumes_generator_incrementally(self):
+        """Batches are embedded before the source stream is exhausted."""
+        from app.routes.document_routes import _process_documents_async_pipeline
+
+        produced = []
+        produced_at_first_insert = None
+
+        def stream():
+            for i in range(6):
+                produced.append(i)
+                yield Document(page_content=f"doc_{i}", metadata={})
+
+        async def tracking_add_documents(docs, ids=None, executor=None, **kwargs):
+            nonlocal produced_at_first_insert
+            if produced_at_first_insert is None:
+                produced_at_first_insert = len(produced)
+            return ids
+
+        mock_store = AsyncMock()
+        mock_store.aadd_documents = tracking_add_documents
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1), patch(
+            "app.routes.document_routes.EMBEDDING_MAX_QUEUE_SIZE", 1
+        ):
+            result = await _process_documents_async_pipeline(
+                documents=stream(), file_id="f", vector_store=mock_store, executor=None
+            )
+
+        assert result == ["f"] * 6
+        assert produced_at_first_insert < 6
+
+    @pytest.mark.asyncio
+    async def test_loader_failure_mid_stream_rolls_back(self):
+        """A loader error after some batches were stored rolls the file back."""
+        from app.routes.document_routes import (
+            DocumentLoadError,
+            _process_documents_async_pipeline,
+        )
+
+        def stream():
+            for i in range(4):
+                yield Document(page_content=f"doc_{i}", metadata={})
+            raise RuntimeError("corrupt page")
+
+        mock_store = AsyncMock()
+        mock_store.aadd_documents = AsyncMock(side_effect=lambda docs, ids, executor, **kwargs: ids)
+        mock_store.delete = AsyncMock()
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 2):
+            with pytest.raises(DocumentLoadError, match="corrupt page"):
+                await _process_documents_async_pipeline(
+                    documents=stream(),
+                    file_id="f",
+                    vector_store=mock_store,
+                    executor=None,
+                )
+
+        mock_store.delete.assert_called_once()
+
+    def test_iter_prepared_documents_matches_list_preparation(self):
+        """Page-by-page splitting yields the same chunks as whole-list splitting."""
+        from app.routes.document_routes import (
+            _iter_prepared_documents,
+            _prepare_documents_sync,
+        )
+
+        pages = [
+            Document(page_content="word " * 800, metadata={"page": i})
+            for i in range(3)
+        ]
+
+        streamed = list(_iter_prepared_documents(iter(pages), "f", "u", False))
+        prepared = _prepare_documents_sync(pages, "f", "u", False)
+
+        assert [d.page_content for d in streamed] == [
+            d.page_content for d in prepared
+        ]
+        assert len(streamed) > len(pages)
+
+
+class TestConcurrentConsumers:
+    """Test EMBEDDING_CONCURRENCY consumers in the async pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_batches_processed_concurrently_and_returned_in_order(self):
+        import asyncio
+        from app.routes.document_routes import _process_documents_async_pipeline
+        from app.services.embedding_limiter import EmbeddingRateLimiter
+
+        in_flight = 0
+        max_in_flight = 0
+
+        async def slow_add_documents(docs, ids=None, executor=None, **kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            # Later batches finish first to exercise result ordering
+            await asyncio.sleep(0.05 / int(docs[0].page_content.split("_")[1]))
+            in_flight -= 1
+            return [d.page_content for d in docs]
+
+        mock_store = AsyncMock()
+        mock_store.aadd_documents = slow_add_documents
+
+        docs = [Document(page_content=f"doc_{i}", metadata={}) for i in range(1, 7)]
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1), patch(
+            "app.routes.document_routes.EMBEDDING_CONCURRENCY", 3
+        ), patch(
+            "app.routes.document_routes.embedding_limiter",
+            EmbeddingRateLimiter(max_concurrency=3, max_retries=0, backoff=0),
+        ):
+            result = await _process_documents_async_pipeline(
+                documents=docs, file_id="f", vector_store=mock_store, executor=None
+            )
+
+        assert result == [f"doc_{i}" for i in range(1, 7)]
+        assert max_in_flight > 1
+
+    @pytest.mark.asyncio
+    async def test_failure_stops_remaining_batches_and_rolls_back(self):
+        from app.routes.document_routes import _process_documents_async_pipeline
+
+        calls = 0
+
+        async def failing_second(docs, ids=None, executor=None, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise ValueError("provider down")
+            return ids
+
+        mock_store = AsyncMock()
+        mock_store.aadd_documents = failing_second
+        mock_store.delete = AsyncMock()
+
+        docs = [Document(page_content=f"doc_{i}", metadata={}) for i in range(20)]
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1), patch(
+            "app.routes.document_routes.EMBEDDING_CONCURRENCY", 2
+        ):
+            with pytest.raises(ValueError, match="provider down"):
+                await _process_documents_async_pipeline(
+                    documents=docs, file_id="f", vector_store=mock_store, executor=None
+                )
+
+        assert calls < 20
+        mock_store.delete.assert_called_once()
+
+
+    @pytest.mark.asyncio
+    async def test_progress_reports_batches_and_rollback(self):
+        from app.routes.document_routes import _process_documents_async_pipeline
+        from app.services.ingestion_jobs import IngestionJob
+
+        calls = 0
+
+        async def failing_fourth(docs, ids=None, executor=None, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == 4:
+                raise ValueError("db down")
+            return ids
+
+        mock_store = AsyncMock()
+        mock_store.aadd_documents = failing_fourth
+        mock_store.delete = AsyncMock()
+        docs = [Document(page_content=f"doc_{i}", metadata={}) for i in range(5)]
+
+        ok = IngestionJob("f", "u", "a.txt")
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 2), patch(
+            "app.routes.document_routes.EMBEDDING_CONCURRENCY", 1
+        ):
+            await _process_documents_async_pipeline(
+                docs[:4], "f", mock_store, None, progress=ok
+            )
+            failed = IngestionJob("f", "u", "a.txt")
+            with pytest.raises(ValueError, match="db down"):
+                await _process_documents_async_pipeline(
+                    docs, "f", mock_store, None, progress=failed
+                )
+
+        assert (ok.batches_done, ok.num_batches, ok.chunks_done) == (2, 2, 4)
+        assert ok.stage == "embedding"
+        assert failed.stage == "rolling_back"
+        assert failed.batches_done == 1
+        mock_store.delete.assert_called_once()
+
+
+class TestEmbedInsertStages:
+    """Test the separate embed and insert stages of the async pipeline."""
+
+    @pytest.mark.asyncio
+    async def test_next_batch_embedded_while_previous_batch_inserted(self):
+        import asyncio
+        from app.routes.document_routes import _process_documents_async_pipeline
+
+        events = []
+
+        async def embed_documents(docs, executor=None):
+            events.append(("embed_start", docs[0].page_content))
+            await asyncio.sleep(0.01)
+            events.append(("embed_end", docs[0].page_content))
+            return [[0.1] for _ in docs]
+
+        async def add_documents(docs, ids=None, executor=None, embeddings=None):
+            assert embeddings == [[0.1] for _ in docs]
+            events.append(("insert_start", docs[0].page_content))
+            await asyncio.sleep(0.05)
+            events.append(("insert_end", docs[0].page_content))
+            return ids
+
+        mock_store = AsyncMock()
+        mock_store.aembed_documents = embed_documents
+        mock_store.aadd_documents = add_documents
+
+        docs = [Document(page_content=f"doc_{i}", metadata={}) for i in range(3)]
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1):
+            result = await _process_documents_async_pipeline(
+                documents=docs, file_id="f", vector_store=mock_store, executor=None
+            )
+
+        assert result == ["f", "f", "f"]
+        # Batch 2 finished embedding before batch 1 finished inserting
+        assert events.index(("embed_end", "doc_1")) < events.index(
+            ("insert_end", "doc_0")
+        )
+
+    @pytest.mark.asyncio
+    async def test_embed_failure_skips_insert_and_rolls_back(self):
+        import asyncio
+        from app.routes.document_routes import _process_documents_async_pipeline
+
+        calls = 0
+
+        async def embed_documents(docs, executor=None):
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                # Give the insert stage time to write batch 1 first
+                await asyncio.sleep(0.01)
+                raise ValueError("embedding failed")
+            return [[0.1] for _ in docs]
+
+        mock_store = AsyncMock()
+        mock_store.aembed_documents = embed_documents
+        mock_store.aadd_documents = AsyncMock(
+            side_effect=lambda docs, ids, executor, **kwargs: ids
+        )
+        mock_store.delete = AsyncMock()
+
+        docs = [Document(page_content=f"doc_{i}", metadata={}) for i in range(3)]
+
+        with patch("app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1):
+            with pytest.raises(ValueError, match="embedding failed"):
+                await _process_documents_async_pipeline(
+                    documents=docs, file_id="f", vector_store=mock_store, executor=None
+                )
+
+        assert mock_store.aadd_documents.call_count == 1
+        mock_store.delete.assert_called_once_with(ids=["f"], executor=None)
+
+
+class TestUploadDedup:
+    """Test whole-file dedup by upload content hash."""
+
+    @pytest.mark.asyncio
+    async def test_save_upload_returns_sha256(self, tmp_path):
+        import hashlib
+        import io
+        from fastapi import UploadFile
+        from app.routes.document_routes import save_upload_file_async
+
+        content = b"x" * (200 * 1024)
+        target = tmp_path / "upload.bin"
+        digest = await save_upload_file_async(
+            UploadFile(io.BytesIO(content), filename="upload.bin"), str(target)
+        )
+
+        assert digest == hashlib.sha256(content).hexdigest()
+        assert target.read_bytes() == content
+
+    @pytest.mark.asyncio
+    async def test_identical_upload_is_cloned_without_parsing(self):
+        from app.routes import document_routes
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        def stream():
+            raise AssertionError("an identical upload must not be parsed")
+            yield
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aclone_file_documents = AsyncMock(return_value=3)
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            result = await document_routes.store_data_in_vector_db(
+                stream(),
+                "new-file",
+                "user1",
+                file_sha256="abc",
+                source="/uploads/user1/new-file.pdf",
+            )
+
+        mock_store.aclone_file_documents.assert_awaited_once_with(
+            "abc",
+            "user1",
+            "new-file",
+            source="/uploads/user1/new-file.pdf",
+            executor=None,
+        )
+        assert result["ids"] == ["new-file"] * 3
+        mock_store.aadd_documents.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_new_upload_stores_hash_with_chunks(self):
+        from app.routes import document_routes
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        stored = []
+
+        async def add_documents(docs, ids=None, executor=None, **kwargs):
+            stored.extend(docs)
+            return ids
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aclone_file_documents = AsyncMock(return_value=0)
+        mock_store.aembed_documents = AsyncMock(
+            side_effect=lambda docs, executor=None: [[0.1] for _ in docs]
+        )
+        mock_store.aadd_documents = add_documents
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content="hello", metadata={})],
+                "f1",
+                "user1",
+                file_sha256="abc",
+            )
+
+        assert result["ids"] == ["f1"]
+        assert stored[0].metadata["file_sha256"] == "abc"
+        assert mock_store.aset_file_status.await_args_list == [
+            call("f1", "user1", "abc", False, executor=None),
+            call("f1", "user1", "abc", True, executor=None),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_is_not_marked_complete(self):
+        from app.routes import document_routes
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aclone_file_documents = AsyncMock(return_value=0)
+        mock_store.aembed_documents = AsyncMock(
+            side_effect=lambda docs, executor=None: [[0.1] for _ in docs]
+        )
+        mock_store.aadd_documents = AsyncMock(side_effect=ValueError("db down"))
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content="hello", metadata={})],
+                "f1",
+                "user1",
+                file_sha256="abc",
+            )
+
+        assert "error" in result
+        mock_store.aset_file_status.assert_awaited_once_with(
+            "f1", "user1", "abc", False, executor=None
+        )
+
+
+class TestResumableIngestion:
+    """Test resuming an interrupted ingestion from the chunks already stored."""
+
+    @staticmethod
+    def _store(stored_digests, inserted, fail_on_call=None):
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        calls = 0
+
+        async def add_documents(docs, ids=None, executor=None, **kwargs):
+            nonlocal calls
+            calls += 1
+            if calls == fail_on_call:
+                raise ValueError("rate limited")
+            inserted.extend(doc.page_content for doc in docs)
+            return ids
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aget_file_digests = AsyncMock(return_value=stored_digests)
+        mock_store.aembed_documents = AsyncMock(
+            side_effect=lambda docs, executor=None: [[0.1] for _ in docs]
+        )
+        mock_store.aadd_documents = add_documents
+        mock_store.aget_incomplete_file_ids = AsyncMock(return_value=set())
+        mock_store.delete = AsyncMock()
+        return mock_store
+
+    @pytest.mark.asyncio
+    async def test_resume_embeds_only_missing_chunks(self):
+        from app.routes import document_routes
+        from app.routes.document_routes import generate_digest
+
+        pages = ["a", "b", "a", "c"]
+        inserted = []
+        # The first "a" and "b" were stored before the interruption
+        mock_store = self._store([generate_digest("a"), generate_digest("b")], inserted)
+
+        with patch.object(document_routes, "vector_store", mock_store), patch(
+            "app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1
+        ):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content=p, metadata={}) for p in pages],
+                "f1",
+                "user1",
+                resume=True,
+            )
+
+        assert inserted == ["a", "c"]
+        assert result["ids"] == ["f1", "f1"]
+
+    @pytest.mark.asyncio
+    async def test_resume_failure_keeps_stored_batches(self):
+        from app.routes import document_routes
+
+        inserted = []
+        mock_store = self._store([], inserted, fail_on_call=3)
+
+        with patch.object(document_routes, "vector_store", mock_store), patch(
+            "app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1
+        ), patch("app.routes.document_routes.EMBEDDING_CONCURRENCY", 1):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content=p, metadata={}) for p in "abcd"],
+                "f1",
+                "user1",
+                resume=True,
+            )
+
+        assert "error" in result
+        assert inserted == ["a", "b"]
+        mock_store.delete.assert_not_called()
+        # The kept batches stay marked incomplete
+        mock_store.aset_file_status.assert_awaited_once_with(
+            "f1", "user1", None, False, executor=None
+        )
+
+    @pytest.mark.asyncio
+    async def test_submission_without_resume_removes_partial_chunks(self):
+        from app.routes import document_routes
+
+        inserted = []
+        mock_store = self._store([], inserted)
+        mock_store.aget_incomplete_file_ids = AsyncMock(return_value={"f1"})
+        mock_store.aclone_file_documents = AsyncMock(return_value=0)
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content=p, metadata={}) for p in "ab"],
+                "f1",
+                "user1",
+            )
+
+        assert result["ids"]
+        mock_store.delete.assert_awaited_once_with(ids=["f1"], executor=None)
+        assert inserted == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_resume_failure_rolls_back_without_file_status(self):
+        from app.routes import document_routes
+
+        inserted = []
+        mock_store = self._store([], inserted, fail_on_call=3)
+        mock_store.file_status_available = False
+
+        with patch.object(document_routes, "vector_store", mock_store), patch(
+            "app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1
+        ), patch("app.routes.document_routes.EMBEDDING_CONCURRENCY", 1):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content=p, metadata={}) for p in "abcd"],
+                "f1",
+                "user1",
+                resume=True,
+            )
+
+        assert "error" in result
+        mock_store.delete.assert_called_once()
+        mock_store.aset_file_status.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_incomplete_files_are_left_out_of_searches(self):
+        from app.routes import document_routes
+
+        mock_store = self._store([], [])
+        mock_store.aget_incomplete_file_ids = AsyncMock(return_value={"f2"})
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            file_ids = await document_routes._complete_file_ids(
+                ["f1", "f2", "f3"], None
+            )
+
+        assert file_ids == ["f1", "f3"]
+
+    @pytest.mark.asyncio
+    async def test_without_resume_failure_still_rolls_back(self):
+        from app.routes import document_routes
+
+        inserted = []
+        mock_store = self._store([], inserted, fail_on_call=3)
+
+        with patch.object(document_routes, "vector_store", mock_store), patch(
+            "app.routes.document_routes.EMBEDDING_BATCH_SIZE", 1
+        ), patch("app.routes.document_routes.EMBEDDING_CONCURRENCY", 1):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content=p, metadata={}) for p in "abcd"],
+                "f1",
+                "user1",
+            )
+
+        assert "error" in result
+        mock_store.aget_file_digests.assert_not_called()
+        mock_store.delete.assert_called_once()
+
+
+class TestIncrementalUpdate:
+    """Test re-embedding only the changed chunks of a new file version."""
+
+    @pytest.mark.asyncio
+    async def test_update_embeds_new_and_deletes_vanished_chunks(self):
+        from app.routes import document_routes
+        from app.routes.document_routes import generate_digest
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        def stored(uuid, text, **metadata):
+            return (
+                uuid,
+                {
+                    "file_id": "f1",
+                    "user_id": "user1",
+                    "digest": generate_digest(text),
+                    **metadata,
+                },
+            )
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aget_file_chunks = AsyncMock(
+            return_value=[
+                stored("u1", "intro", page=0),
+                stored("u2", "chapter", page=1),
+                stored("u3", "removed", page=2),
+            ]
+        )
+        mock_store.aembed_documents = AsyncMock(
+            side_effect=lambda docs, executor=None: [[0.1] for _ in docs]
+        )
+        mock_store.areplace_file_chunks = AsyncMock()
+
+        pages = [
+            Document(page_content="intro", metadata={"page": 0}),
+            Document(page_content="inserted", metadata={"page": 1}),
+            Document(page_content="chapter", metadata={"page": 2}),
+        ]
+        with patch.object(document_routes, "vector_store", mock_store):
+            result = await document_routes.store_data_in_vector_db(
+                pages, "f1", "user1", update=True
+            )
+
+        embedded = mock_store.aembed_documents.call_args.args[0]
+        assert [doc.page_content for doc in embedded] == ["inserted"]
+        args = mock_store.areplace_file_chunks.call_args.args
+        file_id, new_documents, embeddings, vanished, metadata_updates, _ = args
+        assert [doc.page_content for doc in new_documents] == ["inserted"]
+        assert embeddings == [[0.1]]
+        assert vanished == ["u3"]
+        # The kept chapter moved to page 2; its row is kept, its metadata refreshed
+        assert [(uuid, meta["page"]) for uuid, meta in metadata_updates] == [
+            ("u2", 2)
+        ]
+        assert (result["added"], result["deleted"], result["unchanged"]) == (1, 1, 2)
+        mock_store.aadd_documents.assert_not_called()
+
+    def test_new_upload_path_and_hash_do_not_update_kept_chunks(self):
+        from app.routes.document_routes import _diff_file_documents, generate_digest
+
+        def chunk(text, page, source, file_sha256):
+            return {
+                "file_id": "f1",
+                "digest": generate_digest(text),
+                "page": page,
+                "source": source,
+                "file_sha256": file_sha256,
+            }
+
+        old_source = "/uploads/user1/report-0f3a.pdf"
+        new_source = "/uploads/user1/report-9c1d.pdf"
+        stored = [
+            ("u1", chunk("intro", 0, old_source, "old")),
+            ("u2", chunk("chapter", 1, old_source, "old")),
+        ]
+        docs = [
+            Document(page_content=text, metadata=chunk(text, page, new_source, "new"))
+            for text, page in (("intro", 0), ("chapter", 1))
+        ]
+
+        new_documents, vanished, metadata_updates, kept, file_metadata = (
+            _diff_file_documents(docs, stored)
+        )
+
+        assert (new_documents, vanished, metadata_updates, kept) == ([], [], [], 2)
+        assert file_metadata == {
+            "file_id": "f1",
+            "source": new_source,
+            "file_sha256": "new",
+        }
+
+    @pytest.mark.asyncio
+    async def test_update_refreshes_file_hash_once_per_file(self):
+        from app.routes import document_routes
+        from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+        mock_store = MagicMock(spec=AsyncPgVector)
+        mock_store.aget_file_chunks = AsyncMock(return_value=[])
+        mock_store.aembed_documents = AsyncMock(
+            side_effect=lambda docs, executor=None: [[0.1] for _ in docs]
+        )
+        mock_store.areplace_file_chunks = AsyncMock()
+
+        with patch.object(document_routes, "vector_store", mock_store):
+            await document_routes.store_data_in_vector_db(
+                [Document(page_content="intro", metadata={})],
+                "f1",
+                "user1",
+                file_sha256="new",
+                update=True,
+            )
+
+        file_metadata = mock_store.areplace_file_chunks.call_args.args[5]
+        assert file_metadata["file_sha256"] == "new"
+
+    @pytest.mark.asyncio
+    async def test_update_requires_pgvector(self):
+        from app.routes import document_routes
+
+        with patch.object(document_routes, "vector_store", MagicMock()):
+            result = await document_routes.store_data_in_vector_db(
+                [Document(page_content="a", metadata={})], "f1", "user1", update=True
+            )
+
+        assert "pgvector" in result["error"]
+
+
+class TestZeroCopyUpload:
+    """Test parsing uploads from the request's spooled file."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [1024, 2 * 1024 * 1024])
+    async def test_text_upload_is_not_copied(self, tmp_path, size):
+        import hashlib
+        import mmap
+        from starlette.datastructures import UploadFile
+        from tempfile import SpooledTemporaryFile
+        from app.routes.document_routes import open_upload
+
+        content = b"a" * size
+        spooled = SpooledTemporaryFile(max_size=1024 * 1024)
+        spooled.write(content)
+        upload = UploadFile(spooled, filename="notes.txt")
+        target = tmp_path / "notes.txt"
+
+        async with open_upload(upload, str(target), None) as (buffer, digest):
+            assert bytes(buffer) == content
+            assert isinstance(buffer, mmap.mmap) == (size > 1024 * 1024)
+            assert digest == hashlib.sha256(content).hexdigest()
+
+        assert not target.exists()
+        if isinstance(buffer, mmap.mmap):
+            assert buffer.closed
+
+    @pytest.mark.asyncio
+    async def test_path_only_upload_is_copied(self, tmp_path):
+        import hashlib
+        import io
+        from starlette.datastructures import UploadFile
+        from app.routes.document_routes import open_upload
+
+        content = b"%PDF-1.4 ..."
+        upload = UploadFile(io.BytesIO(content), filename="report.pdf")
+        target = tmp_path / "report.pdf"
+
+        async with open_upload(upload, str(target), None) as (buffer, digest):
+            assert buffer is None
+            assert target.read_bytes() == content
+            assert digest == hashlib.sha256(content).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_upload_hash_can_be_skipped(self, tmp_path):
+        import io
+        from starlette.datastructures import UploadFile
+        from app.routes.document_routes import open_upload
+
+        for name in ("notes.txt", "report.pdf"):
+            upload = UploadFile(io.BytesIO(b"hello"), filename=name)
+            async with open_upload(
+                upload, str(tmp_path / name), None, hash_content=False
+            ) as (_, digest):
+                assert digest is None
+
+    @pytest.mark.asyncio
+    async def test_zero_copy_can_be_disabled(self, tmp_path):
+        import io
+        from starlette.datastructures import UploadFile
+        from app.routes.document_routes import open_upload
+
+        upload = UploadFile(io.BytesIO(b"hello"), filename="notes.txt")
+        target = tmp_path / "notes.txt"
+
+        with patch("app.routes.document_routes.UPLOAD_ZERO_COPY_ENABLED", False):
+            async with open_upload(upload, str(target), None) as (buffer, _):
+                assert buffer is None
+                assert target.read_bytes() == b"hello"
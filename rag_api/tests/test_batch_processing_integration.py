@@ -30,7 +30,7 @@ class TestMemoryOptimization:
         max_docs_in_memory = 0
         current_docs_in_memory = 0
 
-        async def tracking_add_documents(docs, ids=None, executor=None):
+        async def tracking_add_documents(docs, ids=None, executor=None, **kwargs):
             nonlocal max_docs_in_memory, current_docs_in_memory
             current_docs_in_memory = len(docs)
             max_docs_in_memory = max(max_docs_in_memory, current_docs_in_memory)
@@ -109,7 +109,7 @@ class TestMemoryOptimization:
 
         call_order = []
 
-        async def ordered_add_documents(docs, ids=None, executor=None):
+        async def ordered_add_documents(docs, ids=None, executor=None, **kwargs):
             batch_ids = [f"id_{docs[0].metadata['idx']}_to_{docs[-1].metadata['idx']}"]
             call_order.append(docs[0].metadata["idx"])
             return [f"id_{d.metadata['idx']}" for d in docs]
@@ -183,7 +183,7 @@ class TestBatchProcessingResilience:
 
         inserted_batches = []
 
-        async def failing_add_documents(docs, ids=None, executor=None):
+        async def failing_add_documents(docs, ids=None, executor=None, **kwargs):
             batch_num = len(inserted_batches) + 1
             if batch_num == 3:  # Fail on third batch
                 raise Exception("Simulated DB error")
@@ -219,7 +219,7 @@ class TestBatchProcessingResilience:
         """Test that rollback uses the correct file_id."""
         from app.routes.document_routes import _process_documents_async_pipeline
 
-        async def failing_on_second(docs, ids=None, executor=None):
+        async def failing_on_second(docs, ids=None, executor=None, **kwargs):
             if len(docs) > 0 and docs[0].metadata.get("idx", 0) >= 5:
                 raise Exception("Fail")
             return ["id1"]
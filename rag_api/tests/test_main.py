@@ -31,14 +31,15 @@ def override_vector_store(monkeypatch):
     from app.services.vector_store.async_pg_vector import AsyncPgVector
     from app.routes import document_routes
 
-    # Clear the LRU cache and patch the cached function to return dummy embeddings
-    document_routes.get_cached_query_embedding.cache_clear()
+    # Clear the query embedding cache and patch the lookup to return dummy embeddings
+    document_routes.query_embedding_cache.clear()
+    document_routes.query_result_cache.clear()
 
-    def dummy_get_cached_query_embedding(query):
+    async def dummy_get_query_embedding(query, executor):
         return [0.1, 0.2, 0.3]
 
     monkeypatch.setattr(
-        document_routes, "get_cached_query_embedding", dummy_get_cached_query_embedding
+        document_routes, "get_query_embedding", dummy_get_query_embedding
     )
 
     # Initialize thread pool for tests since TestClient doesn't run lifespan
@@ -116,12 +117,17 @@ def override_vector_store(monkeypatch):
     def dummy_add_documents(self, docs, ids):
         return ids
 
-    async def dummy_aadd_documents(self, docs, ids=None, executor=None):
+    async def dummy_aadd_documents(self, docs, ids=None, executor=None, **kwargs):
         return ids
 
     monkeypatch.setattr(AsyncPgVector, "add_documents", dummy_add_documents)
     monkeypatch.setattr(AsyncPgVector, "aadd_documents", dummy_aadd_documents)
 
+    async def dummy_aembed_documents(self, docs, executor=None):
+        return [[0.1, 0.2, 0.3] for _ in docs]
+
+    monkeypatch.setattr(AsyncPgVector, "aembed_documents", dummy_aembed_documents)
+
     # Override delete function.
     async def dummy_delete(self, ids=None, collection_only=False, executor=None):
         return None
@@ -211,6 +217,56 @@ def test_embed_file(tmp_path, auth_headers):
     assert json_data["file_id"] == "testid1"
 
 
+def test_embed_file_async_queues_a_job(tmp_path, auth_headers, monkeypatch):
+    submitted = []
+
+    def submit(job, work, cleanup):
+        submitted.append((job, cleanup))
+        return True
+
+    monkeypatch.setattr(document_routes.ingestion_jobs, "submit", submit)
+    test_file = tmp_path / "test_embed.txt"
+    test_file.write_text("Background ingestion.")
+    with test_file.open("rb") as f:
+        response = client.post(
+            "/embed?async=true",
+            data={"file_id": "testid1", "entity_id": "testuser"},
+            files={"file": ("test_embed.txt", f, "text/plain")},
+            headers=auth_headers,
+        )
+    assert response.status_code == 202, f"Response: {response.text}"
+    job, cleanup = submitted[0]
+    assert response.json()["job_id"] == job.id
+    # The upload copy outlives the request; the job removes it when done
+    assert len(cleanup.args) == 1 and os.path.exists(cleanup.args[0])
+    os.remove(cleanup.args[0])
+
+    monkeypatch.setitem(document_routes.ingestion_jobs._jobs, job.id, job)
+    response = client.get(f"/jobs/{job.id}?entity_id=testuser", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "queued"
+    response = client.get(f"/jobs/{job.id}?entity_id=other", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_embed_file_async_rejected_when_queue_full(
+    tmp_path, auth_headers, monkeypatch
+):
+    monkeypatch.setattr(
+        document_routes.ingestion_jobs, "submit", lambda job, work, cleanup: False
+    )
+    test_file = tmp_path / "test_embed.txt"
+    test_file.write_text("Background ingestion.")
+    with test_file.open("rb") as f:
+        response = client.post(
+            "/embed?async=true",
+            data={"file_id": "testid1", "entity_id": "testuser"},
+            files={"file": ("test_embed.txt", f, "text/plain")},
+            headers=auth_headers,
+        )
+    assert response.status_code == 503
+
+
 def test_load_document_context(auth_headers):
     response = client.get("/documents/testid1/context", headers=auth_headers)
     assert response.status_code == 200, f"Response: {response.text}"
@@ -251,6 +307,97 @@ def test_query_multiple(auth_headers):
         assert doc["page_content"] == "Queried content"
 
 
+def test_query_batch(auth_headers, monkeypatch):
+    from app.routes import document_routes
+    from app.services.vector_store.async_pg_vector import AsyncPgVector
+
+    embedded = []
+
+    class BatchEmbedding:
+        def embed_documents(self, texts):
+            raise AssertionError("queries must not be embedded as documents")
+
+    async def recording_get_query_embedding(query, executor):
+        embedded.append(query)
+        return [0.1, 0.2, 0.3]
+
+    async def dummy_exact_matches_multiple(
+        self, query, file_ids, limit=5, executor=None
+    ):
+        return []
+
+    # The store the route uses; app.config may have been reloaded by other tests
+    monkeypatch.setattr(
+        document_routes.vector_store, "embedding_function", BatchEmbedding()
+    )
+    monkeypatch.setattr(
+        AsyncPgVector, "_aget_exact_matches_multiple", dummy_exact_matches_multiple
+    )
+    monkeypatch.setattr(
+        document_routes, "get_query_embedding", recording_get_query_embedding
+    )
+
+    data = {
+        "items": [
+            {"query": "first", "file_ids": ["testid1"], "k": 2},
+            {"query": "second", "file_ids": ["testid1", "testid2"]},
+            {"query": "first", "file_ids": ["testid2"]},
+        ]
+    }
+    response = client.post("/query_batch", json=data, headers=auth_headers)
+    assert response.status_code == 200, f"Response: {response.text}"
+    json_data = response.json()
+    assert len(json_data) == 3
+    assert json_data[0][0][0]["page_content"] == "Queried content"
+    # Every item goes through the query embedding path, never embed_documents
+    assert sorted(embedded) == ["first", "first", "second"]
+
+
+def test_query_results_are_cached_until_file_is_deleted(auth_headers, monkeypatch):
+    searches = []
+    monkeypatch.setattr(document_routes.query_result_cache, "max_size", 16)
+
+    async def counting_search(
+        query, k, exact_search, vector_filter, executor, embedding=None
+    ):
+        searches.append(query)
+        doc = Document(page_content="Cached content", metadata={"file_id": "testid1"})
+        return [(doc, 0.1)]
+
+    monkeypatch.setattr(document_routes, "_search_exact_and_vector", counting_search)
+    data = {"query": "What is  this?", "file_id": "testid1", "k": 4}
+
+    first = client.post("/query", json=data, headers=auth_headers)
+    second = client.post(
+        "/query", json={**data, "query": "what is this?"}, headers=auth_headers
+    )
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(searches) == 1
+
+    response = client.request(
+        "DELETE", "/documents", json=["testid1"], headers=auth_headers
+    )
+    assert response.status_code == 200
+    client.post("/query", json=data, headers=auth_headers)
+    assert len(searches) == 2
+
+
+def test_cache_stats(auth_headers):
+    response = client.get("/cache/stats", headers=auth_headers)
+    assert response.status_code == 200
+    stats = response.json()["query_embeddings"]
+    assert stats["misses"] == 0
+    assert stats["hit_rate"] == 0.0
+    assert "budget_tokens" in response.json()["embedding_batches"]
+
+
+def test_query_batch_too_many_items(auth_headers):
+    data = {"items": [{"query": "q", "file_ids": ["testid1"]}] * 1000}
+    response = client.post("/query_batch", json=data, headers=auth_headers)
+    assert response.status_code == 400
+
+
 def test_extract_text_from_file(tmp_path, auth_headers):
     """Test the /text endpoint for text extraction without embeddings."""
     file_content = "This is a test file for text extraction.\nIt has multiple lines.\nAnd should be extracted properly."
@@ -0,0 +1,142 @@
+"""Tests for the exact-match + vector search stage of /query and /query_multiple."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.documents import Document
+
+from app.routes import document_routes
+from app.routes.document_routes import _merge_search_results, _search_exact_and_vector
+
+
+def test_merge_search_results_exact_first_deduplicated_and_trimmed():
+    exact = [(Document(page_content="a"), 0.0)]
+    vector = [
+        (Document(page_content="a"), 0.1),
+        (Document(page_content="b"), 0.2),
+        (Document(page_content="c"), 0.3),
+    ]
+    merged = _merge_search_results(exact, vector, k=2)
+    assert [(d.page_content, s) for d, s in merged] == [("a", 0.0), ("b", 0.2)]
+
+
+@pytest.mark.asyncio
+async def test_exact_match_overlaps_embedding_and_vector_search():
+    events = []
+
+    async def exact_search():
+        events.append("exact_start")
+        await asyncio.sleep(0.05)
+        events.append("exact_end")
+        return [(Document(page_content="exact"), 0.0)]
+
+    async def embed_query(query, executor):
+        events.append("embed")
+        await asyncio.sleep(0.02)
+        return [0.1, 0.2]
+
+    class FakeStore:
+        hybrid_search_available = False
+
+        async def asimilarity_search_with_score_by_vector(
+            self, embedding, k, filter, executor
+        ):
+            assert embedding == [0.1, 0.2]
+            assert filter == {"file_id": {"$eq": "f1"}}
+            events.append("vector")
+            return [(Document(page_content="vector"), 0.4)]
+
+    with ThreadPoolExecutor(max_workers=2) as executor, patch.object(
+        document_routes, "get_query_embedding", embed_query
+    ), patch.object(document_routes, "vector_store", FakeStore()):
+        documents = await _search_exact_and_vector(
+            "q", 4, exact_search, {"file_id": {"$eq": "f1"}}, executor
+        )
+
+    assert [d.page_content for d, _ in documents] == ["exact", "vector"]
+    # The vector search ran while the exact-match query was still in flight
+    assert events.index("vector") < events.index("exact_end")
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_replaces_exact_and_vector_search():
+    calls = []
+
+    async def exact_search():
+        raise AssertionError("exact-match search must not run in hybrid mode")
+
+    class FakeStore:
+        hybrid_search_available = True
+
+        async def ahybrid_search_with_score_by_vector(
+            self, query, embedding, k, filter, executor
+        ):
+            calls.append((query, embedding, k, filter))
+            return [(Document(page_content="fused"), 0.0)]
+
+    with ThreadPoolExecutor(max_workers=1) as executor, patch.object(
+        document_routes, "get_query_embedding", AsyncMock(return_value=[0.5])
+    ), patch.object(document_routes, "vector_store", FakeStore()):
+        documents = await _search_exact_and_vector(
+            "q", 3, exact_search, {"file_id": {"$in": ["f1"]}}, executor
+        )
+
+    assert [d.page_content for d, _ in documents] == ["fused"]
+    assert calls == [("q", [0.5], 3, {"file_id": {"$in": ["f1"]}})]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_share_one_provider_call(monkeypatch):
+    calls = []
+
+    class SlowEmbedding:
+        def embed_query(self, query):
+            calls.append(query)
+            time.sleep(0.05)
+            return [0.3]
+
+    class FakeStore:
+        embedding_function = SlowEmbedding()
+
+    monkeypatch.setattr(document_routes, "vector_store", FakeStore())
+    document_routes.query_embedding_cache.clear()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = await asyncio.gather(
+            *(
+                document_routes.get_query_embedding(query, executor)
+                for query in ["Same question", "same  question", "Same question"]
+            )
+        )
+
+    assert results == [[0.3]] * 3
+    assert calls == ["same question"]
+    assert not document_routes._pending_query_embeddings
+    document_routes.query_embedding_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_native_async_embedding_skips_the_thread_pool(monkeypatch):
+    from langchain_core.embeddings import Embeddings
+
+    class AsyncEmbedding(Embeddings):
+        def embed_documents(self, texts):
+            raise AssertionError("sync path must not be used")
+
+        def embed_query(self, text):
+            raise AssertionError("sync path must not be used")
+
+        async def aembed_query(self, text):
+            return [0.7]
+
+    class FakeStore:
+        embedding_function = AsyncEmbedding()
+
+    monkeypatch.setattr(document_routes, "vector_store", FakeStore())
+    document_routes.query_embedding_cache.clear()
+
+    assert await document_routes.get_query_embedding("q", executor=None) == [0.7]
+    document_routes.query_embedding_cache.clear()
@@ -2,7 +2,12 @@ import os
 from collections.abc import Iterator
 from unittest.mock import MagicMock, patch
 
-from app.utils.document_loader import get_loader, clean_text, process_documents
+from app.utils.document_loader import (
+    get_loader,
+    clean_text,
+    lazy_load_documents,
+    process_documents,
+)
 from langchain_core.documents import Document
 
 
@@ -167,3 +172,346 @@ def test_safe_pdf_loader_non_filter_error_propagates():
 
         with pytest.raises(KeyError, match="SomeOtherKey"):
             list(loader.lazy_load())
+
+
+def test_lazy_load_documents_routes_cpu_heavy_loaders_to_process_pool(
+    tmp_path, monkeypatch
+):
+    """PDF loaders are submitted to the process pool on first iteration; text streams inline."""
+    from concurrent.futures import Future
+    from app.utils import document_loader
+    from app.utils.document_loader import SafePyPDFLoader, load_strategy_in_worker
+
+    # Without a strategy deadline, strategies run as pool tasks
+    monkeypatch.setattr(document_loader, "LOADER_STRATEGY_TIMEOUT", 0)
+
+    submitted = []
+
+    class RecordingPool:
+        def submit(self, fn, *args):
+            submitted.append((fn, args))
+            future = Future()
+            future.set_result([Document(page_content="parsed in worker")])
+            return future
+
+    pdf_loader = SafePyPDFLoader("dummy.pdf")
+    documents = lazy_load_documents(pdf_loader, RecordingPool())
+    assert isinstance(documents, Iterator)
+    assert submitted == []  # nothing is parsed until the stream is consumed
+    assert [d.page_content for d in documents] == ["parsed in worker"]
+    assert submitted == [(load_strategy_in_worker, (pdf_loader, "PyMuPDFLoader"))]
+
+    file_path = tmp_path / "plain.txt"
+    file_path.write_text("Sample text")
+    text_loader, _, _ = get_loader("plain.txt", "text/plain", str(file_path))
+    docs = list(lazy_load_documents(text_loader, RecordingPool()))
+    assert docs[0].page_content == "Sample text"
+    assert len(submitted) == 1
+
+
+def test_extract_pdf_pages_matches_pymupdf_loader(tmp_path):
+    """Page ranges extracted for page-parallel loading carry the same text and
+    metadata as the corresponding pages of the sequential PyMuPDFLoader."""
+    import pytest
+
+    pymupdf = pytest.importorskip("pymupdf")
+    from langchain_community.document_loaders import PyMuPDFLoader
+    from app.utils.document_loader import extract_pdf_pages
+
+    file_path = str(tmp_path / "report.pdf")
+    with pymupdf.open() as doc:
+        for number in range(4):
+            doc.new_page().insert_text((72, 72), f"Page {number} text")
+        doc.set_metadata(
+            {
+                "title": " Quarterly report ",
+                "author": "Finance",
+                "creationDate": "D:20240102030405+01'00'",
+                "modDate": "not a date",
+            }
+        )
+        doc.save(file_path)
+
+    expected = PyMuPDFLoader(file_path).load()
+    assert extract_pdf_pages(file_path, 1, 3) == expected[1:3]
+    assert extract_pdf_pages(file_path, 3, 10) == expected[3:]
+
+
+def test_page_parallel_failure_falls_back_to_whole_file_load(monkeypatch):
+    """A failure before any page was yielded is replaced by one whole-file load;
+    a later one is raised rather than merged with fallback pages."""
+    import pytest
+    from concurrent.futures import Future
+    from app.utils import document_loader
+    from app.utils.document_loader import SafePyPDFLoader, extract_pdf_pages
+
+    class RangePool:
+        def __init__(self, broken_start):
+            self.broken_start = broken_start
+
+        def submit(self, fn, *args):
+            future = Future()
+            if fn is extract_pdf_pages:
+                _, start, stop = args
+                if start == self.broken_start:
+                    future.set_exception(RuntimeError("broken page"))
+                else:
+                    future.set_result(
+                        [Document(page_content=f"p{start}", metadata={"page": start})]
+                    )
+            else:
+                # Unstructured-style fallback output without page numbers
+                future.set_result([Document(page_content="whole file")])
+            return future
+
+    monkeypatch.setattr(document_loader, "LOADER_STRATEGY_TIMEOUT", 0)
+    monkeypatch.setattr(
+        document_loader, "loader_verdicts", document_loader.LoaderVerdictCache(8)
+    )
+    loader = SafePyPDFLoader("dummy.pdf")
+    loader._signature = "sig"
+    documents = list(
+        document_loader._load_pdf_pages_in_process(
+            loader, [(0, 1), (1, 2)], RangePool(broken_start=0)
+        )
+    )
+    assert [d.page_content for d in documents] == ["whole file"]
+
+    pages = document_loader._load_pdf_pages_in_process(
+        loader, [(0, 1), (1, 2)], RangePool(broken_start=1)
+    )
+    assert next(pages).page_content == "p0"
+    with pytest.raises(RuntimeError, match="broken page"):
+        next(pages)
+
+
+def test_page_parallel_ranges_stream_in_order(monkeypatch):
+    """Ranges are yielded as they finish, a bounded number ahead."""
+    from concurrent.futures import Future
+    from app.utils import document_loader
+    from app.utils.document_loader import SafePyPDFLoader
+
+    submitted = []
+
+    class RangePool:
+        def submit(self, fn, filepath, start, stop):
+            submitted.append(start)
+            future = Future()
+            future.set_result([Document(page_content=f"p{start}")])
+            return future
+
+    monkeypatch.setattr(document_loader, "PDF_PARALLEL_RANGES_IN_FLIGHT", 2)
+    loader = SafePyPDFLoader("dummy.pdf")
+    loader._signature = "sig"
+    pages = document_loader._load_pdf_pages_in_process(
+        loader, [(0, 1), (1, 2), (2, 3), (3, 4)], RangePool()
+    )
+    assert next(pages).page_content == "p0"
+    assert submitted == [0, 1, 2]
+    assert [d.page_content for d in pages] == ["p1", "p2", "p3"]
+
+
+def test_fallback_chain_streams_pages(tmp_path, monkeypatch):
+    """Pages are yielded as the strategy produces them; fallback only before the first."""
+    import pytest
+    from app.utils import document_loader
+
+    monkeypatch.setattr(
+        document_loader, "loader_verdicts", document_loader.LoaderVerdictCache(8)
+    )
+    log = []
+
+    def streaming():
+        yield Document(page_content="page 0")
+        log.append("after first page")
+        yield Document(page_content="page 1")
+
+    def broken_midway():
+        yield Document(page_content="partial")
+        raise ValueError("truncated")
+
+    def broken():
+        raise ValueError("cannot parse")
+
+    loader = _chain_loader(
+        tmp_path, "a.pdf", [("broken", broken), ("streaming", streaming)], []
+    )
+    pages = loader.lazy_load()
+    assert next(pages).page_content == "page 0"
+    assert log == []
+    assert [d.page_content for d in pages] == ["page 1"]
+    assert loader.strategy_used == "streaming"
+
+    loader = _chain_loader(
+        tmp_path,
+        "b.pdf",
+        [("broken_midway", broken_midway), ("streaming", streaming)],
+        [],
+    )
+    loader._signature = "other content"
+    pages = loader.lazy_load()
+    assert next(pages).page_content == "partial"
+    with pytest.raises(ValueError, match="truncated"):
+        next(pages)
+
+
+def test_pdf_extraction_is_serialized_in_threads_only(tmp_path):
+    """PyMuPDF is not thread-safe: in-thread PDF extraction holds the lock."""
+    from app.utils import document_loader
+    from app.utils.document_loader import SafePyPDFLoader, load_strategy_in_worker
+
+    held = []
+    loader = SafePyPDFLoader("dummy.pdf")
+    loader._strategies = lambda: [
+        (
+            "PyMuPDFLoader",
+            lambda: held.append(document_loader.pdf_extraction_lock.locked())
+            or [Document(page_content="page")],
+        )
+    ]
+    loader._signature = "sig"
+
+    loader.load()
+    load_strategy_in_worker(loader, "PyMuPDFLoader")
+    assert held == [True, False]
+
+
+def test_loader_processes_are_not_forked():
+    """Parsing processes must not be forked from the threaded server process."""
+    from app.utils import document_loader
+
+    assert document_loader.loader_mp_context.get_start_method() in (
+        "forkserver",
+        "spawn",
+    )
+
+
+def _chain_loader(tmp_path, name, strategies, log):
+    """A FallbackChainLoader over a real file whose strategies are stubs."""
+    from app.utils.document_loader import FallbackChainLoader
+
+    file_path = tmp_path / name
+    file_path.write_bytes(b"same broken template")
+
+    class StubLoader(FallbackChainLoader):
+        def _strategies(self):
+            def make(strategy_name, outcome):
+                def load():
+                    log.append(strategy_name)
+                    return outcome()
+
+                return strategy_name, load
+
+            return [make(n, outcome) for n, outcome in strategies]
+
+    return StubLoader(str(file_path))
+
+
+def test_fallback_chain_starts_with_last_successful_strategy(tmp_path, monkeypatch):
+    from app.utils import document_loader
+
+    monkeypatch.setattr(
+        document_loader, "loader_verdicts", document_loader.LoaderVerdictCache(8)
+    )
+    log = []
+
+    def broken():
+        raise ValueError("cannot parse")
+
+    strategies = [
+        ("first", broken),
+        ("second", lambda: [Document(page_content="ok")]),
+    ]
+
+    loader = _chain_loader(tmp_path, "a.pdf", strategies, log)
+    assert [d.page_content for d in loader.load()] == ["ok"]
+    assert log == ["first", "second"]
+    assert loader.strategy_used == "second"
+
+    # Same content uploaded again: the failing strategy is skipped
+    log.clear()
+    again = _chain_loader(tmp_path, "b.pdf", strategies, log)
+    assert [d.page_content for d in again.load()] == ["ok"]
+    assert log == ["second"]
+
+
+def test_fallback_chain_time_budget(tmp_path, monkeypatch):
+    """A strategy over budget is killed and the next one is tried."""
+    import multiprocessing
+    import time
+    from app.utils import document_loader
+
+    # Fork keeps the stub strategies below usable in the child
+    monkeypatch.setattr(
+        document_loader, "loader_mp_context", multiprocessing.get_context("fork")
+    )
+    monkeypatch.setattr(document_loader, "LOADER_STRATEGY_TIMEOUT", 0.3)
+    monkeypatch.setattr(
+        document_loader, "loader_verdicts", document_loader.LoaderVerdictCache(8)
+    )
+    marker = tmp_path / "hung-finished"
+
+    def hung():
+        time.sleep(1.0)
+        marker.write_text("still running")
+        return [Document(page_content="hung")]
+
+    def broken():
+        raise ValueError("cannot parse")
+
+    loader = _chain_loader(
+        tmp_path,
+        "hung.pdf",
+        [
+            ("hung", hung),
+            ("broken", broken),
+            ("fast", lambda: [Document(page_content="fast")]),
+        ],
+        [],
+    )
+    started = time.monotonic()
+    documents = document_loader._load_chain_in_process(loader, None)
+    assert [d.page_content for d in documents] == ["fast"]
+    assert time.monotonic() - started < 1.0
+    assert loader.strategy_used == "fast"
+    assert document_loader.loader_verdicts.get(loader.signature()) == "fast"
+
+    # The hung strategy's process was killed, not left running
+    time.sleep(1.2)
+    assert not marker.exists()
+
+
+def test_get_loader_parses_text_from_buffer(tmp_path):
+    """Text types are parsed from a buffer like TextLoader parses the file."""
+    import mmap
+
+    content = "Größe: 10 €\nzweite Zeile".encode("latin-1", "replace")
+    file_path = tmp_path / "notes.txt"
+    file_path.write_bytes(content)
+    from_file = get_loader("notes.txt", "text/plain", str(file_path))[0].load()
+
+    with open(file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        for buffer in (content, mapped):
+            loader, known_type, _ = get_loader(
+                "notes.txt", "text/plain", str(file_path), buffer=buffer
+            )
+            docs = loader.load()
+            assert known_type is True
+            assert docs[0].page_content == from_file[0].page_content
+            assert docs[0].metadata == {"source": str(file_path)}
+
+
+def test_get_loader_ignores_buffer_for_path_only_types(tmp_path):
+    from app.utils.document_loader import SafePyPDFLoader, supports_buffer
+
+    assert supports_buffer("data.json", "application/json")
+    assert supports_buffer("main.py", "")
+    assert not supports_buffer("report.pdf", "application/pdf")
+    assert not supports_buffer("table.csv", "text/csv")
+
+    loader, _, _ = get_loader(
+        "report.pdf", "application/pdf", str(tmp_path / "report.pdf"), buffer=b"%PDF"
+    )
+    assert isinstance(loader, SafePyPDFLoader)
@@ -17,7 +17,7 @@ from collections.abc import Iterator
 import pytest
 from langchain_core.documents import Document
 
-from app.utils.document_loader import get_loader, SafePyPDFLoader
+from app.utils.document_loader import get_loader, lazy_load_documents, SafePyPDFLoader
 
 # ---------------------------------------------------------------------------
 # Environment checks — these deps aren't guaranteed in every CI runner
@@ -402,6 +402,76 @@ def test_safe_pdf_loader_lazy_load_is_iterator(tmp_path):
     assert len(docs) > 0
 
 
+def test_safe_pdf_loader_parses_concurrently_in_process_pool(tmp_path, monkeypatch):
+    """PDFs are parsed in worker processes, several at a time, with no global lock."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    from app.utils import document_loader
+
+    # Forked like the pool below, so children keep the test's patched config
+    monkeypatch.setattr(
+        document_loader, "loader_mp_context", multiprocessing.get_context("fork")
+    )
+
+    paths = []
+    for i in range(3):
+        pdf_path = tmp_path / f"pool_{i}.pdf"
+        _make_pdf(str(pdf_path), num_pages=2)
+        paths.append(str(pdf_path))
+
+    with ProcessPoolExecutor(max_workers=2) as process_pool, ThreadPoolExecutor(
+        max_workers=3
+    ) as threads:
+        results = list(
+            threads.map(
+                lambda path: list(
+                    lazy_load_documents(
+                        SafePyPDFLoader(path, extract_images=False), process_pool
+                    )
+                ),
+                paths,
+            )
+        )
+
+    expected = SafePyPDFLoader(paths[0], extract_images=False).load()
+    assert [d.page_content for d in results[0]] == [
+        d.page_content for d in expected
+    ]
+    assert all(len(docs) == len(expected) for docs in results)
+
+
+def test_page_parallel_pdf_extraction_matches_sequential(tmp_path, monkeypatch):
+    """Page ranges extracted in worker processes merge back in order with page metadata."""
+    from concurrent.futures import ProcessPoolExecutor
+    from app.utils import document_loader
+
+    monkeypatch.setattr(document_loader, "PDF_PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(document_loader, "PDF_PARALLEL_PAGES_PER_TASK", 2)
+    pdf_path = tmp_path / "large.pdf"
+    _make_pdf(str(pdf_path), num_pages=7)
+    loader = SafePyPDFLoader(str(pdf_path), extract_images=False)
+
+    assert loader.parallel_page_ranges() == [(0, 2), (2, 4), (4, 6), (6, 7)]
+    with ProcessPoolExecutor(max_workers=2) as process_pool:
+        parallel_docs = list(lazy_load_documents(loader, process_pool))
+
+    sequential_docs = SafePyPDFLoader(str(pdf_path), extract_images=False).load()
+    assert [d.metadata["page"] for d in parallel_docs] == list(range(7))
+    assert [(d.page_content, d.metadata) for d in parallel_docs] == [
+        (d.page_content, d.metadata) for d in sequential_docs
+    ]
+
+
+def test_small_pdf_is_not_split(tmp_path, monkeypatch):
+    from app.utils import document_loader
+
+    monkeypatch.setattr(document_loader, "PDF_PARALLEL_MIN_PAGES", 4)
+    pdf_path = tmp_path / "small.pdf"
+    _make_pdf(str(pdf_path), num_pages=3)
+
+    assert SafePyPDFLoader(str(pdf_path)).parallel_page_ranges() == []
+
+
 def test_safe_pdf_loader_load_delegates_to_lazy_load(tmp_path):
     """SafePyPDFLoader.load() should produce the same results as list(lazy_load())."""
     pdf_path = tmp_path / "delegate_test.pdf"